@@ -1,25 +1,54 @@
 # Material Editor GUI Scaffold
-# Requirements: ttkinter, Pillow, csv, shutil
+# Requirements: ttkinter, Pillow, numpy, csv, shutil
 import ttkbootstrap as ttk
 from ttkbootstrap import Window, Style
 import tkinter as tk
 from tkinter import filedialog, colorchooser, messagebox
 from PIL import Image, ImageTk
-import csv
 import os
 import shutil
 import subprocess
 import time
 import threading
 import platform
+import queue
+import sqlite3
+from collections import deque
 
 #my stuff
 from src import material_utils as mat_utils
 from src import blender_utils
+from src import render_client
+from src import render_protocol
+from src import render_scheduler
+from src import preview_jobs
+from src import multiview
+from src import unity_export
+from src import texture_ingest
+from src import texture_store
+from src import tracing
+from src.preview_cache import PreviewCache
+from src.material_gallery import MaterialGallery
+from src.preview_display import PreviewDisplay
+from src.preview_prefetch import PreviewPrefetcher
+from src.material_store import MaterialStore
+from src.material_model import Material
+from src.material_index import MaterialIndex
+from src.material_search import MaterialSearch
 
 CONFIG_FILENAME = "editor_config.txt"
 RECENT_PROJECTS_FILE = os.path.expanduser("~/.material_editor_recent_projects.txt")
 Image.LOAD_TRUNCATED_IMAGES = True  # in your imports, if not already
+INTERACTIVE_KEY = "interactive-preview"
+OVERLAY_STAGES = ["total", "cache_lookup", "queue_wait", "round_trip", "pickup", "setup_preview_object",
+                  "apply_material_settings", "render", "readback", "png_write", "decode", "display"]
+PREVIEW_DISPLAY_SIZE = 256
+# How long a displayed final frame may wait for its PNG before it is not kept
+PREVIEW_SAVE_TIMEOUT = 10
+DEFAULT_CAMERA = {"location": [0.0, -2.5, 2.0], "light_rotation": 45.0}
+LOAD_CHUNK_SIZE = 500
+LOAD_FRAME_BUDGET = 0.015
+LOAD_TICK_MS = 10
 
 
 class MaterialEditorApp:
@@ -31,14 +60,27 @@ class MaterialEditorApp:
         self.materials = []
         self.current_index = None
         self.blender_path = None
-        self.daemon_process = None
+        self.daemon = None
         self.preview_path = None
         self.blender_pid_path = None
+        self.preview_cache = None
+        self.prefetcher = None
+        self.trace_log = None
+        self.store = None
+        self.texture_store = None
+        self.search_index = MaterialIndex()
+        self.texture_ingest = texture_ingest.TextureIngest()
+        self._load_generation = 0
+        self.loading = False
+        self.load_metrics = None
 
-        self._render_in_progress = False
-        self._retry_render = False
         self._render_timer = None
-
+        self._render_seq = 0
+        self._shown_seq = 0
+        self.quality_tiers = render_protocol.quality_tiers({})
+        self.scene = render_protocol.read_scene()
+        self._scene_timer = None
+        self.preview_display = PreviewDisplay(self.root, (PREVIEW_DISPLAY_SIZE, PREVIEW_DISPLAY_SIZE))
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
@@ -52,9 +94,11 @@ class MaterialEditorApp:
         file_menu.add_command(label="Open Project", command=self.open_project)
         file_menu.add_separator()
         file_menu.add_command(label="Save CSV", command=self.save_csv)
+        file_menu.add_command(label="Import CSV", command=self.import_csv)
         file_menu.add_separator()
         file_menu.add_command(label="Add Material", command=self.add_material)
         file_menu.add_command(label="Export to Unity", command=self.export_to_unity)
+        file_menu.add_command(label="Export All to Unity", command=self.export_all_to_unity)
         file_menu.add_separator()
         file_menu.add_command(label="Set Blender Path", command=self.set_blender_path)
         file_menu.add_separator()
@@ -64,10 +108,18 @@ class MaterialEditorApp:
         edit_menu.add_command(label="Camera Settings", command=self.open_camera_settings)
         edit_menu.add_separator()
         edit_menu.add_command(label="Refresh All Previews", command=self.refresh_all_previews)
+        edit_menu.add_command(label="Render Queue Stats", command=self.show_render_stats)
+        edit_menu.add_command(label="Rebuild Texture Proxies", command=self.rebuild_texture_proxies)
+        edit_menu.add_command(label="Deduplicate Textures", command=self.dedupe_textures)
 
 
         preview_menu = ttk.Menu(menubar, tearoff=0)
         preview_menu.add_command(label="Material Gallery", command=self.open_material_gallery)
+        preview_menu.add_command(label="Search Materials", command=self.open_material_search)
+        preview_menu.add_command(label="Render Multi-View...", command=self.open_multiview_dialog)
+        self.show_trace_overlay = ttk.BooleanVar(value=False)
+        preview_menu.add_checkbutton(label="Show Latency Overlay", variable=self.show_trace_overlay,
+                                     command=self.toggle_trace_overlay)
         preview_menu.add_separator()
         preview_menu.add_command(label="Use Custom Model", command=self.set_custom_preview_model)
         preview_menu.add_separator()
@@ -108,6 +160,7 @@ class MaterialEditorApp:
             anchor="center"
         )
         self.preview_label.pack(fill="both", expand=True, pady=(0, 10))
+        self.trace_overlay = ttk.Label(self.right_frame, text="", font=("Courier", 8), justify="left")
 
         self.name_var = ttk.StringVar()
         ttk.Label(self.right_frame, text="Material Name").pack()
@@ -120,12 +173,14 @@ class MaterialEditorApp:
         ttk.Label(self.right_frame, text="Smoothness").pack()
         smooth_slider = ttk.Scale(self.right_frame, from_=0, to=1, variable=self.roughness, orient="horizontal")
         smooth_slider.pack(fill=ttk.X)
+        smooth_slider.bind("<B1-Motion>", lambda e: self.on_slider_drag())
         smooth_slider.bind("<ButtonRelease-1>", lambda e: self.schedule_preview_render())
 
         self.metalness = ttk.DoubleVar(value=0.0)
         ttk.Label(self.right_frame, text="Metalness").pack()
         metal_slider = ttk.Scale(self.right_frame, from_=0, to=1, variable=self.metalness, orient="horizontal")
         metal_slider.pack(fill=ttk.X)
+        metal_slider.bind("<B1-Motion>", lambda e: self.on_slider_drag())
         metal_slider.bind("<ButtonRelease-1>", lambda e: self.schedule_preview_render())
 
 
@@ -140,6 +195,11 @@ class MaterialEditorApp:
             ttk.Entry(row, textvariable=var).pack(side=ttk.LEFT, fill=ttk.X, expand=True)
             ttk.Button(row, text="...", command=lambda mt=map_type: self.pick_map(mt)).pack(side=ttk.RIGHT)
 
+        self.ingest_progress = ttk.Progressbar(self.right_frame, mode="determinate", maximum=100)
+        self.ingest_progress.pack(fill=ttk.X, pady=(5, 0))
+        self.ingest_status = ttk.Label(self.right_frame, text="")
+        self.ingest_status.pack(fill=ttk.X)
+
         ttk.Button(self.right_frame, text="Save Changes", command=self.save_current_material).pack(fill=ttk.X, pady=10)
 
     def open_project_from_path(self, path):
@@ -149,12 +209,49 @@ class MaterialEditorApp:
         self.working_dir = path
         self.add_to_recent_projects(path)
         self.build_recent_menu(self.recent_menu)
+        # Blender boots while the material list streams in
+        self.start_project_services()
         self.load_project_materials()
-        self.blender_path = blender_utils.load_blender_path(self.working_dir)
 
-        self.daemon_process, self.blender_pid_path = blender_utils.launch_blender_daemon(
+    def start_project_services(self):
+        # Anything left from a previously open project belongs to that project
+        if self.prefetcher:
+            self.prefetcher.stop()
+            self.prefetcher = None
+        if self.daemon:
+            blender_utils.kill_blender_daemon(self.blender_pid_path, self.daemon)
+        if self.preview_cache:
+            self.preview_cache.save()
+
+        config = blender_utils.load_render_config(self.working_dir)
+        self.quality_tiers = render_protocol.quality_tiers(config)
+        cache_mb = int(config.get("preview_cache_mb", 256))
+        self.preview_cache = PreviewCache(self.working_dir, max_bytes=cache_mb * 1024 * 1024)
+        self.trace_log = tracing.TraceLog(self.working_dir)
+        # One per project, so its hash memo spares re-hashing stored textures on every pick
+        self.texture_store = texture_store.TextureStore(self.working_dir)
+
+        # Camera/light and preview model live in memory from here on; changes
+        # are pushed to the daemons instead of being re-read for every render
+        self.scene = render_protocol.read_scene(self.working_dir)
+
+        self.blender_path = blender_utils.load_blender_path(self.working_dir)
+        self.daemon, self.blender_pid_path = blender_utils.launch_blender_daemon(
     self.blender_path, self.working_dir
 )
+        if self.daemon:
+            self.daemon.update_scene(self.scene)
+            # Renders neighbours and stale previews while the user is idle
+            self.prefetcher = PreviewPrefetcher.from_config(self.daemon, self.preview_cache, self.working_dir,
+                                                            self.quality_tiers["final"], config)
+
+    def update_scene(self, camera=None, model=None, rerender=True):
+        # Applied in place by the running daemons; costs one re-render
+        self.scene = dict(self.scene, **{k: v for k, v in (("camera", camera), ("model", model)) if v})
+        if self.daemon:
+            self.daemon.update_scene(self.scene)
+        if rerender and self.current_index is not None:
+            self.render_preview()
 
     def on_slider_changed(self, value):
         if hasattr(self, '_slider_timer'):
@@ -166,11 +263,11 @@ class MaterialEditorApp:
             self.root.after_cancel(self._render_timer)
         self._render_timer = self.root.after(delay, self.render_preview)
 
-    def trigger_render_signal(self):
-        if self._render_in_progress:
-            self._retry_render = True
-            return
-        self.render_preview()
+    def on_slider_drag(self):
+        # Draft frames while dragging (the scheduler keeps one in flight and
+        # coalesces the rest), then a single full-quality render once idle
+        self.render_preview("draft")
+        self.schedule_preview_render(delay=400)
 
     def load_recent_projects(self):
         if not os.path.exists(RECENT_PROJECTS_FILE):
@@ -208,39 +305,87 @@ class MaterialEditorApp:
         if file and self.working_dir and self.current_index is not None:
             mat = self.materials[self.current_index]
 
-            # Create folders
-            material_folder = os.path.join(self.working_dir, "materials", mat['Name'])
-            texture_folder = os.path.join(material_folder, "textures")
-            os.makedirs(texture_folder, exist_ok=True)
-
-            # Copy file
             filename = os.path.basename(file)
-            dest = os.path.join(texture_folder, filename)
-            shutil.copy(file, dest)
+            dest = os.path.join(self.working_dir, "materials", mat.name, "textures", filename)
+            relative_path = os.path.join("materials", mat.name, "textures", filename)
+
+            # Copy and proxy generation run in the background; large textures
+            # no longer freeze the editor while they are copied
+            def on_progress(copied, total):
+                self.preview_display.post(self.show_ingest_progress, filename, copied, total)
+
+            def on_done(result):
+                self.preview_display.post(self.finish_texture_ingest, mat, map_type, relative_path, result)
+
+            self.show_ingest_progress(filename, 0, 1)
+            self.texture_ingest.ingest(file, dest, on_progress=on_progress, on_done=on_done,
+                                       store=self.texture_store)
+
+    def show_ingest_progress(self, filename, copied, total):
+        self.ingest_progress["value"] = 100.0 * copied / total if total else 100.0
+        self.ingest_status.config(text=f"Importing {filename}… {copied / (1024 * 1024):.1f} MB")
+
+    def finish_texture_ingest(self, mat, map_type, relative_path, result):
+        self.ingest_progress["value"] = 0
+        if result["status"] != "done":
+            self.ingest_status.config(text="")
+            messagebox.showerror("Texture Import", f"Could not import {result['source']}:\n{result['error']}")
+            return
 
-            # Update dictionary and UI field
-            relative_path = os.path.join("materials", mat['Name'], "textures", filename)
+        proxy = result["proxy"]
+        if proxy["status"] == "created":
+            self.ingest_status.config(text=f"Imported {os.path.basename(relative_path)} "
+                                           f"(preview proxy {proxy['bytes_proxy'] / (1024 * 1024):.1f} MB)")
+        else:
+            self.ingest_status.config(text=f"Imported {os.path.basename(relative_path)}")
+            if proxy["status"] == "failed":
+                print(f"⚠️ No preview proxy for {relative_path}: {proxy['error']}")
+
+        mat.set_map(map_type, relative_path)
+        print(f"✅ {map_type} set to {relative_path}")
+        if self.store:
+            self.store.update(mat)
+            print(f"💾 Saved {map_type} for {mat.name}")
+
+        # The user may have moved on to another material while this was copying
+        if self.current_index is not None and self.materials[self.current_index] is mat:
             self.map_vars[map_type].set(relative_path)
-            mat[map_type] = relative_path
+            self.render_preview()
 
-            print(f"✅ {map_type} set to {relative_path}")
+    def dedupe_textures(self):
+        if not self.working_dir:
+            return
 
-            # Ensure all 7 fields are written (even if some maps are missing)
-            albedo_map = mat.get("albedo_map", "")
-            metalness_map = mat.get("metalness_map", "")
+        working_dir = self.working_dir
+        store = self.texture_store
+
+        def dedupe():
+            summary = texture_store.dedupe_project(working_dir, store=store)
+            mb = 1024 * 1024
+            message = (f"{summary['files']} texture file(s): {summary['linked']} duplicate(s) linked, "
+                       f"{summary['failed']} failed.\n"
+                       f"Disk use {summary['bytes_before'] / mb:.1f} MB → {summary['bytes_after'] / mb:.1f} MB "
+                       f"(saved {summary['bytes_saved'] / mb:.1f} MB).")
+            if summary["copied"]:
+                message += "\nThis filesystem does not support hardlinks; nothing was shared."
+            print(f"✅ Texture dedupe: {message}")
+            self.preview_display.post(messagebox.showinfo, "Deduplicate Textures", message)
+
+        threading.Thread(target=dedupe, daemon=True).start()
+
+    def rebuild_texture_proxies(self):
+        if not self.working_dir or not self.materials:
+            return
 
-            config_path = os.path.join(material_folder, "material_config.txt")
-            try:
-                with open(config_path, "w") as f:
-                    f.write(f"{mat['albedo_r']},{mat['albedo_g']},{mat['albedo_b']},"
-                            f"{mat['smoothness_multiplier']},{mat['metalness_multiplier']},"
-                            f"{mat.get('albedo_map','')},{mat.get('metalness_map','')}")
-                print(f"💾 Saved config to {config_path}")
-            except Exception as e:
-                print("❌ Failed to write material config:", e)
+        paths = texture_ingest.project_textures(self.working_dir, self.materials)
 
+        def rebuild():
+            summary = texture_ingest.build_proxies(paths)
+            print(f"✅ Texture proxies: {summary['created']} created, {summary['current']} up to date, "
+                  f"{summary['small']} already small, {summary['failed']} failed "
+                  f"({summary['elapsed']:.1f}s)")
 
-            self.render_preview()
+        threading.Thread(target=rebuild, daemon=True).start()
 
     def on_material_select(self, event=None):
         selection = self.material_listbox.selection()
@@ -251,48 +396,41 @@ class MaterialEditorApp:
         self.current_index = current_index
 
         mat = self.materials[current_index]
-        material_folder = os.path.join(self.working_dir, "materials", mat['Name'])
-        material_config_path = os.path.join(material_folder, "material_config.txt")
+        material_folder = os.path.join(self.working_dir, "materials", mat.name)
 
-        # Load config values (prefer local config if available)
-        try:
-            if os.path.exists(material_config_path):
-                with open(material_config_path, "r") as f:
-                    parts = f.read().strip().split(",")
-                    r, g, b = map(float, parts[0:3])
-                    rough = float(parts[3])
-                    metal = float(parts[4])
-                    self.color = (r, g, b)
-                    self.roughness.set(rough)
-                    self.metalness.set(metal)
-                    print(f"✅ Loaded config from: {material_config_path}")
-            else:
-                self.color = (float(mat['albedo_r']), float(mat['albedo_g']), float(mat['albedo_b']))
-                self.roughness.set(float(mat['smoothness_multiplier']))
-                self.metalness.set(float(mat['metalness_multiplier']))
-        except Exception as e:
-            print("❌ Failed to load config:", e)
+        # Anything still queued or rendering for the material we just left is stale
+        if self.daemon:
+            self.daemon.cancel(lambda entry: entry["priority"] == render_scheduler.INTERACTIVE
+                               and entry["tag"] != mat.name)
+
+        # The store is the single source of truth for material values
+        self.color = mat.albedo
+        self.roughness.set(mat.smoothness_multiplier)
+        self.metalness.set(mat.metalness_multiplier)
 
-        self.name_var.set(mat['Name'])
+        self.name_var.set(mat.name)
 
         # Load texture map paths
         for map_type in self.map_vars:
-            tex_name = mat.get(map_type, '')
+            tex_name = mat.map_path(map_type)
             if tex_name:
-                local_path = os.path.join("materials", mat['Name'], "textures", os.path.basename(tex_name))
+                local_path = os.path.join("materials", mat.name, "textures", os.path.basename(tex_name))
                 self.map_vars[map_type].set(local_path)
             else:
                 self.map_vars[map_type].set("")
 
-        # Show latest preview image (might be from disk cache)
-        preview_path = os.path.join(material_folder, "preview.png")
-        if os.path.exists(preview_path):
-            try:
-                img = Image.open(preview_path).resize((256, 256))
-                self.preview_image = ImageTk.PhotoImage(img)
-                self.preview_label.config(image=self.preview_image, text="")
-            except Exception as e:
-                print("❌ Failed to load preview image:", e)
+        # Show latest preview image (might be from disk cache). The file is
+        # stat'ed and decoded off the Tk thread; a fresh render that lands
+        # first wins.
+        def show_saved(photo, expected_mat_name=mat.name):
+            if self.name_var.get() == expected_mat_name:
+                self.preview_image = photo
+                self.preview_label.config(image=photo, text="")
+
+        self.preview_display.show_saved(mat.name, os.path.join(material_folder, "preview.png"), show_saved)
+
+        if self.prefetcher:
+            self.prefetcher.focus(self.materials, current_index)
 
         # Schedule the render (small delay to let UI settle first)
         self.root.after(100, self.render_preview)
@@ -308,34 +446,62 @@ class MaterialEditorApp:
         with open(os.path.join(preview_dir, "model.txt"), "w") as f:
             f.write(f"primitive:{primitive}")
 
-        messagebox.showinfo("Primitive Preview Set", f"Primitive shape set to: {primitive}.\nReselect material to see changes.")
+        self.update_scene(model=render_protocol.read_model_spec(self.working_dir))
 
     def open_camera_settings(self):
         cam_win = ttk.Toplevel(self.root)
         cam_win.title("Camera Settings")
 
-        def update_setting(label, default):
-            return ttk.DoubleVar(value=default)
-
-        self.cam_x = update_setting("Camera X", 0.0)
-        self.cam_y = update_setting("Camera Y", -2.5)
-        self.cam_z = update_setting("Camera Z", 2.0)
-        self.light_rot = update_setting("Light Rotation", 45.0)
+        # Sliders move the camera live (debounced); Apply saves camera_config.txt,
+        # closing the window without applying puts the previous camera back
+        original = self.scene.get("camera") or DEFAULT_CAMERA
+        (cx, cy, cz), light_rot = original["location"], original["light_rotation"]
+        self.cam_x = ttk.DoubleVar(value=cx)
+        self.cam_y = ttk.DoubleVar(value=cy)
+        self.cam_z = ttk.DoubleVar(value=cz)
+        self.light_rot = ttk.DoubleVar(value=light_rot)
 
         sliders = [
-            ("Camera X", self.cam_x),
-            ("Camera Y", self.cam_y),
-            ("Camera Z", self.cam_z),
-            ("Light Rotation", self.light_rot)
+            ("Camera X", self.cam_x, -10, 10),
+            ("Camera Y", self.cam_y, -10, 10),
+            ("Camera Z", self.cam_z, -10, 10),
+            ("Light Rotation", self.light_rot, -180, 180)
         ]
 
-        for label, var in sliders:
+        def current_camera():
+            return {"location": [round(self.cam_x.get(), 2), round(self.cam_y.get(), 2), round(self.cam_z.get(), 2)],
+                    "light_rotation": round(self.light_rot.get(), 1)}
+
+        def on_change(value=None):
+            if self._scene_timer:
+                self.root.after_cancel(self._scene_timer)
+            self._scene_timer = self.root.after(150, lambda: self.update_scene(camera=current_camera()))
+
+        for label, var, low, high in sliders:
             row = ttk.Frame(cam_win)
             row.pack(fill=ttk.X, padx=10, pady=2)
-            ttk.Label(row, text=label).pack(side=ttk.LEFT)
-            ttk.Scale(row, from_=-10, to=10, resolution=0.1, orient="horizontal", variable=var).pack(side=ttk.RIGHT, fill=ttk.X, expand=True)
+            ttk.Label(row, text=label, width=14).pack(side=ttk.LEFT)
+            ttk.Label(row, textvariable=var, width=6).pack(side=ttk.RIGHT)
+            ttk.Scale(row, from_=low, to=high, orient="horizontal", variable=var,
+                      command=on_change).pack(side=ttk.RIGHT, fill=ttk.X, expand=True)
 
-        ttk.Button(cam_win, text="Apply Changes", command=self.restart_blender_daemon).pack(pady=10)
+        def apply_changes():
+            camera = current_camera()
+            try:
+                render_protocol.write_camera_config(camera)
+            except OSError as e:
+                messagebox.showerror("Camera Settings", f"Could not save camera settings:\n{e}")
+                return
+            self.update_scene(camera=camera, rerender=camera != self.scene.get("camera"))
+            cam_win.destroy()
+
+        def revert():
+            if self.scene.get("camera") != original:
+                self.update_scene(camera=original)
+            cam_win.destroy()
+
+        ttk.Button(cam_win, text="Apply Changes", command=apply_changes).pack(pady=10)
+        cam_win.protocol("WM_DELETE_WINDOW", revert)
 
     def set_custom_preview_model(self):
         if not self.working_dir:
@@ -357,104 +523,136 @@ class MaterialEditorApp:
             with open(os.path.join(preview_dir, "model.txt"), "w") as f:
                 f.write(os.path.basename(filepath))
 
-            messagebox.showinfo("Preview Model Set", f"Using model: {os.path.basename(filepath)}\nRestart Blender to see changes.")
-
-
-        filepath = filedialog.askopenfilename(
-            title="Select Custom Preview Model",
-            filetypes=[("3D Model", "*.obj *.fbx *.blend")]
-        )
-
-        if filepath:
-            preview_dir = os.path.join(self.working_dir, "preview_model")
-            os.makedirs(preview_dir, exist_ok=True)
-
-            dest = os.path.join(preview_dir, os.path.basename(filepath))
-            shutil.copy(filepath, dest)
-
-            with open(os.path.join(preview_dir, "model.txt"), "w") as f:
-                f.write(os.path.basename(filepath))
-
-            messagebox.showinfo("Preview Model Set", f"Using model: {os.path.basename(filepath)}\nRestart Blender to see changes.")
+            # The daemons import the model right away, before the re-render asks for it
+            self.update_scene(model=render_protocol.read_model_spec(self.working_dir))
 
     def refresh_all_previews(self):
         if not self.materials or not self.working_dir:
             return
 
-        def render_next(index=0):
-            if index >= len(self.materials):
-                print("✅ All previews refreshed.")
+        materials = list(self.materials)
+        quality = self.quality_tiers["final"]
+
+        def refresh():
+            def on_progress(event):
+                if event["status"] == "failed":
+                    print(f"❌ Failed to refresh {event['output']}:", event["error"])
+                elif event["status"] == "rendered" and (event["done"] % 25 == 0 or event["done"] == event["total"]):
+                    print(f"🔄 Refreshed {event['done']}/{event['total']} previews ({event['per_second']:.1f}/s)")
+
+            summary = preview_jobs.refresh_previews(self.daemon, self.preview_cache, self.working_dir,
+                                                    materials, quality, on_progress=on_progress,
+                                                    scene=self.scene)
+            if summary.get("error"):
+                print(f"⚠️ {summary['error']}, {summary['failed']} preview(s) not refreshed")
                 return
+            print(f"✅ All previews refreshed ({summary['completed']} rendered, {summary['failed']} failed, "
+                  f"{summary['cache_hits']} from cache, {summary['per_second']:.1f} renders/s).")
 
-            self.current_index = index
-            mat = self.materials[index]
-            self.name_var.set(mat['Name'])
-            self.color = (float(mat['albedo_r']), float(mat['albedo_g']), float(mat['albedo_b']))
-            self.roughness.set(float(mat['smoothness_multiplier']))
-            self.metalness.set(float(mat['metalness_multiplier']))
-            for k in self.map_vars:
-                self.map_vars[k].set(mat.get(k, ''))
+        threading.Thread(target=refresh, daemon=True).start()
 
-            def after_render():
-                self.root.after(100, lambda: render_next(index + 1))
+    def show_render_stats(self):
+        if not self.daemon:
+            messagebox.showinfo("Render Queue", "Blender daemon is not running.")
+            return
+        stats = self.daemon.stats()
+        lines = [f"Workers: {stats['workers']}   In flight: {stats['in_flight']}"]
+        for name, depth in stats["queue_depth"].items():
+            wait = stats["wait_times"][name]
+            lines.append(f"{name}: {depth} queued, wait avg {wait['avg'] * 1000:.0f} ms, "
+                         f"p95 {wait['p95'] * 1000:.0f} ms ({wait['count']} jobs)")
+        lines.append(f"Dispatched: {stats['dispatched']}   Coalesced: {stats['coalesced']}   "
+                     f"Cancelled: {stats['cancelled']}")
+        messagebox.showinfo("Render Queue", "\n".join(lines))
+
+    def open_multiview_dialog(self):
+        if not self.working_dir or self.current_index is None:
+            messagebox.showwarning("Multi-View", "Select a material first.")
+            return
 
-            self.render_preview(callback=after_render)
+        mat = self.materials[self.current_index]
+        win = ttk.Toplevel(self.root)
+        win.title(f"Multi-View: {mat.name}")
+
+        ttk.Label(win, text="Models").pack(anchor="w", padx=10, pady=(10, 0))
+        current_model = self.scene.get("model")
+        model_vars = []
+        for model in render_protocol.available_models(self.working_dir):
+            var = ttk.BooleanVar(value=model.startswith("primitive:") or model == current_model)
+            ttk.Checkbutton(win, text=render_protocol.model_label(model), variable=var).pack(anchor="w", padx=20)
+            model_vars.append((model, var))
+
+        row = ttk.Frame(win)
+        row.pack(fill=ttk.X, padx=10, pady=5)
+        ttk.Label(row, text="Camera angles").pack(side=ttk.LEFT)
+        angles_var = ttk.IntVar(value=multiview.DEFAULT_ANGLES)
+        ttk.Spinbox(row, from_=1, to=12, width=4, textvariable=angles_var).pack(side=ttk.RIGHT)
+        sheet_var = ttk.BooleanVar(value=True)
+        ttk.Checkbutton(win, text="Build sprite sheet", variable=sheet_var).pack(anchor="w", padx=10)
+        status = ttk.Label(win, text="")
+        status.pack(fill=ttk.X, padx=10)
+
+        def start():
+            models = [model for model, var in model_vars if var.get()]
+            if not models:
+                return
+            render_button.configure(state="disabled")
+            working_dir, scene, quality = self.working_dir, self.scene, self.quality_tiers["final"]
+            angles, sheet = max(1, angles_var.get()), sheet_var.get()
+            mat.albedo = self.color
+            mat.smoothness_multiplier = self.roughness.get()
+            mat.metalness_multiplier = self.metalness.get()
+
+            def on_view(view):
+                text = f"Rendered {view['done']}/{view['total']} views"
+                self.preview_display.post(lambda: status.winfo_exists() and status.configure(text=text))
+
+            def run():
+                summary = multiview.render_multiview(self.daemon, working_dir, mat.copy(), models, angles,
+                                                     quality=quality, scene=scene, sheet=sheet, on_view=on_view)
+                self.preview_display.post(self.show_multiview_result, summary)
+                self.preview_display.post(lambda: win.winfo_exists() and win.destroy())
+
+            threading.Thread(target=run, daemon=True).start()
+
+        render_button = ttk.Button(win, text="Render", command=start)
+        render_button.pack(pady=10)
+
+    def show_multiview_result(self, summary):
+        if summary.get("error") and not summary["rendered"]:
+            messagebox.showerror("Multi-View", summary["error"])
+            return
 
-        render_next()
+        win = ttk.Toplevel(self.root)
+        win.title(f"Multi-View: {summary['material']}")
+        if summary.get("sheet"):
+            img = Image.open(summary["sheet"])
+            img.thumbnail((1024, 768))
+            win.sheet_image = ImageTk.PhotoImage(img)
+            ttk.Label(win, image=win.sheet_image).pack(padx=10, pady=10)
+
+        lines = [f"{summary['rendered']} view(s) rendered, {summary['failed']} failed in {summary['elapsed']:.2f}s"]
+        for view in summary["views"]:
+            if view["status"] == "rendered":
+                lines.append(f"{render_protocol.model_label(view['model'])} @ {view['azimuth']:g}°: "
+                             f"setup {view['setup_time'] * 1000:.0f} ms, render {view['render_time'] * 1000:.0f} ms")
+            else:
+                lines.append(f"{render_protocol.model_label(view['model'])} @ {view['azimuth']:g}°: "
+                             f"{view.get('error', view['status'])}")
+        lines.append(f"Images and timings: {os.path.dirname(summary['timing'])}")
+        ttk.Label(win, text="\n".join(lines), justify="left").pack(anchor="w", padx=10, pady=(0, 10))
 
     def open_material_gallery(self):
         if not self.working_dir:
             return
 
-        gallery = ttk.Toplevel(self.root)
-        gallery.title("Material Gallery")
-        gallery.geometry = "800x600"
-
-        canvas = ttk.Canvas(gallery)
-        frame = ttk.Frame(canvas)
-        scrollbar = ttk.Scrollbar(gallery, orient="vertical", command=canvas.yview)
-        canvas.configure(yscrollcommand=scrollbar.set)
-
-
-        scrollbar.pack(side="right", fill="y")
-        canvas.pack(side="left", fill="both", expand=True)
-        canvas.create_window((0, 0), window=frame, anchor="nw")
-
-        def on_configure(event):
-            canvas.configure(scrollregion=canvas.bbox("all"))
-        frame.bind("<Configure>", on_configure)
-
-        thumb_size = (96, 96)
-        columns = 4
-
+        MaterialGallery(self.root, self.working_dir, self.materials, self.select_material_from_index)
 
-        for index, mat in enumerate(self.materials):
-            row = index // columns
-            col = index % columns
-
-            mat_name = mat['Name']
-            mat_folder = os.path.join(self.working_dir, "materials", mat_name)
-            preview_path = os.path.join(mat_folder, "preview.png")
-
-            thumb_frame = ttk.Frame(frame, relief="ridge", borderwidth=1, padding=4)
-            thumb_frame.grid(row=row, column=col, padx=5, pady=5)
-
-            try:
-                img = Image.open(preview_path).resize(thumb_size)
-            except:
-                img = Image.new("RGB", thumb_size, (80, 80, 80))
-            img_tk = ImageTk.PhotoImage(img)
-
-            def make_click_handler(index=index):
-                return lambda e: self.select_material_from_index(index)
-
-            label = ttk.Label(thumb_frame, image=img_tk)
-            label.image = img_tk  # keep reference
-            label.pack()
-            label.bind("<Button-1>", make_click_handler())
+    def open_material_search(self):
+        if not self.working_dir:
+            return
 
-            name_label = ttk.Label(thumb_frame, text=mat_name, wraplength=thumb_size[0])
-            name_label.pack()
+        MaterialSearch(self.root, self.search_index, self.materials, self.select_material_from_index)
 
     def select_material_from_index(self, index):
         if index < 0 or index >= len(self.materials):
@@ -471,37 +669,121 @@ class MaterialEditorApp:
         self.working_dir = filedialog.askdirectory(title="Select New Project Folder")
         if not self.working_dir:
             return
-        self.materials.clear()
-        for item in self.material_listbox.get_children():
-            # Get the selected item ID
-            selected_item = self.material_listbox.selection()[0]
 
         os.makedirs(os.path.join(self.working_dir, "textures"), exist_ok=True)
         os.makedirs(os.path.join(self.working_dir, "exports"), exist_ok=True)
         os.makedirs(os.path.join(self.working_dir, "materials"), exist_ok=True)  # New folder for material-specific folders
 
-        self.blender_path = blender_utils.load_blender_path(self.working_dir)
-        self.daemon_process, self.blender_pid_path = blender_utils.launch_blender_daemon(self.blender_path, self.working_dir)  
+        self.start_project_services()
+        self.load_project_materials()
 
         messagebox.showinfo("New Project", "New project initialized. You can now add materials.")
 
     def load_project_materials(self):
-        csv_path = os.path.join(self.working_dir, "materials.csv")
         self.materials.clear()
+        self.search_index.clear()
+        self.current_index = None
+        self.material_listbox.delete(*self.material_listbox.get_children())
+        self.build_recent_menu(self.recent_menu)  # Refresh recent list
 
-        for item in self.material_listbox.get_children():
-            self.material_listbox.delete(item)
-
-        if os.path.exists(csv_path):
-            with open(csv_path, newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    self.materials.append(row)
-                    self.material_listbox.insert("", "end", values=(row['Name'],))
-
-
+        if self.store:
+            self.store.close()
+            self.store = None
+
+        # Rows are streamed from the store on a background thread and inserted
+        # into the Treeview in time-boxed chunks, so the UI never stalls
+        self._load_generation += 1
+        generation = self._load_generation
+        # Set until every row is in: a material added mid-stream would be
+        # streamed in a second time, and its name could clash with unloaded rows
+        self.loading = True
+        working_dir = self.working_dir
+        chunks = queue.Queue()
+        # Guards the store handoff: once this load is abandoned nothing can be
+        # posted that insert_chunks would never drain
+        handoff = {"lock": threading.Lock(), "abandoned": False}
+        started = time.perf_counter()
+        metrics = {"rows": 0, "time_to_first_row": None}
+
+        def stream_rows():
+            # Opening the store migrates materials.csv on the first run
+            store = MaterialStore(working_dir)
+            with handoff["lock"]:
+                if handoff["abandoned"] or generation != self._load_generation:
+                    store.close()
+                    return
+                chunks.put(("store", store))
+            chunk = []
+            try:
+                for mat in store.iter_rows(batch_size=LOAD_CHUNK_SIZE):
+                    if generation != self._load_generation:
+                        break
+                    chunk.append(mat)
+                    if len(chunk) >= LOAD_CHUNK_SIZE:
+                        chunks.put(("rows", chunk))
+                        chunk = []
+                else:
+                    chunks.put(("rows", chunk))
+                    chunks.put(("done", None))
+                    return
+            except sqlite3.ProgrammingError:
+                # A newer load closed this store while rows were being read
+                if generation == self._load_generation:
+                    raise
+            # Superseded: this store is never used again (closing twice is harmless)
+            store.close()
+
+        pending = deque()
+
+        def insert_chunks():
+            if generation != self._load_generation:
+                # A newer project replaced this load; release its store if we own it
+                with handoff["lock"]:
+                    handoff["abandoned"] = True
+                    while True:
+                        try:
+                            kind, payload = chunks.get_nowait()
+                        except queue.Empty:
+                            return
+                        if kind == "store":
+                            payload.close()
+            deadline = time.perf_counter() + LOAD_FRAME_BUDGET
+            inserted = []
+            while time.perf_counter() < deadline:
+                if pending:
+                    mat = pending.popleft()
+                    self.materials.append(mat)
+                    inserted.append(mat)
+                    self.material_listbox.insert("", "end", values=(mat.name,))
+                    if metrics["time_to_first_row"] is None:
+                        metrics["time_to_first_row"] = time.perf_counter() - started
+                    metrics["rows"] += 1
+                    continue
+                try:
+                    kind, payload = chunks.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "store":
+                    self.store = payload
+                elif kind == "rows":
+                    pending.extend(payload)
+                elif kind == "done":
+                    self.loading = False
+                    self.search_index.extend(inserted)
+                    if self.prefetcher:
+                        self.prefetcher.invalidate(self.materials)
+                    metrics["total_time"] = time.perf_counter() - started
+                    self.load_metrics = metrics
+                    first_row = metrics["time_to_first_row"] or 0.0
+                    print(f"📂 Loaded {metrics['rows']} material(s) in {metrics['total_time']:.2f}s "
+                          f"(first row after {first_row * 1000:.0f} ms)")
+                    return
+            # Index this tick's rows in one vectorized append; rows line up with self.materials
+            self.search_index.extend(inserted)
+            self.root.after(LOAD_TICK_MS, insert_chunks)
 
-        self.build_recent_menu(self.recent_menu)  # Refresh recent list
+        threading.Thread(target=stream_rows, daemon=True).start()
+        self.root.after(LOAD_TICK_MS, insert_chunks)
 
 
     def open_project(self):
@@ -509,58 +791,53 @@ class MaterialEditorApp:
         if not self.working_dir:
             return
 
-        csv_path = os.path.join(self.working_dir, "materials.csv")        
-        self.materials.clear()
         self.add_to_recent_projects(self.working_dir)
-        #self.material_listbox.delete(0, ttk.END)
-        for item in self.material_listbox.get_children():
-            # Get the selected item ID
-            selected_item = self.material_listbox.selection()[0]
-
-
-        if os.path.exists(csv_path):
-            with open(csv_path, newline='') as csvfile:
-                reader = csv.DictReader(csvfile)
-                for row in reader:
-                    self.materials.append(row)
-                    self.material_listbox.insert("", "end", values=(row['Name'],))
-
-
-
-        self.blender_path = blender_utils.load_blender_path(self.working_dir)
-
-        self.daemon_process, self.blender_pid_path = blender_utils.launch_blender_daemon(
-    self.blender_path, self.working_dir
-)
+        self.start_project_services()
+        self.load_project_materials()
 
     def save_csv(self):
-        if not self.working_dir:
+        # Edits are already in the store; this exports materials.csv for Unity
+        if not self.working_dir or not self.store:
             return
 
-        if not self.materials:
+        csv_path = os.path.join(self.working_dir, "materials.csv")
+        count = self.store.export_csv(csv_path)
+        messagebox.showinfo("Save CSV", f"Exported {count} material(s) to materials.csv.")
+
+    def import_csv(self):
+        if not self.working_dir or not self.store:
+            messagebox.showwarning("No Project", "Open or create a project first.")
             return
 
-        csv_path = os.path.join(self.working_dir, "materials.csv")
-        fieldnames = list(self.materials[0].keys())
-        with open(csv_path, 'w', newline='') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-            for mat in self.materials:
-                writer.writerow(mat)
-        messagebox.showinfo("Save CSV", "Materials saved successfully.")
+        csv_path = filedialog.askopenfilename(title="Import Materials CSV", filetypes=[("CSV", "*.csv")])
+        if not csv_path:
+            return
+        count = self.store.import_csv(csv_path)
+        self.load_project_materials()
+        messagebox.showinfo("Import CSV", f"Imported {count} material(s).")
 
     def add_material(self):
-        new_mat = {
-            'Name': f'Material_{len(self.materials)}',
-            'albedo_r': 1.0, 'albedo_g': 1.0, 'albedo_b': 1.0,
-            'smoothness_multiplier': 0.5,
-            'metalness_multiplier': 0.0,
-            'albedo_map': '', 'metalness_map': '', 'detail_map': '', 'emmissive_map': ''
-        }
+        if not self.store or self.loading:
+            # Refused rather than kept in memory only: it would be lost on reload
+            if self.working_dir:
+                messagebox.showinfo("Loading", "The project is still loading; add the material once it is open.")
+            else:
+                messagebox.showwarning("No Project", "Open or create a project first.")
+            return
+
+        # Names are unique in the store; skip past ones an import already used
+        number = len(self.materials)
+        while self.store.find_by_name(f'Material_{number}'):
+            number += 1
+        new_mat = Material(f'Material_{number}')
+        self.store.insert(new_mat)
         self.materials.append(new_mat)
+        self.search_index.upsert(len(self.materials) - 1, new_mat)
+        if self.prefetcher:
+            self.prefetcher.invalidate()
 
         # Insert new material and get its ID
-        item_id = self.material_listbox.insert("", "end", values=(new_mat['Name'],))
+        item_id = self.material_listbox.insert("", "end", values=(new_mat.name,))
 
         # Clear previous selection
         self.material_listbox.selection_remove(self.material_listbox.selection())
@@ -574,169 +851,311 @@ class MaterialEditorApp:
             return
 
         mat = self.materials[self.current_index]
-        mat['Name'] = self.name_var.get()
-        mat['albedo_r'], mat['albedo_g'], mat['albedo_b'] = self.color
-        mat['smoothness_multiplier'] = self.roughness.get()
-        mat['metalness_multiplier'] = self.metalness.get()
+        new_name = self.name_var.get()
+        if self.store and new_name != mat.name:
+            existing = self.store.find_by_name(new_name)
+            if existing and existing.id != mat.id:
+                messagebox.showerror("Save Material", f"A material named {new_name} already exists.")
+                return
+        mat.name = new_name
+        mat.albedo = self.color
+        mat.smoothness_multiplier = self.roughness.get()
+        mat.metalness_multiplier = self.metalness.get()
         for k in self.map_vars:
-            mat[k] = self.map_vars[k].get()
+            mat.set_map(k, self.map_vars[k].get())
 
         # Update the label in the listbox
         try:
             # Find the correct item using selection
             selection = self.material_listbox.selection()
             if selection:
-                self.material_listbox.item(selection[0], text=mat['Name'])
+                self.material_listbox.item(selection[0], values=(mat.name,))
         except Exception as e:
             print("⚠️ Could not update list item:", e)
 
-            # Also save a copy of the config into the material's folder
-            material_folder = os.path.join(self.working_dir, "materials", mat['Name'])
-            os.makedirs(material_folder, exist_ok=True)
-            material_config_path = os.path.join(material_folder, "material_config.txt")
+        # Incremental row update instead of rewriting the whole library
+        if self.store:
+            self.store.update(mat)
+            print(f"✅ Saved {mat.name}")
+        self.search_index.upsert(self.current_index, mat)
 
-            try:
-                with open(material_config_path, "w") as f:
-                    f.write(f"{mat['albedo_r']},{mat['albedo_g']},{mat['albedo_b']},"
-                            f"{mat['smoothness_multiplier']},{mat['metalness_multiplier']},"
-                            f"{mat.get('albedo_map','')},{mat.get('metalness_map','')}")
-                print(f"✅ Saved config to: {material_config_path}")
-            except Exception as e:
-                print("❌ Failed to save per-material config:", e)
-
-        # Save a copy to material's own folder
-        material_folder = os.path.join(self.working_dir, "materials", mat['Name'])
-        os.makedirs(material_folder, exist_ok=True)
-        local_config_path = os.path.join(material_folder, "material_config.txt")
-        with open(local_config_path, "w") as f:
-            f.write(f"{mat['albedo_r']},{mat['albedo_g']},{mat['albedo_b']},"
-                    f"{mat['smoothness_multiplier']},{mat['metalness_multiplier']}")
         # Wait for any in-progress render to finish
         def wait_then_copy():
-            while getattr(self, "_render_in_progress", False):
+            while self.daemon and self.daemon.has_jobs(INTERACTIVE_KEY):
                 time.sleep(0.1)
 
-            # Now copy the current preview to the material folder
-            app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-            data_path = os.path.join(app_dir, "data")
-            central_preview_path = os.path.join(data_path, "preview.png")
-
-            material_folder = os.path.join(self.working_dir, "materials", mat['Name'])
-            os.makedirs(material_folder, exist_ok=True)
-            final_preview = os.path.join(material_folder, "preview.png")
-
-            try:
-                shutil.copy(central_preview_path, final_preview)
-                print(f"✅ Final preview saved to: {final_preview}")
-            except Exception as e:
-                print("❌ Failed to save final preview:", e)
+            # Final renders save themselves; this covers a render of these exact
+            # values that is only in the cache (e.g. after a rename)
+            if not self.preview_cache:
+                return
+            request = render_protocol.render_request(mat, self.working_dir, quality=self.quality_tiers["final"],
+                                                     scene=self.scene)
+            cache_key = self.preview_cache.key_for(request)
+            if preview_jobs.read_preview_key(self.working_dir, mat.name) == cache_key:
+                return
+            cached_path = self.preview_cache.get(cache_key)
+            if cached_path:
+                self.copy_preview(cached_path, mat.name, cache_key)
 
         threading.Thread(target=wait_then_copy, daemon=True).start()
 
-    def render_preview(self):
+    def render_preview(self, quality="final"):
         if not self.working_dir or self.current_index is None:
             return
 
-        self._render_in_progress = True
+        self._render_seq += 1
+        seq = self._render_seq
+        if self.prefetcher:
+            self.prefetcher.touch()
 
         mat = self.materials[self.current_index]
-        mat_name = mat['Name']
+        mat_name = mat.name
 
-        mat['albedo_r'], mat['albedo_g'], mat['albedo_b'] = self.color
-        mat['smoothness_multiplier'] = self.roughness.get()
-        mat['metalness_multiplier'] = self.metalness.get()
+        mat.albedo = self.color
+        mat.smoothness_multiplier = self.roughness.get()
+        mat.metalness_multiplier = self.metalness.get()
         for k in self.map_vars:
-            mat[k] = self.map_vars[k].get()
-
-        app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
-        data_path = os.path.join(app_dir, "data")
-        config_path = os.path.join(data_path, "material_config.txt")
-        command_path = os.path.join(data_path, "command.txt")
-        done_path = os.path.join(data_path, "done.txt")
-        preview_path = os.path.join(data_path, "preview.png")
-
-        with open(config_path, "w") as f:
-            f.write(f"{mat['albedo_r']},{mat['albedo_g']},{mat['albedo_b']},"
-                    f"{mat['smoothness_multiplier']},{mat['metalness_multiplier']},"
-                    f"{mat.get('albedo_map','')},{mat.get('metalness_map','')}")
-
-        if os.path.exists(done_path):
-            os.remove(done_path)
-
-        with open(command_path, "w") as f:
-            f.write("render")
+            mat.set_map(k, self.map_vars[k].get())
+
+        # Every request renders to its own scratch file, so overlapping
+        # renders can no longer overwrite each other's output
+        request = render_protocol.render_request(mat, self.working_dir, quality=self.quality_tiers[quality],
+                                                 scene=self.scene)
+        is_final = quality == "final"
+        # The request id doubles as the trace id the daemon reports its stages under
+        request["trace"] = request["id"]
+        trace = tracing.Trace(request["id"], "gui")
+        started = time.time()
+        own_preview = os.path.join(self.working_dir, "materials", mat_name, "preview.png")
 
         def wait_for_render(expected_mat_name=mat_name):
-            start = time.time()
-            while not os.path.exists(done_path):
-                if time.time() - start > 10:
+            # Identical inputs give an identical image, so a cache hit skips Blender.
+            # Only final renders are stored, but drafts happily reuse them.
+            with trace.span("cache_lookup"):
+                final_request = dict(request, quality=self.quality_tiers["final"])
+                cache_key = self.preview_cache.key_for(final_request) if self.preview_cache else None
+                cached_path = self.preview_cache.get(cache_key) if cache_key else None
+                # A preview.png rendered from these exact values (e.g. prefetched) counts
+                # as a hit too, even once the size-bounded cache has dropped it
+                if (not cached_path and cache_key and os.path.exists(own_preview)
+                        and preview_jobs.read_preview_key(self.working_dir, expected_mat_name) == cache_key):
+                    cached_path = own_preview
+            img = None
+            render_path = None
+            pending_save = None
+            if cached_path:
+                print(f"⚡ Preview cache hit for {expected_mat_name}")
+                render_path = cached_path
+            else:
+                if not self.daemon:
+                    print("⚠️ Blender daemon is not running")
+                    return
+                # Raw pixels come back through shared memory when the workers have a ring
+                # Ring frames are only for the screen; a final render is also
+                # saved as a real colour-managed PNG, which is what gets kept.
+                # That PNG is written after the reply, so it never delays the frame.
+                if self.daemon.supports_frames():
+                    request["transport"] = {"type": "ring", "display": PREVIEW_DISPLAY_SIZE, "save": is_final}
+                # Latest-wins: a newer interactive request replaces this one if
+                # it is still queued, and only one runs at a time
+                reply = self.daemon.call(request, timeout=10, priority=render_scheduler.INTERACTIVE,
+                                         key=INTERACTIVE_KEY, tag=expected_mat_name)
+                if reply is None:
                     print("❌ Timeout waiting for render")
-                    self._render_in_progress = False
                     return
-                time.sleep(0.05)
-
-            try:
-                with open(preview_path, "rb") as f:
-                    img = Image.open(f)
-                    img.load()
-                    img = img.resize((256, 256))
-            except Exception as e:
-                print("❌ Error loading preview image:", e)
-                self._render_in_progress = False
-                return
+                if "sent_at" in reply:
+                    trace.add("queue_wait", reply["queued_at"], (reply["sent_at"] - reply["queued_at"]) * 1000.0)
+                    trace.add("round_trip", reply["sent_at"], reply["round_trip"] * 1000.0,
+                              worker=reply.get("worker"))
+                trace.extend(reply.get("spans"))
+                if reply["status"] == "cancelled":
+                    return
+                if reply["status"] != "done":
+                    print("❌ Render failed:", reply.get("error"))
+                    return
+                if reply.get("frame"):
+                    with trace.span("decode", transport="ring"):
+                        frame = self.daemon.read_frame(reply)
+                        if frame is not None:
+                            width, height, pixels = frame
+                            img = Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1)
+                            if img.size != (PREVIEW_DISPLAY_SIZE, PREVIEW_DISPLAY_SIZE):
+                                img = img.resize((PREVIEW_DISPLAY_SIZE, PREVIEW_DISPLAY_SIZE))
+                    if img is None:
+                        print("⚠️ Preview frame was overwritten before it could be read")
+                        return
+                    if reply.get("saving"):
+                        render_path = reply["saving"]
+                        pending_save = reply
+                else:
+                    render_path = reply["output"]
+                    if cache_key and is_final:
+                        self.preview_cache.put(cache_key, render_path)
+
+            if img is None:
+                try:
+                    with trace.span("decode", transport="png"), open(render_path, "rb") as f:
+                        img = Image.open(f)
+                        img.load()
+                        img = img.resize((PREVIEW_DISPLAY_SIZE, PREVIEW_DISPLAY_SIZE))
+                except Exception as e:
+                    print("❌ Error loading preview image:", e)
+                    discard(render_path, cached_path)
+                    return
 
+            # Only real renders are kept: the cached image or this request's own
+            # final PNG. Drafts and ring-only frames are never saved.
+            source = render_path if cached_path or is_final else None
+            if render_path and not source:
+                discard(render_path, cached_path)
+
+            # Tk may only be touched from its own thread
+            self.preview_display.post(show, img, source, cached_path, cache_key, pending_save, expected_mat_name)
+
+        def settle(source, cache_key, pending_save):
+            # A ring frame is replied before its PNG exists: wait for the daemon's
+            # "saved" message, then cache the PNG like any other final render
+            if pending_save is None:
+                return True
+            if render_client.wait_saved(pending_save, PREVIEW_SAVE_TIMEOUT) is None:
+                print("⚠️ Final render could not be saved; it is shown but not kept")
+                return False
+            if cache_key:
+                self.preview_cache.put(cache_key, source)
+            return True
+
+        def drop(source, cached_path, cache_key, pending_save):
+            # A frame that is never shown is still cached once its PNG lands
+            settle(source, cache_key, pending_save)
+            discard(source, cached_path)
+
+        def discard(render_path, cached_path):
+            # Scratch output of this request; cached images belong to the cache
+            if render_path and render_path != cached_path:
+                try:
+                    os.remove(render_path)
+                except OSError:
+                    pass
+
+        def show(img, source, cached_path, cache_key, pending_save, expected_mat_name):
             if self.name_var.get() != expected_mat_name:
                 print(f"⚠️ Skipping outdated preview: expected {expected_mat_name}, but user selected {self.name_var.get()}")
-                self._render_in_progress = False
+                self.preview_display.submit(drop, source, cached_path, cache_key, pending_save)
                 return
 
-            self.preview_image = ImageTk.PhotoImage(img)
-            self.preview_label.config(image=self.preview_image, text="")
-
-            final_preview = os.path.join(self.working_dir, "materials", expected_mat_name, "preview.png")
-            try:
-                shutil.copy(preview_path, final_preview)
-                print(f"✅ Saved preview to: {final_preview}")
-            except Exception as e:
-                print("❌ Failed to save preview:", e)
-
-            self._render_in_progress = False
-            if self._retry_render:
-                self._retry_render = False
-                self.schedule_preview_render()
+            # Workers can finish out of order; never replace a newer frame with an older one
+            if seq < self._shown_seq:
+                self.preview_display.submit(drop, source, cached_path, cache_key, pending_save)
+                return
+            self._shown_seq = seq
+            self.preview_display.cancel()
+
+            with trace.span("display"):
+                photo = ImageTk.PhotoImage(img)
+                self.preview_image = photo
+                self.preview_label.config(image=photo, text="")
+            trace.add("total", started, (time.time() - started) * 1000.0)
+            overlay = self.show_trace_overlay.get()
+            self.preview_display.submit(after_display, source, cached_path, cache_key, pending_save,
+                                        expected_mat_name, overlay)
+
+        def after_display(source, cached_path, cache_key, pending_save, expected_mat_name, overlay):
+            # Disk work for a frame that is already on screen, run on the decode pool
+            if self.trace_log:
+                self.trace_log.write(trace, material=expected_mat_name, quality=quality,
+                                     cache_hit=bool(cached_path))
+                if overlay:
+                    self.preview_display.post(self.update_trace_overlay)
+
+            # Copied straight from the render or cache file, never through a
+            # shared scratch file another render could have overwritten
+            if source and source != own_preview:
+                saved = None
+                if settle(source, cache_key, pending_save):
+                    saved = self.copy_preview(source, expected_mat_name, cache_key)
+                discard(source, cached_path)
+                if saved:
+                    # Reuse the PhotoImage on screen, unless a newer frame replaced it meanwhile
+                    self.preview_display.remember_saved(
+                        expected_mat_name, saved, lambda: self.preview_image if self._shown_seq == seq else None)
 
         threading.Thread(target=wait_for_render, daemon=True).start()
 
+    def toggle_trace_overlay(self):
+        if self.show_trace_overlay.get():
+            self.trace_overlay.place(in_=self.preview_label, x=4, y=4)
+            self.trace_overlay.lift()
+            self.update_trace_overlay()
+        else:
+            self.trace_overlay.place_forget()
+
+    def update_trace_overlay(self):
+        # Session p50/p95 per stage, in milliseconds
+        summary = self.trace_log.summary() if self.trace_log else {}
+        lines = [f"{'stage':<24}{'p50':>8}{'p95':>8}{'n':>6}"]
+        for stage in OVERLAY_STAGES:
+            if stage in summary:
+                stats = summary[stage]
+                lines.append(f"{stage:<24}{stats['p50']:>8.1f}{stats['p95']:>8.1f}{stats['count']:>6}")
+        self.trace_overlay.config(text="\n".join(lines))
+
+    def copy_preview(self, source_path, mat_name, cache_key=None):
+        final_preview = os.path.join(self.working_dir, "materials", mat_name, "preview.png")
+        try:
+            os.makedirs(os.path.dirname(final_preview), exist_ok=True)
+            shutil.copy(source_path, final_preview + ".tmp")
+            os.replace(final_preview + ".tmp", final_preview)
+            print(f"✅ Saved preview to: {final_preview}")
+        except Exception as e:
+            print("❌ Failed to save preview:", e)
+            return None
+        preview_jobs.write_preview_key(self.working_dir, mat_name, cache_key)
+        return final_preview
+
     def export_to_unity(self):
         if self.current_index is None:
             messagebox.showinfo("Export", "Select a material first.")
             return
 
         mat = self.materials[self.current_index]
-        export_dir = os.path.join(self.working_dir, "exports", mat['Name'])
+        summary = unity_export.export_materials(self.working_dir, [mat])
+        print(f"✅ Exported {mat.name} ({summary['exported']} exported, {summary['skipped']} unchanged)")
+
+    def export_all_to_unity(self):
+        if not self.working_dir or not self.materials:
+            return
 
-        os.makedirs(os.path.join(export_dir, "textures"), exist_ok=True)
+        materials = list(self.materials)
+        working_dir = self.working_dir
 
-        for map_type in ["albedo_map", "metalness_map", "detail_map", "emmissive_map"]:
-            src = os.path.join(self.working_dir, "materials", mat['Name'], mat[map_type])
-            if os.path.exists(src):
-                shutil.copy(src, os.path.join(export_dir, "textures", os.path.basename(src)))
-
-        cs_path = os.path.join(export_dir, f"{mat['Name']}.cs")
-        with open(cs_path, 'w') as f:
-            f.write(f"// Auto-generated material definition\n")
-            f.write(f"Material mat = new Material(Shader.Find(\"Standard\"));\n")
-            f.write(f"mat.color = new Color({mat['albedo_r']}f, {mat['albedo_g']}f, {mat['albedo_b']}f);\n")
-            f.write(f"mat.SetFloat(\"_Glossiness\", {mat['smoothness_multiplier']}f);\n")
-            f.write(f"mat.SetFloat(\"_Metallic\", {mat['metalness_multiplier']}f);\n")
-            for map_type in ["albedo_map", "metalness_map", "detail_map", "emmissive_map"]:
-                tex_var = map_type.replace("_map", "")
-                tex_file = os.path.basename(mat[map_type])
-                if tex_file:
-                    f.write(f"mat.SetTexture(\"_{tex_var}\", Resources.Load<Texture2D>(\"textures/{tex_file}\"));\n")
+        def export_all():
+            def on_progress(event):
+                if event["status"] == "failed":
+                    print(f"❌ Failed to export {event['material']}:", event["error"])
+                elif event["done"] % 50 == 0 or event["done"] == event["total"]:
+                    print(f"📦 Exported {event['done']}/{event['total']} materials")
+
+            summary = unity_export.export_materials(working_dir, materials, on_progress=on_progress)
+            mb = 1024 * 1024
+            message = (f"{summary['exported']} exported, {summary['skipped']} unchanged, {summary['failed']} failed "
+                       f"in {summary['elapsed']:.1f}s.\n"
+                       f"Copied {summary['bytes_copied'] / mb:.1f} MB, linked {summary['bytes_linked'] / mb:.1f} MB, "
+                       f"skipped {summary['bytes_skipped'] / mb:.1f} MB.")
+            print(f"✅ Export All: {message}")
+            self.preview_display.post(messagebox.showinfo, "Export All to Unity", message)
+
+        threading.Thread(target=export_all, daemon=True).start()
 
     def on_close(self):
-        blender_utils.kill_blender_daemon(self.blender_pid_path)
+        if self.prefetcher:
+            self.prefetcher.stop()
+        blender_utils.kill_blender_daemon(self.blender_pid_path, self.daemon)
+        if self.preview_cache:
+            self.preview_cache.save()
+        if self.store:
+            self.store.close()
+        self.texture_ingest.shutdown()
+        self.preview_display.shutdown()
         self.root.destroy()
 
     def set_blender_path(self):
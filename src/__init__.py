@@ -1,2 +1,10 @@
 # src/__init__.py
-from .MasterMaterialEditor import MaterialEditorApp
+# The editor class is imported lazily so headless tools (python -m src.cli)
+# can use the package without pulling in Tk or PIL.ImageTk.
+
+
+def __getattr__(name):
+    if name == "MaterialEditorApp":
+        from .MasterMaterialEditor import MaterialEditorApp
+        return MaterialEditorApp
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
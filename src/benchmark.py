@@ -0,0 +1,395 @@
+# Editor performance benchmarks against src/fake_daemon.py, so results depend
+# on the editor side (scheduling, transport, caches, I/O) and not on Blender:
+#
+#   python -m src.benchmark [--materials 10000] [--workers 4] [--delay-ms 40]
+#                           [--output report.json] [--compare previous.json] [--gui]
+#
+# A synthetic project is generated in a temporary folder (or --project), then
+# each stage is timed and the results are written as one JSON report. With
+# --compare, every numeric metric is printed next to the previous report's.
+# Progress goes to stderr; the report path is the only line on stdout.
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src import blender_utils
+from src import fake_daemon
+from src import preview_jobs
+from src import render_protocol
+from src import render_scheduler
+from src import unity_export
+from src.material_index import MaterialIndex
+from src.material_model import Material, CSV_FIELDS
+from src.material_store import MaterialStore
+from src.preview_cache import PreviewCache
+from src.tracing import percentile
+
+REPORT_VERSION = 1
+TEXTURE_SIZE = 256
+GALLERY_SCREEN = 42          # cells in view for an 800x600 gallery, overscan included
+LOAD_CHUNK_SIZE = 500        # as in MaterialEditorApp.load_project_materials
+INTERACTIVE_KEY = "interactive-preview"  # shares the editor's latest-wins slot
+PREVIEW_DISPLAY_SIZE = 256
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def latency_stats(samples):
+    # Milliseconds
+    values = sorted(s * 1000.0 for s in samples)
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "mean": round(sum(values) / len(values), 3),
+            "p50": round(percentile(values, 0.5), 3), "p95": round(percentile(values, 0.95), 3),
+            "max": round(values[-1], 3)}
+
+
+def generate_project(working_dir, count, textures, workers, seed=1):
+    # Deterministic materials.csv plus a small pool of shared textures; the
+    # store migrates the CSV the first time the project is opened
+    rng = random.Random(seed)
+    pool_dir = os.path.join(working_dir, "textures", "pool")
+    os.makedirs(pool_dir, exist_ok=True)
+    texture_paths = []
+    for index in range(textures):
+        path = os.path.join(pool_dir, f"tex_{index:03d}.png")
+        settings = {"albedo": [rng.random(), rng.random(), rng.random()], "smoothness": rng.random()}
+        fake_daemon.write_png(path, TEXTURE_SIZE, TEXTURE_SIZE, fake_daemon.material_image(settings, TEXTURE_SIZE))
+        texture_paths.append(os.path.relpath(path, working_dir).replace(os.sep, "/"))
+
+    with open(os.path.join(working_dir, "materials.csv"), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for index in range(count):
+            mat = Material(f"Material_{index:05d}", rng.random(), rng.random(), rng.random(),
+                           round(rng.random(), 3), round(rng.random(), 3),
+                           albedo_map=texture_paths[index % len(texture_paths)] if texture_paths else "")
+            writer.writerow(mat.to_csv())
+
+    with open(os.path.join(working_dir, "render_config.txt"), "w") as f:
+        f.write(f"workers={workers}\nthreads_per_render=1\npreview_transport=shm\n")
+
+
+def bench_load(working_dir):
+    # What load_project_materials does off the Tk thread: open (and on the
+    # first run migrate) the store, stream rows in chunks, build the search index
+    started = time.perf_counter()
+    store = MaterialStore(working_dir)
+    opened = time.perf_counter() - started
+    materials = []
+    first_row = None
+    chunk = []
+    for mat in store.iter_rows(batch_size=LOAD_CHUNK_SIZE):
+        if first_row is None:
+            first_row = time.perf_counter() - started
+        chunk.append(mat)
+        if len(chunk) >= LOAD_CHUNK_SIZE:
+            materials.extend(chunk)
+            chunk = []
+    materials.extend(chunk)
+    rows_done = time.perf_counter() - started
+    index = MaterialIndex()
+    index.extend(materials)
+    total = time.perf_counter() - started
+    store.close()
+    return materials, {"rows": len(materials), "open_store": round(opened, 4),
+                       "time_to_first_row": round(first_row or 0.0, 4), "stream_rows": round(rows_done, 4),
+                       "build_index": round(total - rows_done, 4), "total_time": round(total, 4),
+                       "rows_per_second": round(len(materials) / total, 1) if total > 0 else 0.0}
+
+
+def interactive_render(pool, working_dir, mat, quality):
+    # Same request and frame handling as MaterialEditorApp.render_preview
+    request = render_protocol.render_request(mat, working_dir, quality=quality)
+    request["transport"] = {"type": "ring", "display": PREVIEW_DISPLAY_SIZE}
+    started = time.perf_counter()
+    reply = pool.call(request, timeout=10, priority=render_scheduler.INTERACTIVE, key=INTERACTIVE_KEY, tag=mat.name)
+    if not reply or reply["status"] != "done":
+        return None
+    if reply.get("frame"):
+        frame = pool.read_frame(reply)
+        if frame is None:
+            return None
+        try:
+            from PIL import Image
+        except ImportError:
+            pass
+        else:
+            width, height, pixels = frame
+            Image.frombuffer("RGBA", (width, height), pixels, "raw", "RGBA", 0, 1).load()
+    else:
+        os.remove(reply["output"])
+    return time.perf_counter() - started
+
+
+def bench_interactive(pool, working_dir, materials, count, quality):
+    samples = []
+    failed = 0
+    for i in range(count):
+        elapsed = interactive_render(pool, working_dir, materials[i % len(materials)], quality)
+        if elapsed is None:
+            failed += 1
+        else:
+            samples.append(elapsed)
+    return dict(latency_stats(samples), failed=failed, quality=quality["tier"])
+
+
+def bench_refresh(pool, working_dir, materials, quality, interactive_quality, interval=0.1):
+    # refresh_all_previews throughput, first into an empty preview cache and
+    # then again from it. Interactive renders keep arriving during the cold
+    # pass to measure how well they cut ahead of the batch.
+    cache = PreviewCache(working_dir, max_bytes=4 * 1024 ** 3)
+    samples = []
+    stop = threading.Event()
+
+    def interact():
+        i = 0
+        while not stop.wait(interval):
+            elapsed = interactive_render(pool, working_dir, materials[-1 - i % len(materials)], interactive_quality)
+            if elapsed is not None:
+                samples.append(elapsed)
+            i += 1
+
+    thread = threading.Thread(target=interact, daemon=True)
+    thread.start()
+    try:
+        cold = preview_jobs.refresh_previews(pool, cache, working_dir, materials, quality)
+    finally:
+        stop.set()
+        thread.join()
+    # refresh_previews only times the render part; cache hits are timed here
+    started = time.perf_counter()
+    warm = preview_jobs.refresh_previews(pool, cache, working_dir, materials, quality)
+    elapsed = time.perf_counter() - started
+    cache.save()
+    keep = ("total", "cache_hits", "completed", "failed", "cancelled", "elapsed", "per_second")
+    return {"cold": {k: cold[k] for k in keep},
+            "cached": dict({k: warm[k] for k in keep}, elapsed=round(elapsed, 4),
+                           per_second=round(warm["total"] / elapsed, 1) if elapsed > 0 else 0.0),
+            "interactive_under_load": latency_stats(samples)}
+
+
+def bench_gallery(working_dir, materials, workers=4):
+    # First screen of the Material Gallery: thumbnails decoded on the same
+    # pool size, cold (made from preview.png) and warm (from the thumb cache)
+    from src.thumbnail_cache import ThumbnailCache
+
+    thumbs = ThumbnailCache(working_dir)
+    screen = [preview_jobs.preview_path_for(working_dir, mat) for mat in materials[:GALLERY_SCREEN]]
+    result = {"cells": len(screen)}
+    for label in ("cold", "warm"):
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(thumbs.load, screen))
+        result[label] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def bench_export(working_dir, materials, workers):
+    cold = unity_export.export_materials(working_dir, materials, workers=workers)
+    warm = unity_export.export_materials(working_dir, materials, workers=workers)
+    result = {}
+    for label, summary in (("cold", cold), ("incremental", warm)):
+        result[label] = dict(summary, per_second=round(summary["total"] / summary["elapsed"], 1)
+                             if summary["elapsed"] else None)
+    return result
+
+
+def bench_gui(working_dir):
+    # The real load_project_materials and open_material_gallery, when Tk and
+    # ttkbootstrap are available and a display is reachable
+    try:
+        from ttkbootstrap import Window
+        from src.MasterMaterialEditor import MaterialEditorApp
+        from src.material_gallery import MaterialGallery
+        root = Window(themename="darkly")
+    except Exception as e:
+        return {"skipped": str(e)}
+
+    app = MaterialEditorApp(root)
+    try:
+        app.working_dir = working_dir
+        app.load_project_materials()
+        deadline = time.time() + 600
+        while app.load_metrics is None or "total_time" not in app.load_metrics:
+            root.update()
+            if time.time() > deadline:
+                return {"skipped": "load_project_materials did not finish"}
+        load = {k: round(v, 4) if isinstance(v, float) else v for k, v in app.load_metrics.items()}
+
+        started = time.perf_counter()
+        gallery = MaterialGallery(root, working_dir, app.materials, lambda index: None)
+        root.update()
+        shown = None
+        while time.perf_counter() - started < 60:
+            root.update()
+            if shown is None and gallery.cells:
+                shown = time.perf_counter() - started
+            if gallery.cells and all(index in gallery.photos for index in gallery.cells):
+                break
+        gallery.window.destroy()
+        return {"load_project_materials": load,
+                "open_material_gallery": {"cells": len(gallery.cells), "first_paint": round(shown or 0.0, 4),
+                                          "thumbnails_shown": round(time.perf_counter() - started, 4)}}
+    finally:
+        if app.store:
+            app.store.close()
+        app.texture_ingest.shutdown()
+        root.destroy()
+
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, previous):
+    # {metric: {"previous", "current", "change"}} for metrics in both reports
+    old = flatten(previous.get("results", {}))
+    new = flatten(results)
+    comparison = {}
+    for name in sorted(set(old) & set(new)):
+        change = (new[name] - old[name]) / old[name] if old[name] else None
+        comparison[name] = {"previous": old[name], "current": new[name],
+                            "change": round(change, 4) if change is not None else None}
+    return comparison
+
+
+def run(args):
+    working_dir = os.path.abspath(args.project) if args.project else tempfile.mkdtemp(prefix="material_bench_")
+    if os.path.exists(os.path.join(working_dir, "materials.db")):
+        log(f"Refusing to benchmark over an existing project: {working_dir}")
+        return None
+    os.makedirs(working_dir, exist_ok=True)
+    results = {}
+    pool = pid_path = None
+    try:
+        log(f"Generating {args.materials} materials in {working_dir}")
+        started = time.perf_counter()
+        generate_project(working_dir, args.materials, args.textures, args.workers, seed=args.seed)
+        results["generate"] = {"seconds": round(time.perf_counter() - started, 4)}
+
+        log("Loading project")
+        materials, results["load_project_materials"] = bench_load(working_dir)
+        _, results["load_project_materials_warm"] = bench_load(working_dir)
+
+        log(f"Starting {args.workers} fake daemon(s), {args.delay_ms} ms per render")
+        started = time.perf_counter()
+        command = [sys.executable, os.path.abspath(fake_daemon.__file__), "--delay-ms", str(args.delay_ms)]
+        pool, pid_path = blender_utils.launch_blender_daemon(None, working_dir, workers=args.workers,
+                                                             command=command)
+        if not pool or not all(c.wait_until_connected(30) for c in pool.connections):
+            log("Fake daemons did not connect")
+            return None
+        results["startup"] = {"seconds": round(time.perf_counter() - started, 4), "workers": len(pool)}
+
+        tiers = render_protocol.quality_tiers(blender_utils.load_render_config(working_dir))
+        log(f"Interactive latency, {args.interactive} renders per tier")
+        # A few renders first so the daemons have built their shading tables
+        for tier in ("draft", "final"):
+            bench_interactive(pool, working_dir, materials, len(pool) * 2, tiers[tier])
+        results["interactive"] = {tier: bench_interactive(pool, working_dir, materials, args.interactive, tiers[tier])
+                                  for tier in ("draft", "final")}
+
+        refresh = materials[:args.refresh] if args.refresh else materials
+        log(f"Refreshing {len(refresh)} previews")
+        results["refresh_all_previews"] = bench_refresh(pool, working_dir, refresh, tiers["final"], tiers["draft"])
+        results["queue"] = pool.stats()
+
+        log("Opening the gallery")
+        results["open_material_gallery"] = bench_gallery(working_dir, refresh)
+
+        export = materials[:args.export] if args.export else materials
+        log(f"Exporting {len(export)} materials")
+        results["export"] = bench_export(working_dir, export, args.export_workers)
+
+        if args.gui:
+            log("Running the GUI stages")
+            results["gui"] = bench_gui(working_dir)
+    finally:
+        if pool:
+            blender_utils.kill_blender_daemon(pid_path, pool)
+        if not args.keep and not args.project:
+            shutil.rmtree(working_dir, ignore_errors=True)
+    return results
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.benchmark", description="Material Editor benchmarks")
+    parser.add_argument("--materials", type=int, default=10000, help="Materials in the synthetic project")
+    parser.add_argument("--textures", type=int, default=64, help="Distinct textures shared by the materials")
+    parser.add_argument("--workers", type=int, default=4, help="Fake daemon workers")
+    parser.add_argument("--delay-ms", type=float, default=fake_daemon.DEFAULT_DELAY_MS,
+                        help="Simulated render time for a 512x512 preview")
+    parser.add_argument("--interactive", type=int, default=100, help="Interactive renders per quality tier")
+    parser.add_argument("--refresh", type=int, default=2000, help="Materials to refresh (0 = all)")
+    parser.add_argument("--export", type=int, default=0, help="Materials to export (0 = all)")
+    parser.add_argument("--export-workers", type=int, default=unity_export.DEFAULT_EXPORT_WORKERS)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--project", help="Build the synthetic project here instead of a temporary folder")
+    parser.add_argument("--keep", action="store_true", help="Keep the temporary project afterwards")
+    parser.add_argument("--gui", action="store_true", help="Also time the real Tk load and gallery")
+    parser.add_argument("--output", default="benchmark_report.json")
+    parser.add_argument("--compare", metavar="REPORT", help="Previous report to compare against")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    previous = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+
+    # Shared modules print progress; keep stdout for the report path
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    try:
+        started = time.time()
+        results = run(args)
+    finally:
+        sys.stdout = stdout
+    if results is None:
+        return 2
+
+    report = {"version": REPORT_VERSION,
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(started)),
+              "duration": round(time.time() - started, 3),
+              "environment": {"python": platform.python_version(), "platform": platform.platform(),
+                              "machine": platform.machine(), "cpu_count": os.cpu_count()},
+              "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "project", "keep")},
+              "results": results}
+    if previous:
+        report["comparison"] = compare(results, previous)
+        if previous.get("config") != report["config"]:
+            log("⚠️ The previous report was made with different settings")
+        for name, row in report["comparison"].items():
+            change = f"{row['change'] * 100:+.1f}%" if row["change"] is not None else "n/a"
+            log(f"{name:60s} {row['previous']:>12} -> {row['current']:>12}  {change}")
+
+    with open(args.output + ".tmp", "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(args.output + ".tmp", args.output)
+    print(os.path.abspath(args.output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
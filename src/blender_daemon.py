@@ -1,20 +1,25 @@
 import bpy
 import os
+import sys
 import time
 import math
+import queue
+import socket
+import threading
 import mathutils
 import errno
+from collections import OrderedDict
+
+# Blender runs this file as a script, so make the shared protocol importable
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_protocol
+from preview_buffer import FrameRing
+from tracing import Trace
 
 # Resolve paths
 app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 data_path = os.path.join(app_dir, "data")
-preview_model_dir = os.path.join(data_path, "preview_model")
-model_info_path = os.path.join(preview_model_dir, "model.txt")
-config_path = os.path.join(data_path, "material_config.txt")
-command_path = os.path.join(data_path, "command.txt")
-done_path = os.path.join(data_path, "done.txt")
 preview_path = os.path.join(data_path, "preview.png")
-camera_config_path = os.path.join(data_path, "camera_config.txt")
 
 
 def safe_remove(path, retries=5, delay=0.1):
@@ -33,35 +38,94 @@ def safe_remove(path, retries=5, delay=0.1):
     return False
 
 
-def apply_material_settings():
-    if not os.path.exists(config_path):
-        print("❌ Missing material config")
-        return
-
+def file_identity(path):
+    # Hardlinked copies (see src/texture_store.py) share one inode, so they
+    # share one loaded image as well
+    stat = os.stat(path)
+    key = (stat.st_dev, stat.st_ino) if stat.st_ino else os.path.abspath(path)
+    return key, stat
+
+
+class TextureCache:
+    # Keeps texture images loaded across renders, reloads them when the file
+    # on disk changes and evicts the least recently used ones from
+    # bpy.data.images once their pixel memory exceeds the budget.
+    def __init__(self, budget_bytes):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()
+        self.total_bytes = 0
+
+    def load(self, path):
+        path = os.path.abspath(path)
+        key, stat = file_identity(path)
+        entry = self.entries.get(key)
+        if entry:
+            try:
+                entry["image"].name
+            except ReferenceError:
+                self._forget(key)
+                entry = None
+        if entry and entry["mtime"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+            self.entries.move_to_end(key)
+            return entry["image"]
+
+        if entry:
+            print(f"🔄 Texture changed on disk, reloading: {path}")
+            image = entry["image"]
+            image.reload()
+            self._forget(key, remove=False)
+        else:
+            image = bpy.data.images.load(path, check_existing=False)
+
+        pixel_bytes = image.size[0] * image.size[1] * image.channels * (4 if image.is_float else 1)
+        self.entries[key] = {"image": image, "path": path, "mtime": stat.st_mtime_ns,
+                             "size": stat.st_size, "bytes": pixel_bytes}
+        self.total_bytes += pixel_bytes
+        return image
+
+    def _forget(self, key, remove=True):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["bytes"]
+        if remove:
+            try:
+                bpy.data.images.remove(entry["image"])
+            except ReferenceError:
+                pass
+
+    def evict(self, keep=()):
+        keep_keys = set()
+        for path in keep:
+            try:
+                keep_keys.add(file_identity(path)[0])
+            except (OSError, TypeError):
+                pass
+        for key in list(self.entries):
+            if self.total_bytes <= self.budget_bytes:
+                break
+            if key in keep_keys:
+                continue
+            print(f"🧹 Evicting texture from memory: {self.entries[key]['path']}")
+            self._forget(key)
+
+
+def apply_material_settings(settings):
     try:
-        with open(config_path, "r") as f:
-            parts = f.read().strip().split(",")
-            if len(parts) < 5:
-                print(f"❌ Invalid material config: {','.join(parts)}")
-                return
+        r, g, b = map(float, settings["albedo"])
+        smoothness = float(settings["smoothness"])
+        metalness = float(settings["metalness"])
 
-            # Parse the required floats
-            r, g, b = map(float, parts[0:3])
-            smoothness = float(parts[3])
-            metalness = float(parts[4])
-
-            # Optional maps
-            albedo_map_path = parts[5].strip() if len(parts) > 5 else ""
-            metalness_map_path = parts[6].strip() if len(parts) > 6 else ""
+        # Optional maps
+        albedo_map_path = settings.get("albedo_map", "")
+        metalness_map_path = settings.get("metalness_map", "")
 
     except Exception as e:
-        print("❌ Failed to parse material config:", e)
-        return
+        print("❌ Failed to parse material settings:", e)
+        return False
 
     material = bpy.data.materials.get("PreviewMaterial")
     if not material:
         print("❌ Material not found")
-        return
+        return False
 
     node_tree = material.node_tree
     nodes = node_tree.nodes
@@ -72,21 +136,23 @@ def apply_material_settings():
 
     if not group_node:
         print("❌ PBRMaterialGroup not found")
-        return
+        return False
 
     # Load images if provided
     if albedo_tex_node and albedo_map_path and os.path.exists(albedo_map_path):
         try:
-            albedo_tex_node.image = bpy.data.images.load(albedo_map_path, check_existing=True)
+            albedo_tex_node.image = texture_cache.load(albedo_map_path)
         except Exception as e:
             print("⚠️ Failed to load albedo map:", e)
 
     if metalness_tex_node and metalness_map_path and os.path.exists(metalness_map_path):
         try:
-            metalness_tex_node.image = bpy.data.images.load(metalness_map_path, check_existing=True)
+            metalness_tex_node.image = texture_cache.load(metalness_map_path)
         except Exception as e:
             print("⚠️ Failed to load metalness map:", e)
 
+    texture_cache.evict(keep=(albedo_map_path, metalness_map_path))
+
     # Set group inputs
     inputs = group_node.inputs
     if "AlbedoColor" in inputs:
@@ -97,14 +163,15 @@ def apply_material_settings():
         inputs["MetalnessMultiplier"].default_value = metalness
 
     print("✅ Material values and maps set successfully")
+    return True
 
 
-def frame_camera_and_light(obj, camera, light):
-    if not os.path.exists(camera_config_path):
+def frame_camera_and_light(obj, camera, light, camera_config):
+    if not camera_config:
         return
     try:
-        with open(camera_config_path, "r") as f:
-            cx, cy, cz, light_rot = map(float, f.read().strip().split(","))
+        cx, cy, cz = map(float, camera_config["location"])
+        light_rot = float(camera_config["light_rotation"])
         camera.location = (cx, cy, cz)
         direction = mathutils.Vector((0, 0, 0)) - camera.location
         camera.rotation_euler = direction.to_track_quat('-Z', 'Y').to_euler()
@@ -120,18 +187,21 @@ def smooth_object(obj):
     bpy.ops.object.shade_smooth()
 
 
-def setup_preview_object():
-    primitive_fallback = True
+def remove_stray_meshes(keep=()):
+    # Deletes meshes that are not resident preview models (leftovers of imports)
+    for o in list(bpy.context.scene.objects):
+        if o.type == 'MESH' and o.name not in keep:
+            bpy.data.objects.remove(o, do_unlink=True)
+
+
+def build_preview_object(model_spec, keep=()):
     obj = None
-    if os.path.exists(model_info_path):
-        name = open(model_info_path).read().strip()
+    if model_spec:
+        name = model_spec
         if name.startswith("primitive:"):
             primitive = name.split(":")[1]
+            remove_stray_meshes(keep)
             bpy.ops.object.select_all(action='DESELECT')
-            for o in bpy.context.scene.objects:
-                if o.type == 'MESH':
-                    o.select_set(True)
-            bpy.ops.object.delete()
             if primitive == "sphere":
                 bpy.ops.mesh.primitive_uv_sphere_add()
                 obj = bpy.context.active_object
@@ -145,13 +215,10 @@ def setup_preview_object():
                 obj.name = "PreviewObject"
         else:
             ext = os.path.splitext(name)[1].lower()
-            full_path = os.path.join(data_path, name)
+            full_path = name
             if os.path.exists(full_path):
+                remove_stray_meshes(keep)
                 bpy.ops.object.select_all(action='DESELECT')
-                for o in bpy.context.scene.objects:
-                    if o.type == 'MESH':
-                        o.select_set(True)
-                bpy.ops.object.delete()
                 if ext == ".obj":
                     bpy.ops.import_scene.obj(filepath=full_path)
                 elif ext == ".fbx":
@@ -172,7 +239,7 @@ def setup_preview_object():
     if not obj:
         obj = bpy.data.objects.get("PreviewObject")
 
-    if obj and obj.name == "PreviewObject":
+    if obj and obj.name.startswith("PreviewObject"):
         if obj.data.name.startswith("Sphere") or "Sphere" in obj.data.name:
             bpy.context.view_layer.objects.active = obj
             obj.select_set(True)
@@ -181,13 +248,397 @@ def setup_preview_object():
     return obj
 
 
+# Preview meshes stay resident between renders, up to MAX_RESIDENT_MODELS of
+# them (least recently used first out); only the active one is rendered. A
+# mesh is rebuilt when its model spec or the model file on disk changes.
+MAX_RESIDENT_MODELS = 4
+resident_models = OrderedDict()
+
+
+def model_cache_key(model_spec):
+    if not model_spec or model_spec.startswith("primitive:"):
+        return (model_spec,)
+    try:
+        stat = os.stat(model_spec)
+    except OSError:
+        return (model_spec,)
+    return (model_spec, stat.st_mtime_ns, stat.st_size)
+
+
+def show_only(obj):
+    for o in bpy.context.scene.objects:
+        if o.type == 'MESH':
+            o.hide_render = o != obj
+
+
+def resident_names():
+    names = set()
+    for key, obj in list(resident_models.items()):
+        try:
+            names.add(obj.name)
+        except ReferenceError:
+            del resident_models[key]
+    return names
+
+
+def setup_preview_object(model_spec):
+    key = model_cache_key(model_spec)
+    obj = resident_models.get(key)
+    if obj is not None:
+        try:
+            resident = obj.name in bpy.context.scene.objects
+        except ReferenceError:
+            resident = False
+        if resident:
+            resident_models.move_to_end(key)
+            show_only(obj)
+            return obj
+        del resident_models[key]
+
+    start = time.time()
+    obj = build_preview_object(model_spec, keep=resident_names())
+    if obj:
+        resident_models[key] = obj
+        while len(resident_models) > MAX_RESIDENT_MODELS:
+            _, evicted = resident_models.popitem(last=False)
+            try:
+                bpy.data.objects.remove(evicted, do_unlink=True)
+            except ReferenceError:
+                pass
+        show_only(obj)
+    print(f"📦 Loaded preview model {model_spec} in {time.time() - start:.2f}s")
+    return obj
+
+
+def apply_quality(quality):
+    # Resolution and samples are switched per job so drafts and finals can interleave
+    quality = quality or {}
+    resolution = int(quality.get("resolution") or 512)
+    scene.render.resolution_x = resolution
+    scene.render.resolution_y = resolution
+    samples = int(quality.get("samples") or 0) or default_samples
+    if scene.render.engine == 'CYCLES':
+        scene.cycles.samples = samples
+    elif hasattr(scene, "eevee"):
+        scene.eevee.taa_render_samples = samples
+
+
+# Latest camera/light and model pushed by the editor ("scene" messages);
+# requests that carry their own values override it
+scene_state = {"camera": None, "model": None, "applied_camera": None}
+
+
+def apply_scene(model_spec, camera_config, trace=None):
+    trace = trace or Trace(None, "daemon")
+    with trace.span("setup_preview_object"):
+        obj = setup_preview_object(model_spec)
+    if not obj:
+        return None
+
+    if not obj.data.materials:
+        obj.data.materials.append(material)
+    elif obj.data.materials[0] != material:
+        obj.data.materials[0] = material
+    camera = bpy.data.objects.get("Camera")
+    light = bpy.data.objects.get("Light")
+    if camera and light and camera_config != scene_state["applied_camera"]:
+        frame_camera_and_light(obj, camera, light, camera_config)
+        scene_state["applied_camera"] = camera_config
+    return obj
+
+
+def prepare_scene(request, trace=None):
+    # Everything shared by all materials in a request: mesh, camera, quality
+    obj = apply_scene(request.get("model") or scene_state["model"],
+                      request.get("camera") or scene_state["camera"], trace)
+    if obj:
+        apply_quality(request.get("quality"))
+    return obj
+
+
+class JobCancelled(Exception):
+    pass
+
+
+def check_cancelled():
+    # Called between stages, so a job the editor gave up on stops before the
+    # next expensive one instead of rendering for nobody
+    if current_job[0] is not None and current_job[0] in cancelled_ids:
+        raise JobCancelled()
+
+
+def render_material(settings, output_path, trace=None):
+    # A material that cannot be applied still renders, like the old file loop did
+    trace = trace or Trace(None, "daemon")
+    with trace.span("apply_material_settings"):
+        material_applied = apply_material_settings(settings)
+    check_cancelled()
+    return render_still(output_path, trace), material_applied
+
+
+def render_still(output_path, trace):
+    # Renders the scene as it is set up to output_path; returns the render time
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    scene.render.filepath = output_path
+    start = time.time()
+    with trace.span("render"):
+        bpy.ops.render.render(write_still=False)
+    render_time = time.time() - start
+    # Saved separately from the render so the PNG encode shows up as its own stage
+    with trace.span("png_write"):
+        bpy.data.images["Render Result"].save_render(filepath=output_path, scene=scene)
+    print(f"✅ Preview rendered to: {output_path}")
+    return render_time
+
+
+def ensure_viewer_node():
+    # Render Result pixels are not readable in background mode, but a
+    # compositor Viewer node exposes them as the "Viewer Node" image
+    scene.use_nodes = True
+    tree = scene.node_tree
+    viewer = next((n for n in tree.nodes if n.type == 'VIEWER'), None)
+    if viewer is None:
+        viewer = tree.nodes.new("CompositorNodeViewer")
+        viewer.use_alpha = True
+    layers = next((n for n in tree.nodes if n.type == 'R_LAYERS'), None)
+    if layers is None:
+        layers = tree.nodes.new("CompositorNodeRLayers")
+    if not viewer.inputs[0].is_linked:
+        tree.links.new(layers.outputs["Image"], viewer.inputs[0])
+    # Without a Composite output, file renders (batches) would come out empty
+    composite = next((n for n in tree.nodes if n.type == 'COMPOSITE'), None)
+    if composite is None:
+        composite = tree.nodes.new("CompositorNodeComposite")
+    if not composite.inputs[0].is_linked:
+        tree.links.new(layers.outputs["Image"], composite.inputs[0])
+
+
+def render_frame(settings, display_size, trace=None):
+    # Renders and returns display-sized 8-bit RGBA rows, top row first, ready
+    # for the editor to wrap in an image. The frame is only an on-screen
+    # approximation; save_render_result writes the colour-managed full-size
+    # render, for the editor to keep as the material's preview.
+    import numpy as np
+
+    trace = trace or Trace(None, "daemon")
+    with trace.span("apply_material_settings"):
+        material_applied = apply_material_settings(settings)
+    check_cancelled()
+    ensure_viewer_node()
+    start = time.time()
+    with trace.span("render"):
+        bpy.ops.render.render(write_still=False)
+    render_time = time.time() - start
+
+    with trace.span("readback"):
+        image = bpy.data.images["Viewer Node"]
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = pixels.reshape(height, width, 4)[::-1]
+
+        if width > display_size and width % display_size == 0 and height % display_size == 0:
+            fx, fy = width // display_size, height // display_size
+            pixels = pixels.reshape(display_size, fy, display_size, fx, 4).mean(axis=(1, 3))
+        elif width > display_size or height > display_size:
+            rows = np.linspace(0, height - 1, display_size).astype(int)
+            cols = np.linspace(0, width - 1, display_size).astype(int)
+            pixels = pixels[rows][:, cols]
+
+        # The Viewer image is scene-linear; approximate the standard sRGB view transform
+        rgb = np.clip(pixels[..., :3], 0.0, 1.0) ** (1.0 / 2.2)
+        alpha = np.clip(pixels[..., 3:], 0.0, 1.0)
+        frame = (np.concatenate([rgb, alpha], axis=-1) * 255.0 + 0.5).astype(np.uint8)
+    return frame.shape[1], frame.shape[0], frame.tobytes(), render_time, material_applied
+
+
+def save_render_result(path):
+    # The Render Result stays valid until the next render, so this can run
+    # after the reply has gone out
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    bpy.data.images["Render Result"].save_render(filepath=path, scene=scene)
+
+
+def handle_render(request):
+    # Stage timings go back with the reply under the editor's trace id
+    trace = Trace(request.get("trace"), "daemon")
+    if "received_at" in request:
+        trace.add("pickup", request["received_at"], (time.time() - request["received_at"]) * 1000.0,
+                  worker=worker_id)
+    if not prepare_scene(request, trace):
+        return render_protocol.reply(request, "error", error="No preview object in scene", spans=trace.spans)
+    check_cancelled()
+
+    transport = request.get("transport") or {}
+    if transport.get("type") == "ring" and frame_ring:
+        width, height, data, render_time, material_applied = render_frame(
+            request.get("material") or {}, int(transport.get("display", 256)), trace)
+        frame_seq[0] += 1
+        with trace.span("ring_write"):
+            slot = frame_ring.write(frame_seq[0], width, height, data)
+        fields = {}
+        if transport.get("save"):
+            # The PNG encode stays off the interactive path: it runs once the
+            # frame has been replied, and a "saved" message follows
+            save_path = request.get("output") or preview_path
+            after_reply.append((request, save_path))
+            fields["saving"] = save_path
+        return render_protocol.reply(request, "done", render_time=render_time,
+                                     material_applied=material_applied,
+                                     frame={"slot": slot, "seq": frame_seq[0],
+                                            "width": width, "height": height},
+                                     spans=trace.spans, **fields)
+
+    output_path = request.get("output") or preview_path
+    render_time, material_applied = render_material(request.get("material") or {}, output_path, trace)
+    return render_protocol.reply(request, "done", output=output_path,
+                                 render_time=render_time,
+                                 material_applied=material_applied,
+                                 spans=trace.spans)
+
+
+def handle_scene(request):
+    # Camera, light and model changes are applied in place, so the next render
+    # only pays for what actually changed instead of a daemon restart
+    trace = Trace(request.get("trace"), "daemon")
+    scene_state["camera"] = request.get("camera") or scene_state["camera"]
+    scene_state["model"] = request.get("model") or scene_state["model"]
+    if not apply_scene(scene_state["model"], scene_state["camera"], trace):
+        return render_protocol.reply(request, "error", error="No preview object in scene", spans=trace.spans)
+    return render_protocol.reply(request, "done", spans=trace.spans)
+
+
+def handle_multiview(request):
+    # One material over several models x camera angles. The material is set
+    # up once, and views are grouped by model so each mesh is loaded (or
+    # unhidden) once; one "progress" event per view carries its timings.
+    views = request.get("views") or []
+    first_seen = {}
+    for view in views:
+        first_seen.setdefault(view.get("model"), len(first_seen))
+    order = sorted(range(len(views)), key=lambda i: first_seen[views[i].get("model")])
+
+    trace = Trace(request.get("trace"), "daemon")
+    material_applied = None
+    rendered = failed = 0
+    start = time.time()
+    for done, index in enumerate(order):
+        if request.get("id") in cancelled_ids:
+            return render_protocol.reply(request, "cancelled", rendered=rendered, failed=failed)
+        view = views[index]
+        event = {"view": view.get("id"), "index": index, "done": done + 1, "total": len(views),
+                 "model": view.get("model"), "output": view.get("output")}
+        view_trace = Trace(request.get("trace"), "daemon")
+        try:
+            setup_start = time.time()
+            obj = apply_scene(view.get("model") or scene_state["model"],
+                              view.get("camera") or scene_state["camera"], view_trace)
+            event["setup_time"] = time.time() - setup_start
+            if not obj:
+                raise RuntimeError(f"Could not load preview model {view.get('model')}")
+            if material_applied is None:
+                with trace.span("apply_material_settings"):
+                    material_applied = apply_material_settings(request.get("material") or {})
+                apply_quality(request.get("quality"))
+            check_cancelled()
+            event["render_time"] = render_still(view["output"], view_trace)
+            rendered += 1
+        except JobCancelled:
+            return render_protocol.reply(request, "cancelled", rendered=rendered, failed=failed)
+        except Exception as e:
+            print(f"❌ Error rendering view {view.get('id')}:", e)
+            event["error"] = str(e)
+            failed += 1
+        event["spans"] = view_trace.spans
+        send_message(render_protocol.reply(request, "progress", **event))
+
+    elapsed = time.time() - start
+    return render_protocol.reply(request, "done", rendered=rendered, failed=failed, elapsed=elapsed,
+                                 material_applied=bool(material_applied), spans=trace.spans)
+
+
+def handle_batch(request):
+    # Renders many materials in one scene session and streams one
+    # "progress" event per item before the final "done" reply.
+    if not prepare_scene(request):
+        return render_protocol.reply(request, "error", error="No preview object in scene")
+
+    items = request.get("items") or []
+    rendered = failed = 0
+    start = time.time()
+    for index, item in enumerate(items):
+        if request.get("id") in cancelled_ids:
+            print(f"🛑 Batch cancelled after {index}/{len(items)} items")
+            return render_protocol.reply(request, "cancelled", rendered=rendered, failed=failed)
+        event = {"item": item.get("id"), "index": index, "total": len(items), "output": item.get("output")}
+        try:
+            event["render_time"], event["material_applied"] = render_material(item.get("material") or {}, item["output"])
+            rendered += 1
+        except JobCancelled:
+            print(f"🛑 Batch cancelled after {index}/{len(items)} items")
+            return render_protocol.reply(request, "cancelled", rendered=rendered, failed=failed)
+        except Exception as e:
+            print(f"❌ Error rendering batch item {item.get('id')}:", e)
+            event["error"] = str(e)
+            failed += 1
+        send_message(render_protocol.reply(request, "progress", **event))
+
+    elapsed = time.time() - start
+    return render_protocol.reply(request, "done", rendered=rendered, failed=failed, elapsed=elapsed,
+                                 per_second=rendered / elapsed if elapsed > 0 else 0.0)
+
+
+def send_message(message):
+    # Pongs go out from the reader thread while the main thread may be replying
+    with send_lock:
+        sock.sendall(render_protocol.encode_message(message))
+
+
+HANDLERS = {
+    "render": handle_render,
+    "batch": handle_batch,
+    "scene": handle_scene,
+    "multiview": handle_multiview,
+}
+
+
+def daemon_arg(flag, env_name, default=None):
+    # Arguments after "--" belong to this script, Blender ignores them
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if flag in argv:
+        return argv[argv.index(flag) + 1]
+    return os.environ.get(env_name, default)
+
+
+port = int(daemon_arg("--port", render_protocol.PORT_ENV))
+worker_id = int(daemon_arg("--worker-id", render_protocol.WORKER_ENV, 0))
+threads = int(daemon_arg("--threads", render_protocol.THREADS_ENV, 0))
+texture_budget_mb = int(daemon_arg("--texture-budget-mb", render_protocol.TEXTURE_BUDGET_ENV, 1024))
+texture_cache = TextureCache(texture_budget_mb * 1024 * 1024)
+frame_ring_path = daemon_arg("--frame-ring", render_protocol.FRAME_RING_ENV)
+frame_ring = FrameRing.open(frame_ring_path) if frame_ring_path else None
+frame_seq = [0]
+
+# Each worker gets its own scratch folder so parallel daemons never share files
+scratch_path = os.path.join(data_path, "workers", f"worker_{worker_id}")
+os.makedirs(scratch_path, exist_ok=True)
+preview_path = os.path.join(scratch_path, "preview.png")
+bpy.context.preferences.filepaths.temporary_directory = scratch_path
+
 # Set render properties
 scene = bpy.context.scene
+if threads > 0:
+    scene.render.threads_mode = 'FIXED'
+    scene.render.threads = threads
 scene.render.filepath = preview_path
 scene.render.image_settings.file_format = 'PNG'
 scene.render.resolution_x = 512
 scene.render.resolution_y = 512
 scene.render.resolution_percentage = 100
+if scene.render.engine == 'CYCLES':
+    default_samples = scene.cycles.samples
+else:
+    default_samples = scene.eevee.taa_render_samples
 
 # Get or create material
 material = bpy.data.materials.get("PreviewMaterial")
@@ -196,44 +647,112 @@ if not material:
     material.use_nodes = True
 
 
-print("✅ Blender daemon running...")
+# Connect back to the editor and block on the channel until it closes
+sock = socket.create_connection((render_protocol.HOST, port))
+sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+reader = sock.makefile("rb")
+send_lock = threading.Lock()
+send_message({"status": "hello", "pid": os.getpid(), "worker": worker_id})
 
-last_command = None
+# Requests are read on a separate thread so "cancel" messages are seen while
+# the main thread is busy rendering; bpy itself is only used on the main thread.
+incoming = queue.Queue()
+# Ids of requests queued or running here; cancels for anything else (already
+# finished, or never seen) are dropped, so cancelled_ids cannot grow unbounded
+known_ids = set()
+cancelled_ids = set()
 
-while True:
-    if os.path.exists(command_path):
+
+def read_requests():
+    while True:
         try:
-            with open(command_path, "r") as f:
-                command = f.read().strip()
-
-            if command == "render":
-                obj = setup_preview_object()
-                if obj:
-                    if not obj.data.materials:
-                        obj.data.materials.append(material)
-                    else:
-                        obj.data.materials[0] = material
-                    camera = bpy.data.objects.get("Camera")
-                    light = bpy.data.objects.get("Light")
-                    if os.path.exists(config_path):
-                        apply_material_settings()
-                    if camera and light:
-                        frame_camera_and_light(obj, camera, light)
-                    bpy.ops.render.render(write_still=True)
-                    with open(done_path, "w") as f:
-                        f.write("done")
-                    print(f"✅ Preview rendered to: {preview_path}")
-
-                # 🧹 Clear the command after handling it
-                with open(command_path, "w") as f:
-                    f.write("")
-
-            elif command:
-                print(f"⚠️ Unknown command: {command}")
+            request = render_protocol.read_message(reader)
+        except ValueError as e:
+            print("❌ Invalid message from editor:", e)
+            continue
+        except OSError as e:
+            print("❌ Lost connection to editor:", e)
+            request = None
+        if request is None:
+            incoming.put(None)
+            break
+        if request.get("type") == "cancel":
+            if request.get("target") in known_ids:
+                cancelled_ids.add(request.get("target"))
+            continue
+        if request.get("type") == "ping":
+            # Heartbeat for the editor's supervisor; reports how long the current job has run
+            busy = time.time() - current_job[1] if current_job[0] else 0.0
+            try:
+                send_message({"status": "pong", "busy": current_job[0], "busy_for": busy})
+            except OSError:
+                pass
+            continue
+        request["received_at"] = time.time()
+        known_ids.add(request.get("id"))
+        incoming.put(request)
+
+
+current_job = [None, 0.0]
+# (request, path) of replied ring frames still to be saved as PNG
+after_reply = []
+threading.Thread(target=read_requests, daemon=True).start()
+
+# Build the default preview object and compositor nodes before reporting
+# ready, so the first real request does not pay for them
+try:
+    ensure_viewer_node()
+    setup_preview_object(render_protocol.read_model_spec())
+except Exception as e:
+    print("⚠️ Warm-up failed:", e)
+send_message({"status": "ready", "pid": os.getpid(), "worker": worker_id})
+print(f"✅ Blender daemon worker {worker_id} running...")
 
+while True:
+    request = incoming.get()
+    if request is None:
+        print("👋 Editor closed the connection, shutting down")
+        break
+
+    handler = HANDLERS.get(request.get("type"))
+    if request.get("id") in cancelled_ids:
+        response = render_protocol.reply(request, "cancelled")
+    elif handler is None:
+        print(f"⚠️ Unknown command: {request.get('type')}")
+        response = render_protocol.reply(request, "error", error=f"Unknown command: {request.get('type')}")
+    else:
+        current_job[:] = [request.get("id"), time.time()]
+        try:
+            response = handler(request)
+        except JobCancelled:
+            response = render_protocol.reply(request, "cancelled")
         except Exception as e:
             print("❌ Error during render:", e)
+            response = render_protocol.reply(request, "error", error=str(e))
+        current_job[:] = [None, 0.0]
+    known_ids.discard(request.get("id"))
+    cancelled_ids.discard(request.get("id"))
 
-    time.sleep(0.1)
-
+    try:
+        send_message(response)
+    except OSError as e:
+        print("❌ Could not reply to editor:", e)
+        break
+
+    while after_reply:
+        request, save_path = after_reply.pop(0)
+        current_job[:] = [request.get("id"), time.time()]
+        try:
+            save_render_result(save_path)
+            message = render_protocol.reply(request, render_protocol.SAVED_STATUS, output=save_path)
+        except Exception as e:
+            print("❌ Could not save render:", e)
+            message = render_protocol.reply(request, render_protocol.SAVED_STATUS, error=str(e))
+        current_job[:] = [None, 0.0]
+        try:
+            send_message(message)
+        except OSError as e:
+            print("❌ Could not reply to editor:", e)
+            break
 
+sock.close()
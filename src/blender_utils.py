@@ -1,7 +1,23 @@
 import os
 import platform
 import subprocess
-import tkinter.messagebox as messagebox
+import sys
+
+from src import render_protocol
+from src.render_client import DaemonConnection, RenderPool
+from src.daemon_supervisor import DaemonSupervisor, HANG_TIMEOUT, BOOT_TIMEOUT
+from src.preview_buffer import FrameRing
+
+DEFAULT_THREADS_PER_RENDER = 4
+PREVIEW_SIZE = 256
+
+def show_error(title, message):
+    # Tk is only imported by the editor; headless runs report on stderr instead
+    if "tkinter" not in sys.modules:
+        print(f"❌ {title}: {message}", file=sys.stderr)
+        return
+    from tkinter import messagebox
+    messagebox.showerror(title, message)
 
 def save_blender_path(path, working_dir, config_filename="editor_config.txt"):
     if not working_dir:
@@ -18,47 +34,125 @@ def load_blender_path(working_dir, config_filename="editor_config.txt"):
             return f.read().strip()
     return None
 
-def launch_blender_daemon(blender_path, working_dir):
-    if not blender_path or not working_dir:
-        return None, None
+def load_render_config(working_dir, config_filename="render_config.txt"):
+    # Optional key=value file in the project folder, e.g. "workers=8"
+    config = {}
+    if not working_dir:
+        return config
+    path = os.path.join(working_dir, config_filename)
+    if os.path.exists(path):
+        with open(path, "r") as f:
+            for line in f:
+                key, sep, value = line.partition("=")
+                if sep and not line.lstrip().startswith("#"):
+                    config[key.strip()] = value.strip()
+    return config
 
-    if not os.path.isfile(blender_path):
-        messagebox.showerror("Blender Error", f"Blender executable not found at:\n{blender_path}")
-        return None, None
+def default_worker_count(threads_per_render):
+    return max(1, (os.cpu_count() or 1) // max(1, threads_per_render))
 
+def launch_blender_worker(blender_path, worker_id, threads_per_render, texture_budget_mb=1024, use_frame_ring=True,
+                          command=None):
+    # command replaces "blender -b preview.blend --python blender_daemon.py",
+    # e.g. to run src/fake_daemon.py for benchmarks; the "--" arguments stay the same
     base_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
     blend_file = os.path.join(base_dir, "data", "preview.blend")
     daemon_script = os.path.join(base_dir, "src", "blender_daemon.py")
 
-    if platform.system() == "Windows":
+    # Interactive frames come back through a memory-mapped ring instead of PNGs
+    frame_ring = None
+    if use_frame_ring:
+        ring_path = os.path.join(base_dir, "data", "workers", f"worker_{worker_id}", "frames.ring")
+        try:
+            frame_ring = FrameRing.create(ring_path, PREVIEW_SIZE, PREVIEW_SIZE)
+        except OSError as e:
+            print(f"⚠️ Could not create frame ring, falling back to PNG previews: {e}")
+
+    # The editor listens and the daemon connects back, so the channel exists
+    # before Blender starts and requests can be queued while it boots.
+    connection = DaemonConnection.listen()
+    env = dict(os.environ)
+    env[render_protocol.PORT_ENV] = str(connection.port)
+    env[render_protocol.WORKER_ENV] = str(worker_id)
+    env[render_protocol.THREADS_ENV] = str(threads_per_render)
+    env[render_protocol.TEXTURE_BUDGET_ENV] = str(texture_budget_mb)
+    if frame_ring:
+        env[render_protocol.FRAME_RING_ENV] = frame_ring.path
+
+    daemon_args = ["--port", str(connection.port), "--worker-id", str(worker_id),
+                   "--threads", str(threads_per_render), "--texture-budget-mb", str(texture_budget_mb)]
+    if frame_ring:
+        daemon_args += ["--frame-ring", frame_ring.path]
+
+    if command:
+        process = subprocess.Popen(list(command) + ["--"] + daemon_args, env=env)
+    elif platform.system() == "Windows":
         bat_path = os.path.join(os.path.dirname(__file__), "start_blender_daemon.bat")
-        if os.path.exists(bat_path):
-            process = subprocess.Popen(bat_path, shell=True)
-        else:
-            messagebox.showerror("Missing .bat File", f"Expected to find: {bat_path}")
-            return None, None
+        if not os.path.exists(bat_path):
+            show_error("Missing .bat File", f"Expected to find: {bat_path}")
+            connection.close()
+            return None
+        process = subprocess.Popen([bat_path, blender_path, blend_file, daemon_script], shell=True, env=env)
     else:
-        process = subprocess.Popen([
-            blender_path, "-b", blend_file, "--python", daemon_script
-        ])
+        process = subprocess.Popen([blender_path, "-b", blend_file, "--python", daemon_script, "--"] + daemon_args,
+                                   env=env)
+    connection.process = process
+    connection.frame_ring = frame_ring
+    connection.worker_id = worker_id
+    return connection
 
-    pid_path = os.path.join(working_dir, "blender_pid.txt")
-    with open(pid_path, "w") as f:
-        f.write(str(process.pid))
+def launch_blender_daemon(blender_path, working_dir, workers=None, command=None):
+    if not (blender_path or command) or not working_dir:
+        return None, None
+
+    if not command and not os.path.isfile(blender_path):
+        show_error("Blender Error", f"Blender executable not found at:\n{blender_path}")
+        return None, None
 
-    return process, pid_path
+    config = load_render_config(working_dir)
+    threads_per_render = int(config.get("threads_per_render", DEFAULT_THREADS_PER_RENDER))
+    texture_budget_mb = int(config.get("texture_budget_mb", 1024))
+    use_frame_ring = config.get("preview_transport", "shm") == "shm"
+    if workers is None:
+        workers = int(config.get("workers", 0)) or default_worker_count(threads_per_render)
+
+    def launch(worker_id):
+        return launch_blender_worker(blender_path, worker_id, threads_per_render,
+                                     texture_budget_mb, use_frame_ring, command)
+
+    connections = [c for c in (launch(worker_id) for worker_id in range(workers)) if c]
+    if not connections:
+        return None, None
+    print(f"🚀 Launched {len(connections)} Blender worker(s), {threads_per_render} thread(s) each")
+
+    # The supervisor restarts crashed or hung workers and writes the PID file,
+    # including any warm standby processes
+    pid_path = os.path.join(working_dir, "blender_pid.txt")
+    pool = RenderPool(connections)
+    DaemonSupervisor(pool, launch, standby=int(config.get("warm_standby", 0)), pid_path=pid_path,
+                     hang_timeout=float(config.get("daemon_hang_timeout", HANG_TIMEOUT)),
+                     boot_timeout=float(config.get("daemon_boot_timeout", BOOT_TIMEOUT)))
+    return pool, pid_path
 
-def kill_blender_daemon(pid_path):
+def kill_blender_daemon(pid_path, pool=None):
+    # Closing the pool lets each daemon exit on its own; the PID file is the
+    # fallback for daemons left over from a previous session.
+    if pool:
+        pool.close()
     if not pid_path or not os.path.exists(pid_path):
         return
     try:
         with open(pid_path, "r") as f:
-            pid = int(f.read().strip())
+            pids = [int(line) for line in f.read().split()]
 
-        if platform.system() == "Windows":
-            subprocess.call(["taskkill", "/PID", str(pid), "/F"])
-        else:
-            subprocess.call(["kill", "-9", str(pid)])
+        running = {p.pid for p in pool.processes() if p.poll() is None} if pool else set(pids)
+        for pid in pids:
+            if pid not in running:
+                continue
+            if platform.system() == "Windows":
+                subprocess.call(["taskkill", "/PID", str(pid), "/F"])
+            else:
+                subprocess.call(["kill", "-9", str(pid)])
 
         os.remove(pid_path)
     except Exception as e:
@@ -0,0 +1,301 @@
+# Headless entry point for render nodes and CI:
+#
+#   python -m src.cli render --project P --all [--workers N] [--blender PATH]
+#   python -m src.cli multiview --project P --material NAME [--model SPEC] [--angles N]
+#   python -m src.cli export --project P --all [--workers N] [--force]
+#   python -m src.cli proxies --project P [--workers N] [--force]
+#   python -m src.cli dedupe --project P [--dry-run]
+#   python -m src.cli stats --project P
+#
+# Progress is written to stdout as JSON lines ({"event": ...}); anything else
+# the shared modules print goes to stderr. Never imports Tk or PIL.ImageTk.
+import argparse
+import json
+import os
+import sys
+import time
+
+from src import blender_utils
+from src import render_protocol
+from src import preview_jobs
+from src import multiview
+from src import unity_export
+from src import texture_ingest
+from src import texture_store
+from src.material_store import MaterialStore, DB_FILENAME, load_csv
+from src.preview_cache import PreviewCache
+
+CONNECT_TIMEOUT = 120
+
+
+class Emitter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def __call__(self, event, **fields):
+        self.stream.write(json.dumps(dict(event=event, time=round(time.time(), 3), **fields)) + "\n")
+        self.stream.flush()
+
+
+def select_materials(store, args):
+    materials = store.load_all()
+    if args.all:
+        return materials, []
+    wanted = set(args.material or [])
+    selected = [mat for mat in materials if mat.name in wanted]
+    missing = sorted(wanted - {mat.name for mat in selected})
+    return selected, missing
+
+
+def open_project(args, emit):
+    working_dir = os.path.abspath(args.project)
+    if not os.path.isdir(working_dir):
+        emit("error", error=f"Project folder not found: {working_dir}")
+        return None, None
+    return working_dir, MaterialStore(working_dir)
+
+
+def wait_for_workers(pool, timeout):
+    deadline = time.time() + timeout
+    for connection in pool.connections:
+        if connection.wait_until_connected(max(0.0, deadline - time.time())):
+            return True
+    return False
+
+
+def cmd_render(args, emit):
+    working_dir, store = open_project(args, emit)
+    if not store:
+        return 2
+    try:
+        materials, missing = select_materials(store, args)
+    finally:
+        store.close()
+    for name in missing:
+        emit("error", material=name, error="No such material")
+
+    config = blender_utils.load_render_config(working_dir)
+    quality = render_protocol.quality_tiers(config)[args.quality]
+    cache_mb = int(config.get("preview_cache_mb", 256))
+    preview_cache = None if args.no_cache else PreviewCache(working_dir, max_bytes=cache_mb * 1024 * 1024)
+
+    blender_path = args.blender or blender_utils.load_blender_path(working_dir)
+    pool, pid_path = blender_utils.launch_blender_daemon(blender_path, working_dir, workers=args.workers)
+    if not pool:
+        emit("error", error=f"Could not launch Blender ({blender_path or 'no path configured'})")
+        return 2
+    emit("start", project=working_dir, materials=len(materials), workers=len(pool), quality=args.quality)
+
+    try:
+        if not wait_for_workers(pool, args.connect_timeout):
+            emit("error", error=f"No Blender worker connected within {args.connect_timeout}s")
+            return 2
+        summary = preview_jobs.refresh_previews(
+            pool, preview_cache, working_dir, materials, quality,
+            on_progress=lambda progress: emit("progress", **progress))
+        summary["queue"] = pool.stats()
+    finally:
+        blender_utils.kill_blender_daemon(pid_path, pool)
+        if preview_cache:
+            preview_cache.save()
+
+    emit("summary", **summary)
+    return 1 if summary["failed"] or missing else 0
+
+
+def cmd_multiview(args, emit):
+    working_dir, store = open_project(args, emit)
+    if not store:
+        return 2
+    try:
+        materials, missing = select_materials(store, args)
+    finally:
+        store.close()
+    for name in missing:
+        emit("error", material=name, error="No such material")
+
+    config = blender_utils.load_render_config(working_dir)
+    quality = render_protocol.quality_tiers(config)[args.quality]
+    models = args.model or render_protocol.available_models(working_dir)
+    blender_path = args.blender or blender_utils.load_blender_path(working_dir)
+    pool, pid_path = blender_utils.launch_blender_daemon(blender_path, working_dir, workers=args.workers)
+    if not pool:
+        emit("error", error=f"Could not launch Blender ({blender_path or 'no path configured'})")
+        return 2
+    emit("start", project=working_dir, materials=len(materials), models=models, angles=args.angles)
+
+    failed = 0
+    try:
+        if not wait_for_workers(pool, args.connect_timeout):
+            emit("error", error=f"No Blender worker connected within {args.connect_timeout}s")
+            return 2
+        for mat in materials:
+            summary = multiview.render_multiview(
+                pool, working_dir, mat, models, args.angles, quality=quality, sheet=not args.no_sheet,
+                on_view=lambda view, name=mat.name: emit("progress", material=name, **view))
+            failed += summary["failed"]
+            emit("summary", **summary)
+    finally:
+        blender_utils.kill_blender_daemon(pid_path, pool)
+    return 1 if failed or missing else 0
+
+
+def cmd_export(args, emit):
+    working_dir, store = open_project(args, emit)
+    if not store:
+        return 2
+    try:
+        materials, missing = select_materials(store, args)
+    finally:
+        store.close()
+    for name in missing:
+        emit("error", material=name, error="No such material")
+
+    emit("start", project=working_dir, materials=len(materials), workers=args.workers)
+    summary = unity_export.export_materials(working_dir, materials, workers=args.workers, force=args.force,
+                                            hardlink=args.hardlink,
+                                            on_progress=lambda progress: emit("progress", **progress))
+    emit("summary", **summary)
+    return 1 if summary["failed"] or missing else 0
+
+
+def cmd_proxies(args, emit):
+    working_dir, store = open_project(args, emit)
+    if not store:
+        return 2
+    try:
+        materials = store.load_all()
+    finally:
+        store.close()
+
+    paths = texture_ingest.project_textures(working_dir, materials)
+    emit("start", project=working_dir, textures=len(paths))
+    summary = texture_ingest.build_proxies(paths, workers=args.workers, force=args.force,
+                                           on_progress=lambda progress: emit("progress", **progress))
+    emit("summary", **summary)
+    return 1 if summary["failed"] else 0
+
+
+def cmd_dedupe(args, emit):
+    working_dir = os.path.abspath(args.project)
+    if not os.path.isdir(working_dir):
+        emit("error", error=f"Project folder not found: {working_dir}")
+        return 2
+    emit("start", project=working_dir, dry_run=args.dry_run)
+    summary = texture_store.dedupe_project(working_dir, dry_run=args.dry_run,
+                                           on_progress=lambda progress: emit("progress", **progress))
+    emit("summary", **summary)
+    return 1 if summary["failed"] else 0
+
+
+def cmd_stats(args, emit):
+    # Read-only: the database is not migrated or created, nor the preview cache
+    working_dir = os.path.abspath(args.project)
+    if not os.path.isdir(working_dir):
+        emit("error", error=f"Project folder not found: {working_dir}")
+        return 2
+    db_path = os.path.join(working_dir, DB_FILENAME)
+    csv_path = os.path.join(working_dir, "materials.csv")
+    if os.path.exists(db_path):
+        store = MaterialStore(working_dir, read_only=True)
+        try:
+            materials = store.load_all()
+        finally:
+            store.close()
+    elif os.path.exists(csv_path):
+        # Not migrated yet
+        materials = load_csv(csv_path)
+    else:
+        materials = []
+
+    previews = 0
+    textures = 0
+    for mat in materials:
+        if os.path.exists(preview_jobs.preview_path_for(working_dir, mat)):
+            previews += 1
+        textures += sum(1 for map_type in render_protocol.MAP_TYPES if mat.map_path(map_type))
+
+    config = blender_utils.load_render_config(working_dir)
+    threads = int(config.get("threads_per_render", blender_utils.DEFAULT_THREADS_PER_RENDER))
+    cache_mb = int(config.get("preview_cache_mb", 256))
+    cache_stats = None
+    if os.path.isdir(os.path.join(working_dir, "preview_cache")):
+        cache_stats = PreviewCache(working_dir, max_bytes=cache_mb * 1024 * 1024).stats()
+    emit("stats", project=working_dir, materials=len(materials), previews=previews,
+         missing_previews=len(materials) - previews, texture_maps=textures,
+         database_bytes=os.path.getsize(db_path) if os.path.exists(db_path) else 0,
+         preview_cache=cache_stats,
+         render_config=config,
+         workers=int(config.get("workers", 0)) or blender_utils.default_worker_count(threads))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli", description="Headless Material Editor tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_selection(command):
+        command.add_argument("--project", required=True, help="Project folder")
+        which = command.add_mutually_exclusive_group(required=True)
+        which.add_argument("--all", action="store_true", help="Every material in the project")
+        which.add_argument("--material", action="append", metavar="NAME", help="Material name (repeatable)")
+
+    render = commands.add_parser("render", help="Regenerate material previews")
+    add_selection(render)
+    render.add_argument("--workers", type=int, default=None, help="Blender workers (default: render_config.txt)")
+    render.add_argument("--blender", help="Blender executable (default: the project's editor_config.txt)")
+    render.add_argument("--quality", choices=("final", "draft"), default="final")
+    render.add_argument("--no-cache", action="store_true", help="Ignore and do not fill the preview cache")
+    render.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT)
+    render.set_defaults(handler=cmd_render)
+
+    views = commands.add_parser("multiview", help="Render materials on several models from several angles")
+    add_selection(views)
+    views.add_argument("--model", action="append", metavar="SPEC",
+                       help="primitive:<name> or a model file (repeatable; default: every available model)")
+    views.add_argument("--angles", type=int, default=multiview.DEFAULT_ANGLES, help="Camera angles per model")
+    views.add_argument("--no-sheet", action="store_true", help="Keep the separate images only")
+    views.add_argument("--workers", type=int, default=None, help="Blender workers (default: render_config.txt)")
+    views.add_argument("--blender", help="Blender executable (default: the project's editor_config.txt)")
+    views.add_argument("--quality", choices=("final", "draft"), default="final")
+    views.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT)
+    views.set_defaults(handler=cmd_multiview)
+
+    export = commands.add_parser("export", help="Export materials for Unity")
+    add_selection(export)
+    export.add_argument("--workers", type=int, default=unity_export.DEFAULT_EXPORT_WORKERS)
+    export.add_argument("--force", action="store_true", help="Re-export materials the manifest says are current")
+    export.add_argument("--hardlink", action="store_true",
+                        help="Hardlink textures instead of copying (exports then share files with the project)")
+    export.set_defaults(handler=cmd_export)
+
+    proxies = commands.add_parser("proxies", help="Build downscaled preview proxies for project textures")
+    proxies.add_argument("--project", required=True, help="Project folder")
+    proxies.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    proxies.add_argument("--force", action="store_true", help="Rebuild proxies that are already up to date")
+    proxies.set_defaults(handler=cmd_proxies)
+
+    dedupe = commands.add_parser("dedupe", help="Move material textures into the shared texture store")
+    dedupe.add_argument("--project", required=True, help="Project folder")
+    dedupe.add_argument("--dry-run", action="store_true", help="Only report how much would be saved")
+    dedupe.set_defaults(handler=cmd_dedupe)
+
+    stats = commands.add_parser("stats", help="Summarize a project")
+    stats.add_argument("--project", required=True, help="Project folder")
+    stats.set_defaults(handler=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    # stdout is reserved for JSON lines; route the shared modules' prints to stderr
+    emit = Emitter(sys.stdout)
+    sys.stdout = sys.stderr
+    try:
+        return args.handler(args, emit)
+    finally:
+        sys.stdout = emit.stream
+
+
+if __name__ == "__main__":
+    sys.exit(main())
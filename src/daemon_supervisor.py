@@ -0,0 +1,190 @@
+# Keeps a RenderPool's Blender daemons alive. Each daemon reports "ready"
+# once its scene is set up and answers heartbeat pings with the job it is on
+# and for how long. A daemon that exits, drops its connection, never becomes
+# ready, spends far longer on one job than the job's timeout, or goes
+# completely silent is killed and its pool slot gets a new one. RenderPool
+# replays the job that was in flight.
+#
+# With a warm standby, spare daemons are booted ahead of time and swapped in
+# on a restart, so recovery does not wait for Blender's cold start.
+import threading
+import time
+from collections import deque
+
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 2.0
+HANG_TIMEOUT = 60.0
+BOOT_TIMEOUT = 180.0
+MAX_RESTARTS = 5
+RESTART_WINDOW = 300.0
+# A job may run this many times its own timeout before its daemon counts as hung
+JOB_TIMEOUT_FACTOR = 3
+
+
+class DaemonSupervisor:
+    def __init__(self, pool, launch, standby=0, pid_path=None,
+                 hang_timeout=HANG_TIMEOUT, boot_timeout=BOOT_TIMEOUT):
+        # launch(worker_id) starts one daemon and returns its DaemonConnection (or None)
+        self.pool = pool
+        self.launch = launch
+        self.standby_count = standby
+        self.pid_path = pid_path
+        self.hang_timeout = hang_timeout
+        self.boot_timeout = boot_timeout
+        self.standby = []
+        self.failed_slots = set()
+        self.restarts = 0
+        self._restart_times = deque()
+        self._standby_failures = deque()
+        self._free_ids = []
+        self._next_id = max([c.worker_id or 0 for c in pool.connections] + [-1]) + 1
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+
+        pool.supervisor = self
+        self._fill_standby()
+        self._write_pids()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _worker_id(self):
+        # Ids of dead daemons are reused so scratch folders and rings do not pile up
+        if self._free_ids:
+            return self._free_ids.pop()
+        self._next_id += 1
+        return self._next_id - 1
+
+    def _run(self):
+        while not self._stop.wait(POLL_INTERVAL):
+            now = time.time()
+            for slot, connection in enumerate(list(self.pool.connections)):
+                if slot in self.failed_slots:
+                    continue
+                problem = self._check(connection, now)
+                if problem:
+                    self._restart(slot, connection, problem)
+            for connection in list(self.standby):
+                problem = self._check(connection, now)
+                if problem:
+                    print(f"⚠️ Standby Blender worker {connection.worker_id} {problem}; replacing it")
+                    self.standby.remove(connection)
+                    self._terminate(connection, problem)
+                    self._standby_failures.append(now)
+            self._fill_standby()
+
+    def _check(self, connection, now):
+        # Returns why a daemon needs replacing, or None while it is healthy
+        if self._stop.is_set():
+            return None
+        if connection.process and connection.process.poll() is not None:
+            return f"exited with code {connection.process.returncode}"
+        if connection.lost:
+            return "lost its connection"
+        if not connection.is_connected():
+            if now - connection.started_at > self.boot_timeout:
+                return f"was not ready after {self.boot_timeout:.0f}s"
+            return None
+        # Pongs come from the daemon's reader thread, so they keep arriving while
+        # Blender's main thread is stuck in a render; the job age shows that
+        if connection.busy:
+            job_timeout = connection.job_timeout(connection.busy)
+            limit = JOB_TIMEOUT_FACTOR * job_timeout if job_timeout else self.hang_timeout
+            if connection.busy_for > limit:
+                return f"has been on one job for {connection.busy_for:.0f}s"
+        # Silence means the whole process is frozen
+        if now - connection.last_seen > self.hang_timeout:
+            return f"sent no heartbeat for {now - connection.last_seen:.0f}s"
+        if now - connection.last_ping >= HEARTBEAT_INTERVAL:
+            connection.ping()
+        return None
+
+    def _terminate(self, connection, reason):
+        if connection.process and connection.process.poll() is None:
+            connection.process.kill()
+        connection.close(error=f"Blender worker {reason}", lost=True)
+        if connection.worker_id is not None:
+            self._free_ids.append(connection.worker_id)
+
+    def _restart(self, slot, connection, reason):
+        now = time.time()
+        while self._restart_times and now - self._restart_times[0] > RESTART_WINDOW:
+            self._restart_times.popleft()
+        print(f"⚠️ Blender worker {connection.worker_id} {reason}")
+        self._terminate(connection, reason)
+
+        replacement = None
+        if len(self._restart_times) >= MAX_RESTARTS:
+            print(f"❌ {MAX_RESTARTS} Blender restarts within {RESTART_WINDOW:.0f}s, giving up on worker slot {slot}")
+        elif self.standby:
+            replacement = self.standby.pop(0)
+            print(f"🔁 Swapped in standby Blender worker {replacement.worker_id}")
+        else:
+            replacement = self.launch(self._worker_id())
+            if replacement:
+                print(f"🔁 Restarted Blender worker as {replacement.worker_id}")
+
+        with self._cond:
+            if replacement:
+                self._restart_times.append(now)
+                self.restarts += 1
+                self.pool.connections[slot] = replacement
+            else:
+                self.failed_slots.add(slot)
+            self._cond.notify_all()
+        self._write_pids()
+
+    def _fill_standby(self):
+        now = time.time()
+        while self._standby_failures and now - self._standby_failures[0] > RESTART_WINDOW:
+            self._standby_failures.popleft()
+        if len(self._standby_failures) >= MAX_RESTARTS:
+            return
+        added = False
+        while len(self.standby) < self.standby_count and not self._stop.is_set():
+            connection = self.launch(self._worker_id())
+            if not connection:
+                self._standby_failures.append(now)
+                break
+            self.standby.append(connection)
+            added = True
+        if added:
+            self._write_pids()
+
+    def _write_pids(self):
+        if not self.pid_path:
+            return
+        try:
+            with open(self.pid_path, "w") as f:
+                f.write("\n".join(str(p.pid) for p in self.pool.processes()))
+        except OSError as e:
+            print(f"⚠️ Could not write {self.pid_path}: {e}")
+
+    def wait_for_replacement(self, slot, connection, timeout):
+        # Waits for the slot to get a new daemon and for it to become ready;
+        # returns the new connection, or None if the slot was given up on
+        deadline = time.time() + self.boot_timeout + timeout
+        with self._cond:
+            while self.pool.connections[slot] is connection and slot not in self.failed_slots:
+                if self._stop.is_set() or not self._cond.wait(max(0.0, deadline - time.time())):
+                    return None
+            if slot in self.failed_slots:
+                return None
+            replacement = self.pool.connections[slot]
+        if replacement.wait_until_connected(max(0.0, deadline - time.time())):
+            return replacement
+        return None
+
+    def is_starting(self):
+        return any(not c.is_connected() for slot, c in enumerate(self.pool.connections)
+                   if slot not in self.failed_slots)
+
+    def stats(self):
+        return {"restarts": self.restarts, "failed_slots": sorted(self.failed_slots),
+                "standby": len(self.standby), "standby_ready": sum(1 for c in self.standby if c.is_connected())}
+
+    def stop(self):
+        # Returns the standby connections so the pool closes them with its own
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        standby, self.standby = self.standby, []
+        return standby
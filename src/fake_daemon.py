@@ -0,0 +1,297 @@
+# Stand-in for blender_daemon.py used by src/benchmark.py. It speaks the same
+# protocol (hello/ready, render, batch, multiview, scene, cancel, ping, frame
+# ring) but instead of rendering it waits a configurable delay and produces a
+# deterministic image from the material values, so editor-side costs can be
+# measured without Blender. Standard library only.
+#
+#   python src/fake_daemon.py [--delay-ms 40] [--boot-ms 0] -- --port P [--worker-id N] [--frame-ring PATH]
+#
+# --delay-ms is the simulated time for a 512x512 render; other resolutions
+# scale with their pixel count.
+import argparse
+import os
+import queue
+import socket
+import struct
+import sys
+import threading
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import render_protocol
+from preview_buffer import FrameRing
+from tracing import Trace
+
+DEFAULT_DELAY_MS = 40.0
+REFERENCE_RESOLUTION = 512
+
+_shading = {}
+
+
+def shading(size):
+    # Lit-sphere intensity, one byte per pixel and 0 outside the disc; cached
+    # per size so each material only pays for a per-channel table lookup
+    if size not in _shading:
+        intensity = bytearray(size * size)
+        radius = size / 2.0
+        for y in range(size):
+            dy = (y + 0.5 - radius) / radius
+            for x in range(size):
+                dx = (x + 0.5 - radius) / radius
+                d2 = dx * dx + dy * dy
+                if d2 < 1.0:
+                    lit = max(0.0, (-dx - dy + (1.0 - d2) ** 0.5) / 1.7320508)
+                    intensity[y * size + x] = max(1, int(40 + 215 * lit))
+        _shading[size] = bytes(intensity)
+    return _shading[size]
+
+
+def material_image(settings, size):
+    # Deterministic RGBA pixels (top row first) for a material payload.
+    # Smoothness washes the colour towards white, metalness darkens it.
+    intensity = shading(size)
+    albedo = (list(settings.get("albedo") or []) + [1.0, 1.0, 1.0])[:3]
+    smoothness = min(1.0, max(0.0, float(settings.get("smoothness", 0.5))))
+    metalness = min(1.0, max(0.0, float(settings.get("metalness", 0.0))))
+    sheen = 0.3 * smoothness
+    gain = 1.0 - 0.4 * metalness
+
+    pixels = bytearray(size * size * 4)
+    for channel, value in enumerate(albedo):
+        value = min(1.0, max(0.0, float(value)))
+        level = (value * (1.0 - sheen) + sheen) * gain
+        pixels[channel::4] = intensity.translate(bytes(min(255, int(i * level)) for i in range(256)))
+    pixels[3::4] = intensity.translate(bytes([0] + [255] * 255))
+    return bytes(pixels)
+
+
+def png_bytes(width, height, pixels):
+    rows = b"".join(b"\x00" + pixels[y * width * 4:(y + 1) * width * 4] for y in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 1))
+            + chunk(b"IEND", b""))
+
+
+def write_png(path, width, height, pixels):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(png_bytes(width, height, pixels))
+    os.replace(path + ".tmp", path)
+
+
+class FakeDaemon:
+    def __init__(self, sock, worker_id=0, frame_ring=None, delay_ms=DEFAULT_DELAY_MS, boot_ms=0.0):
+        self.sock = sock
+        self.worker_id = worker_id
+        self.frame_ring = frame_ring
+        self.delay_ms = delay_ms
+        self.boot_ms = boot_ms
+        self.frame_seq = 0
+        self.incoming = queue.Queue()
+        self.known_ids = set()
+        self.after_reply = []
+        self.cancelled_ids = set()
+        self.current_job = [None, 0.0]
+        self.send_lock = threading.Lock()
+        self.scratch_path = os.path.join(render_protocol.data_path, "workers", f"worker_{worker_id}")
+
+    def send_message(self, message):
+        with self.send_lock:
+            self.sock.sendall(render_protocol.encode_message(message))
+
+    def simulate(self, resolution, trace):
+        with trace.span("render", resolution=resolution):
+            time.sleep(self.delay_ms / 1000.0 * (resolution / REFERENCE_RESOLUTION) ** 2)
+
+    def render_file(self, settings, output_path, resolution, trace):
+        start = time.time()
+        self.simulate(resolution, trace)
+        render_time = time.time() - start
+        with trace.span("png_write"):
+            write_png(output_path, resolution, resolution, material_image(settings, resolution))
+        return render_time
+
+    def handle_render(self, request):
+        trace = Trace(request.get("trace"), "daemon")
+        if "received_at" in request:
+            trace.add("pickup", request["received_at"], (time.time() - request["received_at"]) * 1000.0,
+                      worker=self.worker_id)
+        settings = request.get("material") or {}
+        resolution = int((request.get("quality") or {}).get("resolution", REFERENCE_RESOLUTION))
+
+        transport = request.get("transport") or {}
+        if transport.get("type") == "ring" and self.frame_ring:
+            display = int(transport.get("display", 256))
+            start = time.time()
+            self.simulate(resolution, trace)
+            render_time = time.time() - start
+            with trace.span("readback"):
+                data = material_image(settings, display)
+            fields = {}
+            if transport.get("save"):
+                # Written after the reply, like the real daemon does
+                fields["saving"] = request.get("output") or os.path.join(self.scratch_path, "preview.png")
+                self.after_reply.append((request, fields["saving"], settings, resolution))
+            self.frame_seq += 1
+            with trace.span("ring_write"):
+                slot = self.frame_ring.write(self.frame_seq, display, display, data)
+            return render_protocol.reply(request, "done", render_time=render_time, material_applied=True,
+                                         frame={"slot": slot, "seq": self.frame_seq,
+                                                "width": display, "height": display},
+                                         spans=trace.spans, **fields)
+
+        output_path = request.get("output") or os.path.join(self.scratch_path, "preview.png")
+        render_time = self.render_file(settings, output_path, resolution, trace)
+        return render_protocol.reply(request, "done", output=output_path, render_time=render_time,
+                                     material_applied=True, spans=trace.spans)
+
+    def handle_scene(self, request):
+        return render_protocol.reply(request, "done", spans=[])
+
+    def handle_multiview(self, request):
+        views = request.get("views") or []
+        resolution = int((request.get("quality") or {}).get("resolution", REFERENCE_RESOLUTION))
+        settings = request.get("material") or {}
+        rendered = 0
+        start = time.time()
+        for done, view in enumerate(views, 1):
+            if request.get("id") in self.cancelled_ids:
+                return render_protocol.reply(request, "cancelled", rendered=rendered, failed=0)
+            trace = Trace(request.get("trace"), "daemon")
+            render_time = self.render_file(settings, view["output"], resolution, trace)
+            rendered += 1
+            self.send_message(render_protocol.reply(request, "progress", view=view.get("id"), index=done - 1,
+                                                    done=done, total=len(views), model=view.get("model"),
+                                                    output=view["output"], setup_time=0.0,
+                                                    render_time=render_time, spans=trace.spans))
+        return render_protocol.reply(request, "done", rendered=rendered, failed=0, elapsed=time.time() - start,
+                                     material_applied=True, spans=[])
+
+    def handle_batch(self, request):
+        items = request.get("items") or []
+        resolution = int((request.get("quality") or {}).get("resolution", REFERENCE_RESOLUTION))
+        rendered = failed = 0
+        start = time.time()
+        for index, item in enumerate(items):
+            if request.get("id") in self.cancelled_ids:
+                return render_protocol.reply(request, "cancelled", rendered=rendered, failed=failed)
+            event = {"item": item.get("id"), "index": index, "total": len(items), "output": item.get("output")}
+            try:
+                event["render_time"] = self.render_file(item.get("material") or {}, item["output"], resolution,
+                                                        Trace(None, "daemon"))
+                event["material_applied"] = True
+                rendered += 1
+            except Exception as e:
+                event["error"] = str(e)
+                failed += 1
+            self.send_message(render_protocol.reply(request, "progress", **event))
+
+        elapsed = time.time() - start
+        return render_protocol.reply(request, "done", rendered=rendered, failed=failed, elapsed=elapsed,
+                                     per_second=rendered / elapsed if elapsed > 0 else 0.0)
+
+    def read_requests(self, reader):
+        while True:
+            try:
+                request = render_protocol.read_message(reader)
+            except ValueError as e:
+                print("❌ Invalid message from editor:", e)
+                continue
+            except OSError:
+                request = None
+            if request is None:
+                self.incoming.put(None)
+                break
+            if request.get("type") == "cancel":
+                if request.get("target") in self.known_ids:
+                    self.cancelled_ids.add(request.get("target"))
+                continue
+            if request.get("type") == "ping":
+                busy = time.time() - self.current_job[1] if self.current_job[0] else 0.0
+                try:
+                    self.send_message({"status": "pong", "busy": self.current_job[0], "busy_for": busy})
+                except OSError:
+                    pass
+                continue
+            request["received_at"] = time.time()
+            self.known_ids.add(request.get("id"))
+            self.incoming.put(request)
+
+    def serve(self):
+        handlers = {"render": self.handle_render, "batch": self.handle_batch, "scene": self.handle_scene,
+                    "multiview": self.handle_multiview}
+        reader = self.sock.makefile("rb")
+        self.send_message({"status": "hello", "pid": os.getpid(), "worker": self.worker_id, "fake": True})
+        threading.Thread(target=self.read_requests, args=(reader,), daemon=True).start()
+        time.sleep(self.boot_ms / 1000.0)
+        self.send_message({"status": "ready", "pid": os.getpid(), "worker": self.worker_id})
+
+        while True:
+            request = self.incoming.get()
+            if request is None:
+                break
+            handler = handlers.get(request.get("type"))
+            if request.get("id") in self.cancelled_ids:
+                response = render_protocol.reply(request, "cancelled")
+            elif handler is None:
+                response = render_protocol.reply(request, "error", error=f"Unknown command: {request.get('type')}")
+            else:
+                self.current_job[:] = [request.get("id"), time.time()]
+                try:
+                    response = handler(request)
+                except Exception as e:
+                    response = render_protocol.reply(request, "error", error=str(e))
+                self.current_job[:] = [None, 0.0]
+            self.known_ids.discard(request.get("id"))
+            self.cancelled_ids.discard(request.get("id"))
+            try:
+                self.send_message(response)
+            except OSError:
+                break
+            while self.after_reply:
+                request, save_path, settings, resolution = self.after_reply.pop(0)
+                self.current_job[:] = [request.get("id"), time.time()]
+                try:
+                    write_png(save_path, resolution, resolution, material_image(settings, resolution))
+                    message = render_protocol.reply(request, render_protocol.SAVED_STATUS, output=save_path)
+                except Exception as e:
+                    message = render_protocol.reply(request, render_protocol.SAVED_STATUS, error=str(e))
+                self.current_job[:] = [None, 0.0]
+                try:
+                    self.send_message(message)
+                except OSError:
+                    break
+        self.sock.close()
+
+
+def main(argv=None):
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if "--" in argv:
+        argv.remove("--")
+    parser = argparse.ArgumentParser(description="Fake Blender daemon for benchmarks")
+    parser.add_argument("--delay-ms", type=float, default=DEFAULT_DELAY_MS)
+    parser.add_argument("--boot-ms", type=float, default=0.0, help="Simulated scene setup before \"ready\"")
+    parser.add_argument("--port", type=int, default=os.environ.get(render_protocol.PORT_ENV))
+    parser.add_argument("--worker-id", type=int, default=int(os.environ.get(render_protocol.WORKER_ENV, 0)))
+    parser.add_argument("--frame-ring", default=os.environ.get(render_protocol.FRAME_RING_ENV))
+    # Accepted for compatibility with the real daemon's arguments
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--texture-budget-mb", type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.port is None:
+        parser.error(f"--port or {render_protocol.PORT_ENV} is required")
+
+    sock = socket.create_connection((render_protocol.HOST, int(args.port)))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    frame_ring = FrameRing.open(args.frame_ring) if args.frame_ring else None
+    FakeDaemon(sock, args.worker_id, frame_ring, args.delay_ms, args.boot_ms).serve()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# Content hashes for textures and models, memoized by path + mtime + size so
+# each file is read once until it changes. Shared by the preview cache and the
+# Unity export manifest.
+import hashlib
+import os
+import threading
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def sha256_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class HashMemo:
+    def __init__(self, memo=None):
+        # abspath -> [mtime_ns, size, digest]; plain lists so it round-trips through JSON
+        self.memo = memo if memo is not None else {}
+        self._lock = threading.Lock()
+
+    def digest(self, path):
+        # "" for missing files, so a deleted texture still changes the key
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ""
+        abs_path = os.path.abspath(path)
+        with self._lock:
+            entry = self.memo.get(abs_path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+
+        digest = sha256_file(path)
+        with self._lock:
+            self.memo[abs_path] = [stat.st_mtime_ns, stat.st_size, digest]
+        return digest
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.memo)
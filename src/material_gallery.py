@@ -0,0 +1,162 @@
+# Virtualized Material Gallery: only the rows in view get canvas items, and
+# thumbnails are decoded on a small thread pool and filled in as they arrive.
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import ttkbootstrap as ttk
+from PIL import ImageTk
+
+from src.thumbnail_cache import ThumbnailCache
+
+PADDING = 10
+LABEL_HEIGHT = 34
+OVERSCAN_ROWS = 2
+POLL_MS = 30
+MAX_PHOTOS_PER_TICK = 24
+
+
+class MaterialGallery:
+    def __init__(self, root, working_dir, materials, on_select, thumb_size=(96, 96), decode_workers=4):
+        self.working_dir = working_dir
+        self.materials = materials
+        self.on_select = on_select
+        self.thumb_size = thumb_size
+        self.thumbs = ThumbnailCache(working_dir, thumb_size)
+        self.cell_width = thumb_size[0] + PADDING * 2
+        self.cell_height = thumb_size[1] + LABEL_HEIGHT + PADDING
+        self.columns = 1
+
+        self.window = ttk.Toplevel(root)
+        self.window.title("Material Gallery")
+        self.window.geometry("800x600")
+
+        self.canvas = ttk.Canvas(self.window, highlightthickness=0)
+        self.scrollbar = ttk.Scrollbar(self.window, orient="vertical", command=self.on_scroll)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+
+        self.cells = {}               # index -> canvas item ids for visible cells
+        self.photos = OrderedDict()   # index -> PhotoImage, LRU bounded
+        self.wanted = set()           # indices whose thumbnails are still needed
+        self.requested = set()
+        self.results = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=decode_workers)
+        self.closed = False
+
+        self.canvas.bind("<Configure>", lambda e: self.relayout())
+        self.canvas.bind("<MouseWheel>", self.on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.on_scroll("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self.on_scroll("scroll", 1, "units"))
+        self.window.bind("<Destroy>", self.on_destroy)
+        self.window.after(POLL_MS, self.poll_results)
+
+    def relayout(self):
+        width = max(self.canvas.winfo_width(), self.cell_width)
+        columns = max(1, width // self.cell_width)
+        rows = (len(self.materials) + columns - 1) // columns
+        self.canvas.configure(scrollregion=(0, 0, columns * self.cell_width, rows * self.cell_height),
+                              yscrollincrement=self.cell_height // 4)
+        if columns != self.columns:
+            self.columns = columns
+            for index in list(self.cells):
+                self.drop_cell(index)
+        self.redraw()
+
+    def on_scroll(self, *args):
+        self.canvas.yview(*args)
+        self.redraw()
+
+    def on_mousewheel(self, event):
+        self.on_scroll("scroll", int(-event.delta / 120) or (-1 if event.delta > 0 else 1), "units")
+
+    def visible_indices(self):
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // self.cell_height) - OVERSCAN_ROWS)
+        last_row = int(bottom // self.cell_height) + OVERSCAN_ROWS
+        first = first_row * self.columns
+        last = min(len(self.materials), (last_row + 1) * self.columns)
+        return range(first, last)
+
+    def redraw(self):
+        visible = self.visible_indices()
+        for index in list(self.cells):
+            if index not in visible:
+                self.drop_cell(index)
+        self.wanted = set(visible)
+        for index in visible:
+            if index not in self.cells:
+                self.draw_cell(index)
+
+        # Keep roughly two screens of decoded thumbnails around
+        limit = max(64, len(visible) * 2)
+        while len(self.photos) > limit:
+            self.photos.popitem(last=False)
+
+    def draw_cell(self, index):
+        row, col = divmod(index, self.columns)
+        x = col * self.cell_width + self.cell_width // 2
+        y = row * self.cell_height + PADDING
+        half = self.thumb_size[0] // 2
+        tag = f"cell{index}"
+        frame = self.canvas.create_rectangle(x - half - 4, y - 4, x + half + 4, y + self.thumb_size[1] + 4,
+                                             outline="#555555", fill="#505050", tags=(tag,))
+        image = self.canvas.create_image(x, y, anchor="n", tags=(tag,))
+        label = self.canvas.create_text(x, y + self.thumb_size[1] + 6, anchor="n", fill="#dddddd",
+                                        width=self.cell_width - 4, text=self.materials[index].name,
+                                        tags=(tag,))
+        self.canvas.tag_bind(tag, "<Button-1>", lambda e, i=index: self.on_select(i))
+        self.cells[index] = (frame, image, label)
+
+        photo = self.photos.get(index)
+        if photo:
+            self.photos.move_to_end(index)
+            self.canvas.itemconfigure(image, image=photo)
+        elif index not in self.requested:
+            self.requested.add(index)
+            self.executor.submit(self.decode, index)
+
+    def drop_cell(self, index):
+        for item in self.cells.pop(index):
+            self.canvas.delete(item)
+
+    def decode(self, index):
+        # Runs on the decode pool; rows scrolled away before we start are skipped
+        if self.closed or index not in self.wanted:
+            self.results.put((index, None))
+            return
+        name = self.materials[index].name
+        preview_path = os.path.join(self.working_dir, "materials", name, "preview.png")
+        self.results.put((index, self.thumbs.load(preview_path)))
+
+    def poll_results(self):
+        # PhotoImages may only be created on the Tk thread, so results queue up here
+        if self.closed:
+            return
+        for _ in range(MAX_PHOTOS_PER_TICK):
+            try:
+                index, img = self.results.get_nowait()
+            except queue.Empty:
+                break
+            self.requested.discard(index)
+            if img is None or index not in self.cells:
+                continue
+            photo = ImageTk.PhotoImage(img)
+            self.photos[index] = photo
+            self.canvas.itemconfigure(self.cells[index][1], image=photo)
+        # Cells that were skipped while off-screen may be back in view
+        for index in self.cells:
+            if index not in self.photos and index not in self.requested:
+                self.requested.add(index)
+                self.executor.submit(self.decode, index)
+        self.window.after(POLL_MS, self.poll_results)
+
+    def on_destroy(self, event):
+        if event.widget is not self.window or self.closed:
+            return
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.photos.clear()
@@ -0,0 +1,104 @@
+# In-memory search index over the material library.
+# Parameters live in NumPy columns (one row per entry in app.materials), so
+# name/range filters are vectorized. Albedo colors are kept in CIELAB, and
+# "closest to this RGB" scores every candidate in one vectorized distance pass
+# and picks the best k with argpartition (a couple of ms at 100k rows), which
+# stays fast however a filter thins out or scatters the candidates.
+import numpy as np
+
+
+def srgb_to_lab(rgb):
+    # rgb: (..., 3) sRGB values in 0..1 -> (..., 3) CIELAB under D65
+    rgb = np.clip(np.asarray(rgb, dtype=np.float64), 0.0, 1.0)
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    matrix = np.array([[0.4124564, 0.3575761, 0.1804375],
+                       [0.2126729, 0.7151522, 0.0721750],
+                       [0.0193339, 0.1191920, 0.9503041]])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+class MaterialIndex:
+    def __init__(self, capacity=1024):
+        self.count = 0
+        self.params = np.zeros((capacity, 5), dtype=np.float32)   # r, g, b, smoothness, metalness
+        self.lab = np.zeros((capacity, 3), dtype=np.float32)
+        self.names = []
+
+    def _grow(self, needed):
+        capacity = len(self.params)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr in ("params", "lab"):
+            old = getattr(self, attr)
+            new = np.zeros((capacity, old.shape[1]), dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, attr, new)
+
+    @staticmethod
+    def _row(mat):
+        return [mat.albedo_r, mat.albedo_g, mat.albedo_b, mat.smoothness_multiplier, mat.metalness_multiplier]
+
+    def extend(self, materials):
+        # Appends rows in bulk; row i always matches app.materials[i]
+        if not materials:
+            return
+        start, end = self.count, self.count + len(materials)
+        self._grow(end)
+        self.params[start:end] = np.array([self._row(mat) for mat in materials], dtype=np.float32)
+        self.lab[start:end] = srgb_to_lab(self.params[start:end, :3])
+        self.names.extend(mat.name.lower() for mat in materials)
+        self.count = end
+
+    def upsert(self, row, mat):
+        if row >= self.count:
+            self.extend([mat])
+            return
+        self.params[row] = self._row(mat)
+        self.lab[row] = srgb_to_lab(self.params[row, :3])
+        self.names[row] = mat.name.lower()
+
+    def clear(self):
+        self.count = 0
+        self.names = []
+
+    def filter_mask(self, name=None, smoothness=None, metalness=None):
+        mask = np.ones(self.count, dtype=bool)
+        if name:
+            needle = name.lower()
+            mask &= np.fromiter((needle in n for n in self.names), dtype=bool, count=self.count)
+        params = self.params[:self.count]
+        if smoothness:
+            mask &= (params[:, 3] >= smoothness[0]) & (params[:, 3] <= smoothness[1])
+        if metalness:
+            mask &= (params[:, 4] >= metalness[0]) & (params[:, 4] <= metalness[1])
+        return mask
+
+    def nearest(self, rgb, k=20, mask=None):
+        # Returns [(row, delta_e), ...] sorted by distance
+        target = srgb_to_lab(rgb).astype(np.float32)
+        rows = np.flatnonzero(mask) if mask is not None else None
+        lab = self.lab[rows] if rows is not None else self.lab[:self.count]
+        k = min(k, len(lab))
+        if k <= 0:
+            return []
+        diff = lab - target
+        # Squared distances rank the same and skip a sqrt per row
+        squared = np.einsum("ij,ij->i", diff, diff)
+        best = np.argpartition(squared, k - 1)[:k] if k < len(squared) else np.arange(len(squared))
+        order = best[np.argsort(squared[best])]
+        if rows is not None:
+            return [(int(rows[i]), float(np.sqrt(squared[i]))) for i in order]
+        return [(int(i), float(np.sqrt(squared[i]))) for i in order]
+
+    def search(self, name=None, smoothness=None, metalness=None, color=None, k=50):
+        mask = self.filter_mask(name, smoothness, metalness)
+        if color is not None:
+            return self.nearest(color, k=k, mask=mask)
+        rows = np.flatnonzero(mask)[:k]
+        return [(int(row), None) for row in rows]
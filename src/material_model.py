@@ -0,0 +1,96 @@
+# Typed in-memory material record. Values are parsed once when a material is
+# read (CSV, SQLite row, legacy material_config.txt) and stay floats/strings
+# from then on; each on-disk format has exactly one to_/from_ pair here.
+# Standard library only, so the headless tools can use it as well.
+
+# Column order matches the historical materials.csv header
+CSV_FIELDS = ["Name", "albedo_r", "albedo_g", "albedo_b", "smoothness_multiplier",
+              "metalness_multiplier", "albedo_map", "metalness_map", "detail_map", "emmissive_map"]
+FLOAT_FIELDS = ["albedo_r", "albedo_g", "albedo_b", "smoothness_multiplier", "metalness_multiplier"]
+TEXT_FIELDS = ["albedo_map", "metalness_map", "detail_map", "emmissive_map"]
+
+DEFAULTS = {"albedo_r": 1.0, "albedo_g": 1.0, "albedo_b": 1.0,
+            "smoothness_multiplier": 0.5, "metalness_multiplier": 0.0}
+
+
+def parse_float(value, default):
+    if value in ('', None):
+        return default
+    return float(value)
+
+
+class Material:
+    __slots__ = ["id", "name"] + FLOAT_FIELDS + TEXT_FIELDS
+
+    def __init__(self, name, albedo_r=1.0, albedo_g=1.0, albedo_b=1.0, smoothness_multiplier=0.5,
+                 metalness_multiplier=0.0, albedo_map='', metalness_map='', detail_map='', emmissive_map='',
+                 id=None):
+        self.id = id
+        self.name = name
+        self.albedo_r = albedo_r
+        self.albedo_g = albedo_g
+        self.albedo_b = albedo_b
+        self.smoothness_multiplier = smoothness_multiplier
+        self.metalness_multiplier = metalness_multiplier
+        self.albedo_map = albedo_map
+        self.metalness_map = metalness_map
+        self.detail_map = detail_map
+        self.emmissive_map = emmissive_map
+
+    def __repr__(self):
+        return f"Material({self.name!r}, id={self.id})"
+
+    @property
+    def albedo(self):
+        return (self.albedo_r, self.albedo_g, self.albedo_b)
+
+    @albedo.setter
+    def albedo(self, rgb):
+        self.albedo_r, self.albedo_g, self.albedo_b = (float(c) for c in rgb)
+
+    def map_path(self, map_type):
+        return getattr(self, map_type)
+
+    def set_map(self, map_type, path):
+        if map_type not in TEXT_FIELDS:
+            raise ValueError(f"Unknown map type: {map_type}")
+        setattr(self, map_type, path or '')
+
+    def copy(self):
+        return Material(self.name, *(getattr(self, field) for field in FLOAT_FIELDS + TEXT_FIELDS), id=self.id)
+
+    # materials.csv
+    @classmethod
+    def from_csv(cls, row):
+        values = [parse_float(row.get(field), DEFAULTS[field]) for field in FLOAT_FIELDS]
+        maps = [row.get(field) or '' for field in TEXT_FIELDS]
+        return cls(row.get('Name') or '', *values, *maps)
+
+    def to_csv(self):
+        row = {'Name': self.name}
+        for field in FLOAT_FIELDS + TEXT_FIELDS:
+            row[field] = getattr(self, field)
+        return row
+
+    # materials.db: (id, name, *FLOAT_FIELDS, *TEXT_FIELDS)
+    @classmethod
+    def from_db_row(cls, row):
+        return cls(row[1], *row[2:], id=row[0])
+
+    def to_db_row(self):
+        return [self.name] + [getattr(self, field) for field in FLOAT_FIELDS + TEXT_FIELDS]
+
+    # materials/<name>/material_config.txt: "r,g,b,smoothness,metalness[,albedo_map[,metalness_map]]"
+    def apply_config(self, text):
+        parts = text.strip().split(",")
+        values = [float(value) for value in parts[0:5]]
+        for field, value in zip(FLOAT_FIELDS, values):
+            setattr(self, field, value)
+        if len(parts) > 5 and parts[5].strip():
+            self.albedo_map = parts[5].strip()
+        if len(parts) > 6 and parts[6].strip():
+            self.metalness_map = parts[6].strip()
+
+    def to_config(self):
+        values = [str(getattr(self, field)) for field in FLOAT_FIELDS]
+        return ",".join(values + [self.albedo_map, self.metalness_map])
@@ -0,0 +1,112 @@
+# Material search window: name / smoothness / metalness filters and a
+# "closest albedo" lookup, all answered by the app's MaterialIndex.
+import time
+
+import ttkbootstrap as ttk
+from tkinter import colorchooser
+
+MAX_RESULTS = 200
+SEARCH_DELAY_MS = 120
+
+
+class MaterialSearch:
+    def __init__(self, root, index, materials, on_select):
+        self.index = index
+        self.materials = materials
+        self.on_select = on_select
+        self.color = None
+        self._timer = None
+
+        self.window = ttk.Toplevel(root)
+        self.window.title("Search Materials")
+        self.window.geometry("420x560")
+
+        form = ttk.Frame(self.window, padding=10)
+        form.pack(fill="x")
+
+        self.name_var = ttk.StringVar()
+        self.smooth_min = ttk.StringVar(value="0.0")
+        self.smooth_max = ttk.StringVar(value="1.0")
+        self.metal_min = ttk.StringVar(value="0.0")
+        self.metal_max = ttk.StringVar(value="1.0")
+
+        ttk.Label(form, text="Name contains").grid(row=0, column=0, sticky="w")
+        ttk.Entry(form, textvariable=self.name_var).grid(row=0, column=1, columnspan=3, sticky="ew")
+        ttk.Label(form, text="Smoothness").grid(row=1, column=0, sticky="w")
+        ttk.Entry(form, textvariable=self.smooth_min, width=6).grid(row=1, column=1)
+        ttk.Label(form, text="to").grid(row=1, column=2)
+        ttk.Entry(form, textvariable=self.smooth_max, width=6).grid(row=1, column=3)
+        ttk.Label(form, text="Metalness").grid(row=2, column=0, sticky="w")
+        ttk.Entry(form, textvariable=self.metal_min, width=6).grid(row=2, column=1)
+        ttk.Label(form, text="to").grid(row=2, column=2)
+        ttk.Entry(form, textvariable=self.metal_max, width=6).grid(row=2, column=3)
+
+        self.color_swatch = ttk.Label(form, text="Any color", width=12)
+        self.color_swatch.grid(row=3, column=0, sticky="w", pady=5)
+        ttk.Button(form, text="Closest To...", command=self.pick_color).grid(row=3, column=1, columnspan=2)
+        ttk.Button(form, text="Clear", command=self.clear_color).grid(row=3, column=3)
+        form.columnconfigure(1, weight=1)
+
+        self.status = ttk.Label(self.window, text="", padding=(10, 0))
+        self.status.pack(fill="x")
+
+        self.results = ttk.Treeview(self.window, columns=("Name", "Score"), show="headings")
+        self.results.heading("Name", text="Name")
+        self.results.heading("Score", text="ΔE")
+        self.results.column("Score", width=60, anchor="e")
+        self.results.pack(fill="both", expand=True, padx=10, pady=10)
+        self.results.bind("<<TreeviewSelect>>", self.on_result_select)
+
+        for var in (self.name_var, self.smooth_min, self.smooth_max, self.metal_min, self.metal_max):
+            var.trace_add("write", lambda *args: self.schedule_search())
+        self.run_search()
+
+    def pick_color(self):
+        color = colorchooser.askcolor(parent=self.window)[0]
+        if color:
+            self.color = tuple(c / 255.0 for c in color)
+            hex_color = '#%02x%02x%02x' % tuple(int(c) for c in color)
+            self.color_swatch.configure(text=hex_color, background=hex_color)
+            self.run_search()
+
+    def clear_color(self):
+        self.color = None
+        self.color_swatch.configure(text="Any color", background="")
+        self.run_search()
+
+    def schedule_search(self):
+        if self._timer:
+            self.window.after_cancel(self._timer)
+        self._timer = self.window.after(SEARCH_DELAY_MS, self.run_search)
+
+    def read_range(self, low_var, high_var):
+        try:
+            low, high = float(low_var.get()), float(high_var.get())
+        except ValueError:
+            return None
+        if low <= 0.0 and high >= 1.0:
+            return None
+        return low, high
+
+    def run_search(self):
+        self._timer = None
+        started = time.perf_counter()
+        hits = self.index.search(name=self.name_var.get().strip(),
+                                 smoothness=self.read_range(self.smooth_min, self.smooth_max),
+                                 metalness=self.read_range(self.metal_min, self.metal_max),
+                                 color=self.color, k=MAX_RESULTS)
+        elapsed = time.perf_counter() - started
+
+        self.results.delete(*self.results.get_children())
+        for row, distance in hits:
+            if row >= len(self.materials):
+                continue
+            score = "" if distance is None else f"{distance:.1f}"
+            self.results.insert("", "end", iid=str(row), values=(self.materials[row].name, score))
+        self.status.configure(text=f"{len(hits)} match(es) in {elapsed * 1000:.1f} ms "
+                                   f"({self.index.count} indexed)")
+
+    def on_result_select(self, event=None):
+        selection = self.results.selection()
+        if selection:
+            self.on_select(int(selection[0]))
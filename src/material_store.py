@@ -0,0 +1,195 @@
+# SQLite-backed project store (<project>/materials.db), the single source of
+# truth for material values. materials.csv stays available as an
+# import/export format for the Unity side (utk/scripts/CSVLoader.cs).
+import csv
+import os
+import sqlite3
+import threading
+import urllib.parse
+
+from src.material_model import Material, CSV_FIELDS, FLOAT_FIELDS, TEXT_FIELDS
+
+DB_FILENAME = "materials.db"
+
+# Bumped for every change below; PRAGMA user_version records how far a
+# project's database has been migrated
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS materials (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    albedo_r REAL NOT NULL DEFAULT 1.0,
+    albedo_g REAL NOT NULL DEFAULT 1.0,
+    albedo_b REAL NOT NULL DEFAULT 1.0,
+    smoothness_multiplier REAL NOT NULL DEFAULT 0.5,
+    metalness_multiplier REAL NOT NULL DEFAULT 0.0,
+    albedo_map TEXT NOT NULL DEFAULT '',
+    metalness_map TEXT NOT NULL DEFAULT '',
+    detail_map TEXT NOT NULL DEFAULT '',
+    emmissive_map TEXT NOT NULL DEFAULT ''
+)
+"""
+
+DB_COLUMNS = ["name"] + FLOAT_FIELDS + TEXT_FIELDS
+# Names are unique (a material is also its folder), so imports update in place
+UPSERT = (f"INSERT INTO materials ({', '.join(DB_COLUMNS)}) VALUES ({', '.join('?' * len(DB_COLUMNS))}) "
+          f"ON CONFLICT(name) DO UPDATE SET "
+          + ", ".join(f"{column} = excluded.{column}" for column in DB_COLUMNS[1:]))
+
+
+def read_legacy_config(working_dir, mat):
+    # Per-material material_config.txt used to win over the CSV in the editor
+    config_path = os.path.join(working_dir, "materials", mat.name, "material_config.txt")
+    if not os.path.exists(config_path):
+        return
+    try:
+        with open(config_path, "r") as f:
+            mat.apply_config(f.read())
+    except ValueError as e:
+        print(f"⚠️ Ignoring unreadable {config_path}: {e}")
+
+
+def load_csv(csv_path):
+    with open(csv_path, newline='') as csvfile:
+        return [Material.from_csv(row) for row in csv.DictReader(csvfile)]
+
+
+class MaterialStore:
+    def __init__(self, working_dir, read_only=False):
+        # read_only opens an existing database as is: no migration, nothing
+        # created (sqlite3.OperationalError if there is no database yet)
+        self.working_dir = working_dir
+        self.db_path = os.path.join(working_dir, DB_FILENAME)
+        self._lock = threading.Lock()
+        if read_only:
+            uri = "file:" + urllib.parse.quote(os.path.abspath(self.db_path).replace(os.sep, "/")) + "?mode=ro"
+            if not os.path.exists(self.db_path + "-wal"):
+                # Nobody has it open for writing: skip locking, which would
+                # leave -wal/-shm files behind
+                uri += "&immutable=1"
+            self.conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.migrate()
+
+    def migrate(self):
+        # All steps and the version bump commit together, so a migration that
+        # is interrupted is simply run again on the next open
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        migrated = 0
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                if version < 1:
+                    self.conn.execute(SCHEMA)
+                    # First open of an older project: migrate the CSV and per-material configs
+                    csv_path = os.path.join(self.working_dir, "materials.csv")
+                    empty = self.conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0] == 0
+                    if empty and os.path.exists(csv_path):
+                        rows = self._read_csv(csv_path, merge_legacy_configs=True)
+                        self.conn.executemany(
+                            f"INSERT INTO materials ({', '.join(DB_COLUMNS)}) "
+                            f"VALUES ({', '.join('?' * len(DB_COLUMNS))})", rows)
+                        migrated = len(rows)
+                if version < 2:
+                    # Names were not unique before; later duplicates get their id appended
+                    self.conn.execute(
+                        "UPDATE materials SET name = name || '_' || id WHERE id NOT IN "
+                        "(SELECT MIN(id) FROM materials GROUP BY name)")
+                    self.conn.execute("DROP INDEX IF EXISTS idx_materials_name")
+                    self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_materials_name ON materials(name)")
+                self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self.conn.commit()
+            except BaseException:
+                self.conn.rollback()
+                raise
+        if migrated:
+            print(f"✅ Migrated {migrated} material(s) from materials.csv into {DB_FILENAME}")
+
+    def load_all(self):
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, {', '.join(DB_COLUMNS)} FROM materials ORDER BY id").fetchall()
+        return [Material.from_db_row(row) for row in rows]
+
+    def iter_rows(self, batch_size=1000):
+        # Streams materials in id order without holding the whole table in memory
+        last_id = 0
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    f"SELECT id, {', '.join(DB_COLUMNS)} FROM materials WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)).fetchall()
+            if not rows:
+                return
+            for row in rows:
+                yield Material.from_db_row(row)
+            last_id = rows[-1][0]
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM materials").fetchone()[0]
+
+    def find_by_name(self, name):
+        with self._lock:
+            row = self.conn.execute(
+                f"SELECT id, {', '.join(DB_COLUMNS)} FROM materials WHERE name = ? LIMIT 1", (name,)).fetchone()
+        return Material.from_db_row(row) if row else None
+
+    def insert(self, mat):
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                f"INSERT INTO materials ({', '.join(DB_COLUMNS)}) VALUES ({', '.join('?' * len(DB_COLUMNS))})",
+                mat.to_db_row())
+        mat.id = cursor.lastrowid
+        return mat.id
+
+    def update(self, mat):
+        # Single-row update; everything else in the library is untouched
+        if mat.id is None:
+            return self.insert(mat)
+        assignments = ", ".join(f"{column} = ?" for column in DB_COLUMNS)
+        with self._lock, self.conn:
+            self.conn.execute(f"UPDATE materials SET {assignments} WHERE id = ?", mat.to_db_row() + [mat.id])
+        return mat.id
+
+    def delete(self, mat):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM materials WHERE id = ?", (mat.id,))
+
+    def _read_csv(self, csv_path, merge_legacy_configs=False):
+        rows = []
+        for mat in load_csv(csv_path):
+            if merge_legacy_configs:
+                read_legacy_config(self.working_dir, mat)
+            rows.append(mat.to_db_row())
+        return rows
+
+    def import_csv(self, csv_path, merge_legacy_configs=False):
+        # Materials already in the library are updated by name, so importing
+        # the same CSV twice does not duplicate anything
+        rows = self._read_csv(csv_path, merge_legacy_configs)
+        with self._lock, self.conn:
+            self.conn.executemany(UPSERT, rows)
+        return len(rows)
+
+    def export_csv(self, csv_path):
+        tmp_path = csv_path + ".tmp"
+        count = 0
+        with open(tmp_path, 'w', newline='') as csvfile:
+            writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            for mat in self.iter_rows():
+                writer.writerow(mat.to_csv())
+                count += 1
+        os.replace(tmp_path, csv_path)
+        return count
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,142 @@
+# Multi-view previews: one material on several preview models, each from
+# several camera angles. Views are sent as "multiview" jobs of at most
+# VIEWS_PER_JOB views of one model, so a long run never holds a worker for
+# longer than a few renders and interactive previews can slip in between.
+# Views land in <project>/materials/<name>/views/, together with an optional
+# sprite sheet (one row per model, one column per angle) and multiview.json
+# holding the per-view timings. Shared by the editor and the headless CLI.
+import json
+import os
+import time
+
+from src import render_protocol
+from src import render_scheduler
+
+DEFAULT_ANGLES = 4
+VIEWS_PER_JOB = 4
+SHEET_FILENAME = "sheet.png"
+TIMING_FILENAME = "multiview.json"
+
+
+def views_dir(working_dir, mat):
+    return os.path.join(working_dir, "materials", mat.name, "views")
+
+
+def unique_labels(models):
+    # File-name labels per model; models sharing a base name (e.g. chair.fbx in
+    # both the bundled and the project preview_model folder) get a suffix
+    labels = {}
+    taken = set()
+    for model in models:
+        label = base = render_protocol.model_label(model)
+        suffix = 2
+        while label in taken:
+            label = f"{base}_{suffix}"
+            suffix += 1
+        taken.add(label)
+        labels[model] = label
+    return labels
+
+
+def plan_views(working_dir, mat, models, angles, camera):
+    # Azimuths are spread evenly around the model, starting at the configured camera
+    output_dir = views_dir(working_dir, mat)
+    labels = unique_labels(models)
+    views = []
+    for model in models:
+        for step in range(angles):
+            azimuth = round(360.0 * step / angles, 1)
+            views.append({"model": model, "azimuth": azimuth,
+                          "camera": render_protocol.orbit_camera(camera, azimuth),
+                          "output": os.path.join(output_dir, f"{labels[model]}_{int(azimuth):03d}.png")})
+    return views
+
+
+def make_sprite_sheet(rows, output_path, cell_size=256):
+    # rows: one list of image paths per row; missing images stay blank
+    from PIL import Image
+
+    columns = max((len(row) for row in rows), default=0)
+    sheet = Image.new("RGBA", (columns * cell_size, len(rows) * cell_size), (0, 0, 0, 0))
+    for y, row in enumerate(rows):
+        for x, path in enumerate(row):
+            if not path or not os.path.exists(path):
+                continue
+            with Image.open(path) as img:
+                img.draft("RGBA", (cell_size, cell_size))
+                cell = img.convert("RGBA").resize((cell_size, cell_size))
+            sheet.paste(cell, (x * cell_size, y * cell_size))
+    sheet.save(output_path + ".tmp", format="PNG")
+    os.replace(output_path + ".tmp", output_path)
+    return output_path
+
+
+def render_multiview(pool, working_dir, mat, models, angles=DEFAULT_ANGLES, quality=None, scene=None,
+                     sheet=True, on_view=None, priority=render_scheduler.BACKGROUND):
+    # Returns {"material", "views": [...], "rendered", "failed", "elapsed", "sheet"?, "timing"}
+    # where each view has model, azimuth, output, status, setup_time and render_time
+    scene = scene or render_protocol.read_scene(working_dir)
+    camera = scene.get("camera") or {"location": [0.0, -2.5, 2.0], "light_rotation": 45.0}
+    # The same model listed twice would only render over its own views
+    models = list(dict.fromkeys(models))
+    planned = plan_views(working_dir, mat, models, angles, camera)
+    os.makedirs(views_dir(working_dir, mat), exist_ok=True)
+    requests = []
+    by_id = {}
+    for model in models:
+        model_views = [view for view in planned if view["model"] == model]
+        for offset in range(0, len(model_views), VIEWS_PER_JOB):
+            chunk = model_views[offset:offset + VIEWS_PER_JOB]
+            request = render_protocol.multiview_request(
+                mat, working_dir, [{k: v for k, v in view.items() if k != "azimuth"} for view in chunk], quality)
+            for view, sent in zip(chunk, request["views"]):
+                view.update(id=sent["id"], status="pending")
+                by_id[sent["id"]] = view
+            requests.append(request)
+
+    summary = {"material": mat.name, "views": planned, "rendered": 0, "failed": 0, "elapsed": 0.0}
+    if not pool:
+        summary["error"] = "Blender daemon is not running"
+        return summary
+
+    def on_event(event):
+        if event.get("status") != "progress":
+            return
+        view = by_id.get(event.get("view"))
+        if not view:
+            return
+        view["setup_time"] = event.get("setup_time")
+        view["render_time"] = event.get("render_time")
+        if event.get("error"):
+            view.update(status="failed", error=event["error"])
+        else:
+            view["status"] = "rendered"
+        if on_view:
+            on_view(dict(view, done=event.get("done"), total=event.get("total")))
+
+    started = time.time()
+    # Chunks may run on several workers at once
+    entries = [(pool.submit(request, on_event=on_event, timeout=60 + 30 * len(request["views"]),
+                            priority=priority, tag=mat.name), request) for request in requests]
+    for entry, request in entries:
+        # Like BatchJob.wait: each entry is resolved once dispatched and timed out,
+        # when the pool closes, or once no worker is left to run it
+        reply = pool.wait(entry)
+        if not reply or reply["status"] != "done":
+            summary.setdefault("error", (reply or {}).get("error") or "Timeout waiting for render")
+    summary["elapsed"] = time.time() - started
+    summary["rendered"] = sum(1 for view in planned if view["status"] == "rendered")
+    summary["failed"] = len(planned) - summary["rendered"]
+
+    if sheet and summary["rendered"]:
+        rows = [[view["output"] if view["status"] == "rendered" else None
+                 for view in planned if view["model"] == model] for model in models]
+        try:
+            summary["sheet"] = make_sprite_sheet(rows, os.path.join(views_dir(working_dir, mat), SHEET_FILENAME))
+        except Exception as e:
+            print(f"⚠️ Could not build sprite sheet for {mat.name}: {e}")
+
+    summary["timing"] = os.path.join(views_dir(working_dir, mat), TIMING_FILENAME)
+    with open(summary["timing"], "w") as f:
+        json.dump({k: v for k, v in summary.items() if k != "timing"}, f, indent=2)
+    return summary
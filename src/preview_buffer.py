@@ -0,0 +1,71 @@
+# Memory-mapped ring of raw RGBA frames shared by one daemon and the editor.
+# The daemon writes display-sized pixels into the next slot and replies with
+# the slot and sequence number; the editor reads them without any PNG
+# encode/decode. Standard library only, so Blender's Python can import it.
+import mmap
+import os
+import struct
+
+MAGIC = b"MEPV"
+HEADER = struct.Struct("<4sIII")       # magic, version, slot count, bytes per slot
+SLOT_HEADER = struct.Struct("<QII")    # sequence, width, height
+VERSION = 1
+
+
+class FrameRing:
+    def __init__(self, path, mapping, slot_count, slot_bytes):
+        self.path = path
+        self._map = mapping
+        self.slot_count = slot_count
+        self.slot_bytes = slot_bytes
+
+    @classmethod
+    def create(cls, path, width=256, height=256, slot_count=4):
+        slot_bytes = width * height * 4
+        size = HEADER.size + slot_count * (SLOT_HEADER.size + slot_bytes)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, slot_count, slot_bytes))
+            f.truncate(size)
+        return cls.open(path)
+
+    @classmethod
+    def open(cls, path):
+        with open(path, "r+b") as f:
+            mapping = mmap.mmap(f.fileno(), 0)
+        magic, version, slot_count, slot_bytes = HEADER.unpack_from(mapping, 0)
+        if magic != MAGIC or version != VERSION:
+            mapping.close()
+            raise ValueError(f"Not a frame ring: {path}")
+        return cls(path, mapping, slot_count, slot_bytes)
+
+    def _slot_offset(self, slot):
+        return HEADER.size + slot * (SLOT_HEADER.size + self.slot_bytes)
+
+    def write(self, seq, width, height, pixels):
+        if len(pixels) != width * height * 4 or len(pixels) > self.slot_bytes:
+            raise ValueError(f"Frame {width}x{height} does not fit a {self.slot_bytes} byte slot")
+        slot = seq % self.slot_count
+        offset = self._slot_offset(slot)
+        # Invalidate the slot first and publish the sequence number last, so a
+        # reader never mistakes a half-written frame for a finished one
+        SLOT_HEADER.pack_into(self._map, offset, 0, width, height)
+        start = offset + SLOT_HEADER.size
+        self._map[start:start + len(pixels)] = pixels
+        SLOT_HEADER.pack_into(self._map, offset, seq, width, height)
+        return slot
+
+    def read(self, slot, seq):
+        # Returns (width, height, pixels), or None if the slot was reused
+        offset = self._slot_offset(slot)
+        found_seq, width, height = SLOT_HEADER.unpack_from(self._map, offset)
+        if found_seq != seq:
+            return None
+        start = offset + SLOT_HEADER.size
+        pixels = self._map[start:start + width * height * 4]
+        if SLOT_HEADER.unpack_from(self._map, offset)[0] != seq:
+            return None
+        return width, height, pixels
+
+    def close(self):
+        self._map.close()
@@ -0,0 +1,140 @@
+# Content-addressed cache of rendered previews, stored in <project>/preview_cache.
+# A key hashes everything that affects the image: material values, texture
+# contents, the preview model, the camera/light setup and the quality tier.
+#
+# Entries are kept in least-recently-used order with a running byte total, so
+# a put costs O(1) plus whatever it evicts. index.json is written at most every
+# INDEX_FLUSH_INTERVAL seconds while puts come in, and by flush()/save().
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+from src.file_hash import HashMemo
+
+INDEX_FILENAME = "index.json"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+INDEX_FLUSH_INTERVAL = 5.0
+
+
+class PreviewCache:
+    def __init__(self, working_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = os.path.join(working_dir, "preview_cache")
+        self.index_path = os.path.join(self.cache_dir, INDEX_FILENAME)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.entries = {}
+        file_hashes = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    index = json.load(f)
+                self.entries = index.get("entries", {})
+                file_hashes = index.get("file_hashes", {})
+            except (OSError, ValueError) as e:
+                print("⚠️ Preview cache index unreadable, starting empty:", e)
+        self.entries = dict(sorted(self.entries.items(), key=lambda item: item[1]["last_used"]))
+        self.total_bytes = sum(entry["size"] for entry in self.entries.values())
+        self.hashes = HashMemo(file_hashes)
+        self._dirty = False
+        self._saved_at = time.time()
+
+    def file_hash(self, path):
+        return self.hashes.digest(path)
+
+    def key_for(self, request):
+        material = dict(request.get("material") or {})
+        # The name never reaches the image, so identical materials share a preview
+        material.pop("name", None)
+        for map_type, path in list(material.items()):
+            if map_type.endswith("_map"):
+                material[map_type] = self.file_hash(path) if path else ""
+
+        model = request.get("model") or ""
+        model_hash = model if model.startswith("primitive:") else self.file_hash(model)
+
+        key_source = {
+            "material": material,
+            "model": model_hash,
+            "camera": request.get("camera"),
+            "quality": request.get("quality"),
+        }
+        encoded = json.dumps(key_source, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, f"{key}.png")
+
+    def get(self, key):
+        path = self.path_for(key)
+        with self._lock:
+            entry = self.entries.get(key)
+            if not entry:
+                return None
+            if not os.path.exists(path):
+                self.total_bytes -= self.entries.pop(key)["size"]
+                self._dirty = True
+                return None
+            entry["last_used"] = time.time()
+            # Most recently used last
+            self.entries[key] = self.entries.pop(key)
+        return path
+
+    def put(self, key, image_path):
+        path = self.path_for(key)
+        try:
+            shutil.copy(image_path, path + ".tmp")
+            os.replace(path + ".tmp", path)
+        except OSError as e:
+            print("⚠️ Could not store preview in cache:", e)
+            return None
+        size = os.path.getsize(path)
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous:
+                self.total_bytes -= previous["size"]
+            self.entries[key] = {"size": size, "last_used": time.time()}
+            self.total_bytes += size
+            self._evict(keep=key)
+            self._dirty = True
+            if time.time() - self._saved_at >= INDEX_FLUSH_INTERVAL:
+                self._save_index()
+        return path
+
+    def _evict(self, keep=None):
+        # Oldest entries first; the one just stored always stays
+        while self.total_bytes > self.max_bytes:
+            key = next(iter(self.entries))
+            if key == keep:
+                break
+            self.total_bytes -= self.entries.pop(key)["size"]
+            try:
+                os.remove(self.path_for(key))
+            except OSError:
+                pass
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"entries": self.entries, "file_hashes": self.hashes.snapshot()}, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        self._saved_at = time.time()
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self.entries), "bytes": self.total_bytes, "max_bytes": self.max_bytes}
+
+    def flush(self):
+        # Writes index.json if anything changed since the last write, e.g. at the end of a job
+        with self._lock:
+            if self._dirty:
+                self._save_index()
+
+    def save(self):
+        with self._lock:
+            self._save_index()
@@ -0,0 +1,134 @@
+# Display side of the main preview pane. Decoding and resizing preview PNGs
+# runs on a small thread pool, and anything that touches Tk (PhotoImage,
+# label updates) is queued and run on the Tk thread by a root.after poll.
+# Display-ready PhotoImages are kept in an LRU keyed by material name and
+# preview.png mtime, so going back to a material shows it without any decode.
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageTk
+
+POLL_MS = 15
+MAX_CALLBACKS_PER_TICK = 8
+DECODE_WORKERS = 2
+CACHE_ITEMS = 64
+
+
+class PreviewDisplay:
+    def __init__(self, root, size=(256, 256), workers=DECODE_WORKERS, cache_items=CACHE_ITEMS):
+        self.root = root
+        self.size = size
+        self.cache_items = cache_items
+        self.photos = OrderedDict()   # (material name, mtime) -> PhotoImage, LRU bounded
+        self.results = queue.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="preview-decode")
+        self._wanted = None           # the one selection whose decode is still needed
+        self.closed = False
+        self.root.after(POLL_MS, self.poll_results)
+
+    def post(self, callback, *args):
+        # Safe from any thread: callback(*args) runs on the Tk thread
+        self.results.put((callback, args))
+
+    def submit(self, fn, *args):
+        # Disk work that must not run on the Tk thread
+        if not self.closed:
+            self.executor.submit(fn, *args)
+
+    def decode(self, path):
+        with open(path, "rb") as f:
+            img = Image.open(f)
+            img.draft("RGBA", self.size)
+            img = img.convert("RGBA")
+        if img.size != self.size:
+            img = img.resize(self.size)
+        return img
+
+    def show_saved(self, mat_name, path, on_ready):
+        # Shows a material's saved preview: on_ready(photo) runs on the Tk thread
+        # once it is available. Only the latest call is served; older ones that
+        # have not started decoding yet are dropped.
+        token = object()
+        self._wanted = token
+        self.submit(self._load_saved, token, mat_name, path, on_ready)
+
+    def _load_saved(self, token, mat_name, path, on_ready):
+        if self._wanted is not token:
+            return
+        try:
+            key = (mat_name, os.path.getmtime(path))
+        except OSError:
+            return
+        # Membership test only; the LRU itself is owned by the Tk thread
+        if key in self.photos:
+            self.post(self._deliver, token, key, path, None, on_ready)
+            return
+        try:
+            img = self.decode(path)
+        except Exception as e:
+            print("❌ Failed to load preview image:", e)
+            return
+        self.post(self._deliver, token, key, path, img, on_ready)
+
+    def _deliver(self, token, key, path, img, on_ready):
+        if self._wanted is not token:
+            return
+        photo = self.photos.get(key)
+        if photo is None:
+            if img is None:
+                # Evicted between the worker's check and now
+                self.submit(self._load_saved, token, key[0], path, on_ready)
+                return
+            photo = self.remember(key, ImageTk.PhotoImage(img))
+        else:
+            self.photos.move_to_end(key)
+        on_ready(photo)
+
+    def remember(self, key, photo):
+        # Tk thread only
+        self.photos[key] = photo
+        self.photos.move_to_end(key)
+        while len(self.photos) > self.cache_items:
+            self.photos.popitem(last=False)
+        return photo
+
+    def remember_saved(self, mat_name, path, current_photo):
+        # Called from a worker once a displayed frame has been written to path;
+        # current_photo() runs on the Tk thread and returns the PhotoImage to
+        # keep for it, or None. PhotoImages never travel through worker threads,
+        # since dropping the last reference there would delete it off-thread.
+        try:
+            key = (mat_name, os.path.getmtime(path))
+        except OSError:
+            return
+        self.post(self._remember_current, key, current_photo)
+
+    def _remember_current(self, key, current_photo):
+        photo = current_photo()
+        if photo is not None:
+            self.remember(key, photo)
+
+    def cancel(self):
+        # A newer render is about to replace whatever is being decoded
+        self._wanted = None
+
+    def poll_results(self):
+        if self.closed:
+            return
+        for _ in range(MAX_CALLBACKS_PER_TICK):
+            try:
+                callback, args = self.results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                print("❌ Preview display update failed:", e)
+        self.root.after(POLL_MS, self.poll_results)
+
+    def shutdown(self):
+        self.closed = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.photos.clear()
@@ -0,0 +1,103 @@
+# Bulk preview regeneration shared by the editor and the headless CLI.
+# Cache hits are copied straight into place; only misses reach the render pool.
+#
+# Next to each preview.png, preview.key holds the preview cache key it was
+# rendered with, so a preview can be checked against the material's current
+# values without relying on the (size-bounded) cache still having it.
+import os
+import shutil
+
+from src import render_protocol
+from src import render_client
+
+PREVIEW_KEY_FILENAME = "preview.key"
+
+
+def preview_path_for(working_dir, mat):
+    return os.path.join(working_dir, "materials", mat.name, "preview.png")
+
+
+def preview_key_path(working_dir, name):
+    return os.path.join(working_dir, "materials", name, PREVIEW_KEY_FILENAME)
+
+
+def read_preview_key(working_dir, name):
+    try:
+        with open(preview_key_path(working_dir, name), "r") as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def write_preview_key(working_dir, name, key):
+    # Call right after replacing preview.png; None means the inputs are unknown
+    path = preview_key_path(working_dir, name)
+    try:
+        if key:
+            with open(path + ".tmp", "w") as f:
+                f.write(key)
+            os.replace(path + ".tmp", path)
+        elif os.path.exists(path):
+            os.remove(path)
+    except OSError as e:
+        print(f"⚠️ Could not record preview key for {name}: {e}")
+
+
+def refresh_previews(pool, preview_cache, working_dir, materials, quality=None, on_progress=None, scene=None):
+    # on_progress receives one dict per finished material:
+    # {"material", "output", "status": "rendered"|"cached"|"failed", "error"?, "done", "total", "per_second"}
+    total = len(materials)
+    items = []
+    cache_keys = {}
+    names = {}
+    hits = 0
+    template = render_protocol.batch_request([], working_dir, quality=quality, scene=scene)
+    for mat in materials:
+        final_preview = preview_path_for(working_dir, mat)
+        item = render_protocol.batch_item(mat, working_dir, final_preview)
+        cache_key = preview_cache.key_for(dict(template, material=item["material"])) if preview_cache else None
+        cached_path = preview_cache.get(cache_key) if cache_key else None
+        if cached_path:
+            os.makedirs(os.path.dirname(final_preview), exist_ok=True)
+            shutil.copy(cached_path, final_preview)
+            write_preview_key(working_dir, mat.name, cache_key)
+            hits += 1
+            if on_progress:
+                on_progress({"material": mat.name, "output": final_preview, "status": "cached",
+                             "done": hits, "total": total, "per_second": 0.0})
+        else:
+            cache_keys[item["id"]] = cache_key
+            names[item["id"]] = mat.name
+            items.append(item)
+
+    summary = {"total": total, "cache_hits": hits, "completed": 0, "failed": 0,
+               "cancelled": 0, "elapsed": 0.0, "per_second": 0.0}
+    if not items:
+        return summary
+    if not pool:
+        summary["failed"] = len(items)
+        summary["error"] = "Blender daemon is not running"
+        return summary
+
+    def on_item(event):
+        stats = job.stats()
+        progress = {"material": names.get(event["item"]), "output": event.get("output"),
+                    "done": hits + stats["completed"] + stats["failed"], "total": total,
+                    "per_second": stats["per_second"]}
+        if event.get("error"):
+            progress.update(status="failed", error=event["error"])
+        else:
+            progress["status"] = "rendered"
+            write_preview_key(working_dir, names.get(event["item"]), cache_keys.get(event["item"]))
+            if preview_cache and cache_keys.get(event["item"]):
+                preview_cache.put(cache_keys[event["item"]], event["output"])
+        if on_progress:
+            on_progress(progress)
+
+    job = render_client.BatchJob(pool, items, template, on_item=on_item)
+    stats = job.start().wait()
+    if preview_cache:
+        preview_cache.flush()
+    summary.update(completed=stats["completed"], failed=stats["failed"], cancelled=stats["cancelled"],
+                   elapsed=stats["elapsed"], per_second=stats["per_second"])
+    return summary
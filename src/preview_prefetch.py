@@ -0,0 +1,237 @@
+# Idle-time pre-rendering, so arrow-keying through the material list finds
+# previews already rendered. Once the user has been idle for a moment, one
+# final-quality render at a time is queued at PREFETCH priority for:
+#   1. the Treeview neighbours of the current selection, nearest first;
+#   2. materials whose preview is stale: preview.png is missing, or its
+#      preview.key does not match the material's current values.
+# Results land in preview.png (with its preview.key) and the preview cache;
+# the editor treats a preview.png whose key matches as a cache hit. RenderPool
+# cancels prefetch jobs whenever an interactive render is submitted.
+#
+# A render already running cannot be interrupted, so prefetching only starts
+# when it leaves another worker idle for the user; with a single Blender
+# worker it stays off. The CPU budget is the share of one worker's time
+# prefetching may use: after a render that kept its worker busy for t seconds
+# the prefetcher rests t * (1 - b) / b.
+import os
+import shutil
+import threading
+import time
+
+from src import render_protocol
+from src import render_scheduler
+from src.preview_jobs import preview_path_for, read_preview_key, write_preview_key
+
+IDLE_DELAY = 0.75
+# Workers that must be idle before a prefetch goes out: one for it, one for the user
+MIN_IDLE_WORKERS = 2
+DEFAULT_CPU_BUDGET = 0.25
+DEFAULT_NEIGHBOURS = 2
+SCAN_BATCH = 200
+RENDER_TIMEOUT = 60
+
+
+class PreviewPrefetcher:
+    def __init__(self, pool, preview_cache, working_dir, quality, cpu_budget=DEFAULT_CPU_BUDGET,
+                 neighbours=DEFAULT_NEIGHBOURS):
+        self.pool = pool
+        self.preview_cache = preview_cache
+        self.working_dir = working_dir
+        self.quality = quality
+        self.cpu_budget = min(1.0, max(0.0, cpu_budget))
+        self.neighbours = neighbours
+        self.materials = []
+        self.current = None
+        self.rendered = 0
+        self.copied = 0
+        self.cancelled = 0
+        self._queue = []          # neighbours still to check, nearest first
+        self._scan_pos = 0
+        self._scanned = False
+        self._generation = 0
+        self._last_activity = time.time()
+        self._rest_until = 0.0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        if self.cpu_budget > 0 and len(pool) < MIN_IDLE_WORKERS:
+            print("⚠️ Preview prefetching needs at least 2 Blender workers; it is off")
+        elif self.cpu_budget > 0:
+            threading.Thread(target=self._run, daemon=True).start()
+
+    @classmethod
+    def from_config(cls, pool, preview_cache, working_dir, quality, config):
+        return cls(pool, preview_cache, working_dir, quality,
+                   cpu_budget=float(config.get("prefetch_cpu_budget", DEFAULT_CPU_BUDGET)),
+                   neighbours=int(config.get("prefetch_neighbours", DEFAULT_NEIGHBOURS)))
+
+    def touch(self):
+        # Any interactive activity pushes the next prefetch back by IDLE_DELAY
+        with self._cond:
+            self._last_activity = time.time()
+
+    def focus(self, materials, index):
+        # Called on selection change with the Treeview's material list
+        with self._cond:
+            if materials is not self.materials:
+                self._scan_pos = 0
+                self._scanned = False
+                self._generation += 1
+            self.materials = materials
+            self.current = materials[index] if index is not None and index < len(materials) else None
+            self._queue = []
+            if index is not None:
+                for distance in range(1, self.neighbours + 1):
+                    for neighbour in (index + distance, index - distance):
+                        if 0 <= neighbour < len(materials):
+                            self._queue.append(materials[neighbour])
+            self._last_activity = time.time()
+            self._cond.notify()
+
+    def invalidate(self, materials=None):
+        # Materials were loaded, added or imported: scan for stale previews again
+        with self._cond:
+            if materials is not None:
+                self.materials = materials
+            self._scan_pos = 0
+            self._scanned = False
+            self._generation += 1
+            self._cond.notify()
+
+    def _next_candidate(self):
+        # Neighbours first, then the next stale material of the background scan.
+        # File checks and hashing run outside the lock, so focus() never waits.
+        with self._cond:
+            current = self.current
+            while self._queue:
+                mat = self._queue.pop(0)
+                if mat is not current:
+                    return mat
+            materials, start, generation = self.materials, self._scan_pos, self._generation
+        found, position = None, start
+        for position in range(start, min(len(materials), start + SCAN_BATCH)):
+            try:
+                mat = materials[position]
+            except IndexError:
+                # The editor cleared the list for a reload meanwhile
+                break
+            if mat is not current and self._stale(mat):
+                found = mat
+                break
+        else:
+            position = min(len(materials), start + SCAN_BATCH)
+        with self._cond:
+            if generation == self._generation and materials is self.materials:
+                self._scan_pos = position + 1 if found else position
+                self._scanned = self._scan_pos >= len(materials)
+        return found
+
+    def _wait_until_idle(self):
+        # Returns False once stopped
+        with self._cond:
+            while not self._stop.is_set():
+                now = time.time()
+                ready_at = max(self._last_activity + IDLE_DELAY, self._rest_until)
+                if (now >= ready_at and not self.pool.has_priority(render_scheduler.INTERACTIVE)
+                        and self.pool.idle_workers() >= MIN_IDLE_WORKERS):
+                    if self._queue or not self._scanned:
+                        return True
+                    self._cond.wait()
+                else:
+                    self._cond.wait(max(0.05, ready_at - now))
+        return False
+
+    def _run(self):
+        while self._wait_until_idle():
+            mat = self._next_candidate()
+            if mat is not None:
+                self._prefetch(mat)
+
+    def _request(self, mat):
+        # Same inputs as the editor's final render, so the editor gets a cache hit
+        return render_protocol.render_request(mat, self.working_dir, quality=self.quality,
+                                              scene=self.pool.scene)
+
+    def _key(self, request):
+        return self.preview_cache.key_for(request) if self.preview_cache else None
+
+    def _stale(self, mat, key=None):
+        if not os.path.exists(preview_path_for(self.working_dir, mat)):
+            return True
+        key = key or self._key(self._request(mat))
+        # Without a cache to compute keys with, any existing preview will do
+        return bool(key) and read_preview_key(self.working_dir, mat.name) != key
+
+    def _prefetch(self, mat):
+        final_preview = preview_path_for(self.working_dir, mat)
+        request = self._request(mat)
+        cache_key = self._key(request)
+        if not self._stale(mat, cache_key):
+            return
+        cached_path = self.preview_cache.get(cache_key) if cache_key else None
+        if cached_path:
+            # Already rendered with these values; only preview.png is behind
+            try:
+                os.makedirs(os.path.dirname(final_preview), exist_ok=True)
+                shutil.copyfile(cached_path, final_preview + ".tmp")
+                os.replace(final_preview + ".tmp", final_preview)
+                write_preview_key(self.working_dir, mat.name, cache_key)
+                self.copied += 1
+            except OSError as e:
+                print(f"⚠️ Could not update preview for {mat.name}: {e}")
+            return
+
+        entry = self.pool.submit(request, timeout=RENDER_TIMEOUT, priority=render_scheduler.PREFETCH,
+                                 key=f"prefetch:{mat.name}", tag=mat.name)
+        reply = self.pool.wait(entry, RENDER_TIMEOUT)
+        if reply is None:
+            self.pool.cancel(lambda e: e is entry)
+            reply = entry["reply"]
+        elapsed = self._worker_time(entry)
+        try:
+            if reply and reply["status"] == "done":
+                try:
+                    if cache_key:
+                        self.preview_cache.put(cache_key, reply["output"])
+                    # Copied, not moved: the project may be on another drive than data/renders
+                    os.makedirs(os.path.dirname(final_preview), exist_ok=True)
+                    shutil.copyfile(reply["output"], final_preview + ".tmp")
+                    os.replace(final_preview + ".tmp", final_preview)
+                    write_preview_key(self.working_dir, mat.name, cache_key)
+                    self.rendered += 1
+                except OSError as e:
+                    print(f"⚠️ Could not save prefetched preview for {mat.name}: {e}")
+            elif reply and reply["status"] == "cancelled":
+                self.cancelled += 1
+                # Interrupted by the user; tried again once they are idle
+                if mat is not self.current:
+                    with self._cond:
+                        if mat not in self._queue:
+                            self._queue.append(mat)
+            elif reply and not self._stop.is_set():
+                print(f"⚠️ Prefetch render failed for {mat.name}: {reply.get('error')}")
+        finally:
+            try:
+                os.remove(request["output"])
+            except OSError:
+                pass
+        with self._cond:
+            self._rest_until = time.time() + elapsed * (1.0 - self.cpu_budget) / self.cpu_budget
+
+    def _worker_time(self, entry):
+        # How long the job held its worker. A cancelled render keeps running in
+        # Blender, so wait until the worker is actually free again.
+        if "started_at" not in entry:
+            return 0.0
+        deadline = time.time() + RENDER_TIMEOUT
+        while "finished_at" not in entry and time.time() < deadline and not self._stop.wait(0.05):
+            pass
+        return entry.get("finished_at", time.time()) - entry["started_at"]
+
+    def stats(self):
+        return {"rendered": self.rendered, "copied": self.copied, "cancelled": self.cancelled,
+                "cpu_budget": self.cpu_budget, "scanned": self._scanned}
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
@@ -0,0 +1,536 @@
+# Editor side of the daemon channel: one DaemonConnection per Blender process,
+# a RenderPool that dispatches jobs across several of them, and BatchJob for
+# rendering many materials per round-trip.
+import math
+import socket
+import subprocess
+import threading
+import time
+
+from src import render_protocol
+from src.render_scheduler import RenderScheduler, resolve, INTERACTIVE, PREFETCH, BACKGROUND
+
+
+def wait_saved(reply, timeout=None):
+    # The PNG of a reply; for a "saving" reply (a ring frame whose PNG is
+    # written after the reply) waits for the daemon's "saved" message.
+    # None if saving failed, timed out or the daemon went away.
+    save = reply.get("pending_save")
+    if save is None:
+        return reply.get("output")
+    if not save["event"].wait(timeout) or save["error"]:
+        return None
+    return save["output"]
+
+
+class DaemonConnection:
+    # The daemon connects back and says "hello", then "ready" once its scene is
+    # set up; requests are only sent after "ready". Every message it sends
+    # (including "pong" replies to heartbeats) refreshes last_seen.
+    def __init__(self, listener, process=None):
+        self.listener = listener
+        self.process = process
+        self.frame_ring = None
+        self.worker_id = None
+        self.port = listener.getsockname()[1]
+        self.pid = None
+        self.scene_version = 0
+        self.started_at = time.time()
+        self.last_seen = self.started_at
+        self.last_ping = 0.0
+        # From the latest pong: the request the daemon is working on, and for how long
+        self.busy = None
+        self.busy_for = 0.0
+        self.lost = False
+        self._sock = None
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._pending_lock = threading.Lock()
+        self._job_timeouts = {}   # request id -> timeout, until the daemon's final reply
+        self._saves = {}          # request id -> pending save of a "saving" reply
+        self._connected = threading.Event()
+        self._closed = False
+
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    @classmethod
+    def listen(cls):
+        listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        listener.bind((render_protocol.HOST, 0))
+        listener.listen(1)
+        return cls(listener)
+
+    def _accept(self):
+        try:
+            sock, _ = self.listener.accept()
+        except OSError:
+            return
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._sock = sock
+        reader = sock.makefile("rb")
+        hello = render_protocol.read_message(reader)
+        if not hello or hello.get("status") != "hello":
+            print("❌ Blender daemon sent an invalid greeting:", hello)
+            sock.close()
+            return
+        self.pid = hello.get("pid")
+        self.last_seen = time.time()
+        print(f"✅ Blender daemon connected (pid {self.pid})")
+        self._read_replies(reader)
+
+    def _read_replies(self, reader):
+        while True:
+            try:
+                message = render_protocol.read_message(reader)
+            except (OSError, ValueError) as e:
+                print("❌ Lost connection to Blender daemon:", e)
+                message = None
+            if message is None:
+                break
+            self.last_seen = time.time()
+            if message.get("status") == "ready":
+                print(f"✅ Blender daemon ready (pid {self.pid}) after {self.last_seen - self.started_at:.1f}s")
+                self._connected.set()
+                continue
+            if message.get("status") == "pong":
+                self.busy = message.get("busy")
+                self.busy_for = message.get("busy_for") or 0.0
+                continue
+            if message.get("status") == render_protocol.SAVED_STATUS:
+                with self._pending_lock:
+                    save = self._saves.pop(message.get("id"), None)
+                if save:
+                    save["output"], save["error"] = message.get("output"), message.get("error")
+                    save["event"].set()
+                continue
+            with self._pending_lock:
+                entry = self._pending.get(message.get("id"))
+                if message.get("status") in render_protocol.FINAL_STATUSES:
+                    self._job_timeouts.pop(message.get("id"), None)
+                    if entry:
+                        del self._pending[message["id"]]
+                    if message.get("saving"):
+                        # Registered before the reply is handed out, so wait_saved never misses it
+                        save = {"event": threading.Event(), "output": None, "error": None}
+                        self._saves[message["id"]] = save
+                        message["pending_save"] = save
+            if not entry:
+                continue
+            if entry["on_event"]:
+                entry["on_event"](message)
+            if message.get("status") in render_protocol.FINAL_STATUSES:
+                entry["reply"] = message
+                entry["event"].set()
+        if not self._closed:
+            self.lost = True
+        self._fail_pending("Blender daemon disconnected", lost=not self._closed)
+
+    def _fail_pending(self, error, lost=False):
+        # lost=True marks replies for jobs the daemon died with, so the pool can replay them
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+            saves, self._saves = self._saves, {}
+        for save in saves.values():
+            save["error"] = error
+            save["event"].set()
+        for request_id, entry in pending.items():
+            entry["reply"] = {"id": request_id, "status": "error", "error": error}
+            if lost:
+                entry["reply"]["lost"] = True
+            entry["event"].set()
+
+    def is_connected(self):
+        return self._connected.is_set() and not self._closed
+
+    def wait_until_connected(self, timeout=None):
+        # True once the daemon has reported "ready"
+        return self._connected.wait(timeout)
+
+    def ping(self):
+        self.last_ping = time.time()
+        return self.send({"type": "ping"})
+
+    def submit(self, message, on_event=None, timeout=30):
+        # Sends a request and returns its pending entry; use wait() for the reply.
+        entry = {"event": threading.Event(), "reply": None, "on_event": on_event}
+        request_id = message.setdefault("id", render_protocol.new_request_id())
+        if self._closed or not self.wait_until_connected(timeout) or self._closed:
+            entry["reply"] = {"id": request_id, "status": "error",
+                              "error": "Blender daemon is not connected"}
+            # A daemon the supervisor just replaced: the pool replays on the new one
+            if self.lost:
+                entry["reply"]["lost"] = True
+            entry["event"].set()
+            return entry
+        with self._pending_lock:
+            self._pending[request_id] = entry
+            self._job_timeouts[request_id] = timeout
+        try:
+            with self._send_lock:
+                self._sock.sendall(render_protocol.encode_message(message))
+        except OSError as e:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+                self._job_timeouts.pop(request_id, None)
+            entry["reply"] = {"id": request_id, "status": "error", "error": str(e)}
+            entry["event"].set()
+        return entry
+
+    def send(self, message):
+        # Fire-and-forget message such as "cancel"; no reply is expected
+        if not self.is_connected():
+            return False
+        try:
+            with self._send_lock:
+                self._sock.sendall(render_protocol.encode_message(message))
+        except OSError:
+            return False
+        return True
+
+    def wait(self, entry, timeout=None):
+        if not entry["event"].wait(timeout):
+            return None
+        return entry["reply"]
+
+    def job_timeout(self, request_id):
+        # The timeout a request was sent with, even if the editor stopped waiting
+        with self._pending_lock:
+            return self._job_timeouts.get(request_id)
+
+    def call(self, message, timeout=10, on_event=None):
+        entry = self.submit(message, on_event=on_event, timeout=timeout)
+        reply = self.wait(entry, timeout)
+        if reply is None:
+            with self._pending_lock:
+                self._pending.pop(message["id"], None)
+        return reply
+
+    def close(self, error="Blender daemon connection closed", lost=False):
+        self._closed = True
+        self.lost = self.lost or lost
+        self._connected.clear()
+        if self._sock:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        for sock in (self._sock, self.listener):
+            if sock:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        self._fail_pending(error, lost=lost)
+        if self.frame_ring:
+            self.frame_ring.close()
+
+
+MAX_REPLAYS = 1
+READY_POLL = 0.5
+
+
+class RenderPool:
+    # Spreads requests over several daemons. Each worker thread pulls the next
+    # job from the scheduler only when its daemon is ready and idle, so the
+    # highest priority job always goes to the first free worker.
+    #
+    # connections[slot] may be swapped for a fresh daemon by a
+    # DaemonSupervisor (src/daemon_supervisor.py); a job whose daemon died is
+    # replayed once on the replacement.
+    def __init__(self, connections):
+        self.connections = connections
+        self.scheduler = RenderScheduler()
+        self.supervisor = None
+        self.scene = None
+        self.scene_version = 0
+        self._scene_lock = threading.Lock()
+        self._closed = False
+        for slot in range(len(connections)):
+            threading.Thread(target=self._work, args=(slot,), daemon=True).start()
+
+    def __len__(self):
+        return len(self.connections)
+
+    def _work(self, slot):
+        while not self._closed:
+            # Jobs stay queued while this slot's daemon boots or restarts
+            if self.supervisor and slot in self.supervisor.failed_slots:
+                # Given up on; the remaining workers take its share
+                break
+            connection = self.connections[slot]
+            if not connection.wait_until_connected(READY_POLL) or not connection.is_connected():
+                continue
+            # A daemon that started after the last scene update catches up first
+            self._sync_scene(connection)
+            entry = self.scheduler.pop()
+            if entry is None:
+                break
+            if entry["event"].is_set():
+                # Cancelled between being scheduled and reaching this worker
+                self.scheduler.finish(entry)
+                continue
+            if not connection.is_connected():
+                # The daemon died while this worker waited for a job
+                self.scheduler.requeue(entry)
+                continue
+            self._dispatch(slot, entry)
+            self.scheduler.finish(entry)
+
+    def _dispatch(self, slot, entry):
+        message, timeout = entry["message"], entry["timeout"]
+        finished_items = set()
+
+        def on_event(event):
+            if event.get("item"):
+                finished_items.add(event["item"])
+            if entry["on_event"]:
+                entry["on_event"](event)
+
+        for attempt in range(MAX_REPLAYS + 1):
+            connection = self.connections[slot]
+            entry["connection"] = connection
+            sent_at = time.time()
+            reply = connection.call(message, timeout=timeout, on_event=on_event)
+            if (not reply or not reply.get("lost") or attempt == MAX_REPLAYS
+                    or entry["event"].is_set() or not self.supervisor):
+                break
+            replacement = self.supervisor.wait_for_replacement(slot, connection, timeout)
+            if not replacement:
+                break
+            # Batch items that already streamed back are not rendered twice
+            if message.get("type") == "batch":
+                message = dict(message, items=[item for item in message["items"]
+                                               if item.get("id") not in finished_items])
+            print(f"🔁 Replaying request {message['id']} on restarted Blender worker {replacement.worker_id}")
+
+        if reply is None:
+            reply = {"id": message["id"], "status": "error", "error": "Timeout waiting for render"}
+        reply.setdefault("worker", connection.port)
+        # Scheduling and channel time, for render tracing
+        reply["queued_at"] = entry.get("queued_at", sent_at)
+        reply["sent_at"] = sent_at
+        reply["round_trip"] = time.time() - sent_at
+        resolve(entry, reply.pop("status"), **{k: v for k, v in reply.items() if k != "id"})
+
+    def submit(self, message, on_event=None, timeout=30, priority=INTERACTIVE, key=None, tag=None):
+        message.setdefault("id", render_protocol.new_request_id())
+        entry = {"event": threading.Event(), "reply": None, "on_event": on_event,
+                 "message": message, "timeout": timeout,
+                 "priority": priority, "key": key, "tag": tag}
+        if priority == INTERACTIVE:
+            # Prefetching only borrows idle workers; the user gets them back at once
+            self.cancel(lambda e: e["priority"] == PREFETCH)
+        self.scheduler.push(entry)
+        return entry
+
+    def wait(self, entry, timeout=None):
+        # Also returns, with an error reply, once no worker is left that could
+        # ever run a job still queued, so waiting without a timeout cannot hang
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            if (not entry["event"].is_set() and "started_at" not in entry
+                    and not self.has_live_workers()):
+                if resolve(entry, "error", error="No Blender workers left to run this job"):
+                    self.scheduler.cancel(lambda e: e is entry)
+            step = READY_POLL if deadline is None else min(READY_POLL, max(0.0, deadline - time.time()))
+            if entry["event"].wait(step):
+                return entry["reply"]
+            if deadline is not None and time.time() >= deadline:
+                return None
+
+    def has_live_workers(self):
+        # A ready daemon, or one that is booting or being restarted
+        if self._closed:
+            return False
+        for slot, connection in enumerate(self.connections):
+            if self.supervisor and slot in self.supervisor.failed_slots:
+                continue
+            if connection.is_connected():
+                return True
+        return self.is_starting()
+
+    def call(self, message, timeout=10, on_event=None, **scheduling):
+        entry = self.submit(message, on_event=on_event, timeout=timeout, **scheduling)
+        deadline = time.time() + timeout
+        while True:
+            reply = self.wait(entry, max(0.0, deadline - time.time()))
+            if reply is not None:
+                break
+            # The timeout covers the render, not Blender's cold start: a job
+            # queued while daemons boot or restart keeps waiting, and gets the
+            # full timeout once it is dispatched
+            if "started_at" in entry and entry["started_at"] + timeout > deadline:
+                deadline = entry["started_at"] + timeout
+            elif "started_at" not in entry and self.is_starting():
+                deadline = time.time() + READY_POLL
+            else:
+                break
+        if reply is None:
+            self.scheduler.cancel(lambda e: e is entry)
+        return reply
+
+    def cancel(self, predicate):
+        # Pending jobs are dropped; in-flight ones are resolved right away and
+        # their daemon is asked to skip or stop them
+        for entry in self.scheduler.cancel(predicate):
+            connection = entry.get("connection")
+            if connection:
+                connection.send({"type": "cancel", "target": entry["message"]["id"]})
+
+    def has_jobs(self, key):
+        return self.scheduler.has_jobs(key)
+
+    def has_priority(self, priority):
+        return self.scheduler.has_priority(priority)
+
+    def idle_workers(self):
+        # Ready daemons not busy with a job (a cancelled job keeps its worker until the daemon stops)
+        return sum(1 for c in self.connections if c.is_connected()) - self.scheduler.in_flight_count()
+
+    def update_scene(self, scene):
+        # Pushes camera/light/model changes to every ready daemon (standby
+        # included); daemons that are still booting get them once ready
+        with self._scene_lock:
+            self.scene = scene
+            self.scene_version += 1
+        connections = list(self.connections)
+        if self.supervisor:
+            connections += self.supervisor.standby
+        for connection in connections:
+            if connection.is_connected():
+                self._sync_scene(connection)
+
+    def _sync_scene(self, connection):
+        with self._scene_lock:
+            if self.scene is None or connection.scene_version == self.scene_version:
+                return
+            message = render_protocol.scene_message(self.scene)
+            version = self.scene_version
+        if connection.send(message):
+            connection.scene_version = version
+
+    def is_starting(self):
+        # True while some daemon is expected to become ready
+        if self._closed:
+            return False
+        if self.supervisor:
+            return self.supervisor.is_starting()
+        return any(not c.is_connected() and c.process and c.process.poll() is None for c in self.connections)
+
+    def processes(self):
+        processes = [c.process for c in self.connections if c.process]
+        if self.supervisor:
+            processes += [c.process for c in self.supervisor.standby if c.process]
+        return processes
+
+    def supports_frames(self):
+        return all(c.frame_ring for c in self.connections)
+
+    def read_frame(self, reply):
+        # Raw RGBA pixels for a reply rendered with the "ring" transport
+        frame = reply.get("frame")
+        connection = next((c for c in self.connections if c.port == reply.get("worker")), None)
+        if not frame or not connection or not connection.frame_ring:
+            return None
+        return connection.frame_ring.read(frame["slot"], frame["seq"])
+
+    def stats(self):
+        stats = self.scheduler.stats()
+        stats["workers"] = len(self.connections)
+        if self.supervisor:
+            stats["supervisor"] = self.supervisor.stats()
+        return stats
+
+    def close(self, wait=2.0):
+        self._closed = True
+        connections = list(self.connections)
+        if self.supervisor:
+            connections += self.supervisor.stop()
+        self.scheduler.close()
+        for connection in connections:
+            connection.close()
+        for connection in connections:
+            if connection.process:
+                try:
+                    connection.process.wait(timeout=wait)
+                except subprocess.TimeoutExpired:
+                    pass
+
+
+MAX_CHUNK_SIZE = 16
+
+
+class BatchJob:
+    # Splits a list of batch items into chunks spread over the pool, and
+    # tracks per-item completion, progress and throughput as events stream in.
+    def __init__(self, pool, items, template, on_item=None, chunk_size=None,
+                 priority=BACKGROUND, tag=None):
+        self.pool = pool
+        self.items = items
+        self.template = template
+        self.on_item = on_item
+        self.priority = priority
+        self.tag = tag
+        # Several chunks per worker keeps everyone busy until the very end, and
+        # short chunks let interactive jobs jump in between them
+        self.chunk_size = chunk_size or max(1, min(MAX_CHUNK_SIZE, math.ceil(len(items) / (max(1, len(pool)) * 4))))
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.start_time = None
+        self._streamed = {}
+        self._entries = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.start_time = time.time()
+        for offset in range(0, len(self.items), self.chunk_size):
+            chunk = self.items[offset:offset + self.chunk_size]
+            message = dict(self.template, id=render_protocol.new_request_id(), items=chunk)
+            timeout = 60 + 30 * len(chunk)
+            entry = self.pool.submit(message, on_event=self._on_event, timeout=timeout,
+                                     priority=self.priority, tag=self.tag)
+            self._entries.append((chunk, entry))
+        return self
+
+    def _on_event(self, message):
+        if message.get("status") != "progress":
+            return
+        with self._lock:
+            self._streamed[message["id"]] = self._streamed.get(message["id"], 0) + 1
+            if message.get("error"):
+                self.failed += 1
+            else:
+                self.completed += 1
+        if self.on_item:
+            self.on_item(message)
+
+    def wait(self):
+        for chunk, entry in self._entries:
+            reply = self.pool.wait(entry)
+            missing = len(chunk) - self._streamed.get(reply["id"], 0)
+            if reply["status"] == "cancelled":
+                with self._lock:
+                    self.cancelled += missing
+            elif reply["status"] != "done":
+                # Items that never streamed back count as failed
+                print("❌ Batch chunk failed:", reply.get("error"))
+                with self._lock:
+                    self.failed += missing
+        return self.stats()
+
+    def cancel(self):
+        self.pool.cancel(lambda entry: any(entry is e for _, e in self._entries))
+
+    def stats(self):
+        elapsed = time.time() - self.start_time if self.start_time else 0.0
+        with self._lock:
+            completed, failed, cancelled = self.completed, self.failed, self.cancelled
+        return {
+            "total": len(self.items),
+            "completed": completed,
+            "failed": failed,
+            "cancelled": cancelled,
+            "elapsed": elapsed,
+            "per_second": completed / elapsed if elapsed > 0 else 0.0,
+        }
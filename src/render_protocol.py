@@ -0,0 +1,238 @@
+# Request/response protocol shared by the editor and the Blender daemon.
+# Messages are newline-delimited JSON objects sent over a localhost socket.
+# This module only uses the standard library so Blender's Python can import it.
+import json
+import math
+import os
+import uuid
+
+app_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+data_path = os.path.join(app_dir, "data")
+preview_model_dir = os.path.join(data_path, "preview_model")
+camera_config_path = os.path.join(data_path, "camera_config.txt")
+
+HOST = "127.0.0.1"
+PORT_ENV = "MATERIAL_EDITOR_PORT"
+WORKER_ENV = "MATERIAL_EDITOR_WORKER"
+THREADS_ENV = "MATERIAL_EDITOR_THREADS"
+TEXTURE_BUDGET_ENV = "MATERIAL_EDITOR_TEXTURE_BUDGET_MB"
+FRAME_RING_ENV = "MATERIAL_EDITOR_FRAME_RING"
+
+MAP_TYPES = ["albedo_map", "metalness_map", "detail_map", "emmissive_map"]
+PRIMITIVES = ["sphere", "cube", "cylinder"]
+MODEL_EXTENSIONS = (".obj", ".fbx", ".blend")
+PROXY_DIRNAME = "proxies"
+
+# Replies with one of these statuses close a request; anything else
+# (e.g. "progress") is an intermediate event for the same request id.
+FINAL_STATUSES = ("done", "error", "cancelled")
+# Follow-up to a "done" reply that carried "saving": <path>. The reply went out
+# as soon as the frame was ready, and this one reports the PNG written after
+# it ("output"), or why it could not be ("error").
+SAVED_STATUS = "saved"
+
+
+def new_request_id():
+    return uuid.uuid4().hex
+
+
+def encode_message(message):
+    return (json.dumps(message) + "\n").encode("utf-8")
+
+
+def read_message(reader):
+    line = reader.readline()
+    if not line:
+        return None
+    return json.loads(line.decode("utf-8"))
+
+
+def reply(request, status, **fields):
+    message = {"id": request.get("id"), "status": status}
+    message.update(fields)
+    return message
+
+
+def read_camera_config(path=camera_config_path):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            cx, cy, cz, light_rot = map(float, f.read().strip().split(","))
+    except ValueError:
+        return None
+    return {"location": [cx, cy, cz], "light_rotation": light_rot}
+
+
+def write_camera_config(camera, path=camera_config_path):
+    cx, cy, cz = camera["location"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as f:
+        f.write(f"{cx},{cy},{cz},{camera['light_rotation']}")
+    os.replace(path + ".tmp", path)
+
+
+def read_model_spec(working_dir=None):
+    # The project's preview_model/model.txt wins over the bundled default.
+    # Primitives stay as "primitive:<name>", files become absolute paths.
+    candidates = []
+    if working_dir:
+        candidates.append(os.path.join(working_dir, "preview_model"))
+    candidates.append(preview_model_dir)
+
+    for model_dir in candidates:
+        model_info_path = os.path.join(model_dir, "model.txt")
+        if not os.path.exists(model_info_path):
+            continue
+        with open(model_info_path, "r") as f:
+            name = f.read().strip()
+        if not name:
+            continue
+        if name.startswith("primitive:"):
+            return name
+        return os.path.join(model_dir, name)
+    return "primitive:sphere"
+
+
+def resolve_map_path(path, working_dir):
+    if not path:
+        return ""
+    if os.path.isabs(path) or not working_dir:
+        return path
+    return os.path.join(working_dir, path)
+
+
+def proxy_path(path):
+    # Downscaled preview copy of a texture, written by src/texture_ingest.py
+    folder, filename = os.path.split(path)
+    return os.path.join(folder, PROXY_DIRNAME, filename + ".png")
+
+
+def preview_map_path(path):
+    # Previews use the proxy while it is at least as new as the original;
+    # exports always read the original file
+    if not path:
+        return path
+    proxy = proxy_path(path)
+    try:
+        if os.path.getmtime(proxy) >= os.path.getmtime(path):
+            return proxy
+    except OSError:
+        pass
+    return path
+
+
+def material_payload(mat, working_dir=None, use_proxies=True):
+    payload = {
+        "name": mat.name,
+        "albedo": list(mat.albedo),
+        "smoothness": mat.smoothness_multiplier,
+        "metalness": mat.metalness_multiplier,
+    }
+    for map_type in MAP_TYPES:
+        path = resolve_map_path(mat.map_path(map_type), working_dir)
+        payload[map_type] = preview_map_path(path) if use_proxies else path
+    return payload
+
+
+def quality_tiers(config):
+    # Drafts trade resolution and samples for speed while a slider is moving.
+    # A samples value of 0 keeps whatever the preview scene is set up with.
+    return {
+        "draft": {
+            "tier": "draft",
+            "resolution": int(config.get("draft_resolution", 128)),
+            "samples": int(config.get("draft_samples", 8)),
+        },
+        "final": {
+            "tier": "final",
+            "resolution": int(config.get("final_resolution", 512)),
+            "samples": int(config.get("final_samples", 0)),
+        },
+    }
+
+
+def available_models(working_dir=None):
+    # Every model a preview can use: the primitives, then model files from the
+    # bundled and the project's preview_model folders
+    models = [f"primitive:{name}" for name in PRIMITIVES]
+    folders = [preview_model_dir] + ([os.path.join(working_dir, "preview_model")] if working_dir else [])
+    for folder in folders:
+        if os.path.isdir(folder):
+            models.extend(os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                          if name.lower().endswith(MODEL_EXTENSIONS))
+    return models
+
+
+def model_label(model_spec):
+    if model_spec.startswith("primitive:"):
+        return model_spec.split(":", 1)[1]
+    return os.path.splitext(os.path.basename(model_spec))[0]
+
+
+def orbit_camera(camera, azimuth):
+    # The camera turned around the model's vertical axis by azimuth degrees
+    cx, cy, cz = camera["location"]
+    angle = math.radians(azimuth)
+    location = [round(cx * math.cos(angle) - cy * math.sin(angle), 4),
+                round(cx * math.sin(angle) + cy * math.cos(angle), 4), cz]
+    return dict(camera, location=location)
+
+
+def read_scene(working_dir=None):
+    # Camera, light and preview model: everything a render needs besides the material
+    return {"camera": read_camera_config(), "model": read_model_spec(working_dir)}
+
+
+def scene_message(scene):
+    # Applied by the daemon in place (camera/light moved, model rebuilt if it
+    # changed) ahead of the next render; requests still carry the scene too
+    return {"id": new_request_id(), "type": "scene", "camera": scene.get("camera"), "model": scene.get("model")}
+
+
+def render_request(mat, working_dir, output_path=None, quality=None, scene=None):
+    # Without an explicit output, each request renders to its own scratch file.
+    # The editor passes its in-memory scene; otherwise it is read from disk.
+    request_id = new_request_id()
+    scene = scene or read_scene(working_dir)
+    return {
+        "id": request_id,
+        "type": "render",
+        "material": material_payload(mat, working_dir),
+        "camera": scene["camera"],
+        "model": scene["model"],
+        "output": output_path or os.path.join(data_path, "renders", f"{request_id}.png"),
+        "quality": quality or quality_tiers({})["final"],
+    }
+
+
+def multiview_request(mat, working_dir, views, quality=None):
+    # views: [{"model", "camera", "output"}, ...], rendered in one daemon pass
+    return {
+        "id": new_request_id(),
+        "type": "multiview",
+        "material": material_payload(mat, working_dir),
+        "views": [dict(view, id=view.get("id") or new_request_id()) for view in views],
+        "quality": quality or quality_tiers({})["final"],
+    }
+
+
+def batch_item(mat, working_dir, output_path):
+    return {
+        "id": new_request_id(),
+        "material": material_payload(mat, working_dir),
+        "output": output_path,
+    }
+
+
+def batch_request(items, working_dir, quality=None, scene=None):
+    # One scene setup (model, camera, quality) shared by every item
+    scene = scene or read_scene(working_dir)
+    return {
+        "id": new_request_id(),
+        "type": "batch",
+        "items": items,
+        "camera": scene["camera"],
+        "model": scene["model"],
+        "quality": quality or quality_tiers({})["final"],
+    }
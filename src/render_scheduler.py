@@ -0,0 +1,204 @@
+# Priority queue in front of the render pool.
+# - Jobs with a coalescing key are latest-wins: a newer job replaces the
+#   pending one, and at most one job per key is in flight at a time.
+# - Lower priority numbers run first, so background work yields to the
+#   interactive preview whenever a worker frees up.
+# - Pending and in-flight jobs can be cancelled by predicate.
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+
+INTERACTIVE = 0
+PREFETCH = 5
+BACKGROUND = 10
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", PREFETCH: "prefetch", BACKGROUND: "background"}
+
+
+def resolve(entry, status, **fields):
+    # The first resolution wins; late daemon replies for cancelled jobs are dropped
+    if entry["event"].is_set():
+        return False
+    reply = {"id": entry["message"]["id"], "status": status}
+    reply.update(fields)
+    entry["reply"] = reply
+    entry["event"].set()
+    return True
+
+
+class RenderScheduler:
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._heap = []
+        self._counter = itertools.count()
+        self._pending_by_key = {}
+        self._active_keys = {}        # key -> the entry running under it
+        self._in_flight = {}
+        self._closed = False
+
+        self._wait_times = {priority: deque(maxlen=500) for priority in PRIORITY_NAMES}
+        self.dispatched = 0
+        self.coalesced = 0
+        self.cancelled = 0
+
+    def push(self, entry):
+        with self._cond:
+            if self._closed:
+                resolve(entry, "error", error="Render scheduler is closed")
+                return
+            key = entry.get("key")
+            if key is not None:
+                previous = self._pending_by_key.pop(key, None)
+                if previous:
+                    previous["dead"] = True
+                    resolve(previous, "cancelled", error="Superseded by a newer request")
+                    self.coalesced += 1
+                self._pending_by_key[key] = entry
+            entry["queued_at"] = time.time()
+            entry["seq"] = next(self._counter)
+            heapq.heappush(self._heap, (entry["priority"], entry["seq"], entry))
+            self._cond.notify()
+
+    def pop(self):
+        # Blocks until a job may run; returns None once the scheduler is closed
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                entry = self._next_ready()
+                if entry:
+                    return entry
+                self._cond.wait()
+
+    def _next_ready(self):
+        blocked = []
+        ready = None
+        while self._heap:
+            item = heapq.heappop(self._heap)
+            entry = item[2]
+            if entry.get("dead"):
+                continue
+            if entry.get("key") is not None and entry["key"] in self._active_keys:
+                blocked.append(item)
+                continue
+            ready = entry
+            break
+        for item in blocked:
+            heapq.heappush(self._heap, item)
+        if not ready:
+            return None
+
+        key = ready.get("key")
+        if key is not None:
+            if self._pending_by_key.get(key) is ready:
+                del self._pending_by_key[key]
+            self._active_keys[key] = ready
+        self._in_flight[ready["message"]["id"]] = ready
+        ready["started_at"] = time.time()
+        self._wait_times[ready["priority"]].append(ready["started_at"] - ready["queued_at"])
+        self.dispatched += 1
+        return ready
+
+    def finish(self, entry):
+        # The worker is free again; for a cancelled job this can be well after it was resolved
+        with self._cond:
+            entry["finished_at"] = time.time()
+            self._in_flight.pop(entry["message"]["id"], None)
+            self._release_key(entry)
+            self._cond.notify_all()
+
+    def _release_key(self, entry):
+        # Only the entry holding the key releases it; a cancelled job may have
+        # handed it to a newer one already
+        key = entry.get("key")
+        if key is not None and self._active_keys.get(key) is entry:
+            del self._active_keys[key]
+
+    def requeue(self, entry):
+        # Puts back a job its worker could not send, in its original place in line
+        with self._cond:
+            self._in_flight.pop(entry["message"]["id"], None)
+            entry.pop("started_at", None)
+            key = entry.get("key")
+            self._release_key(entry)
+            if key is not None:
+                if key in self._pending_by_key:
+                    entry["dead"] = True
+                    resolve(entry, "cancelled", error="Superseded by a newer request")
+                    self.coalesced += 1
+                    self._cond.notify_all()
+                    return
+                self._pending_by_key[key] = entry
+            heapq.heappush(self._heap, (entry["priority"], entry["seq"], entry))
+            self._cond.notify_all()
+
+    def cancel(self, predicate):
+        # Returns the in-flight entries that were cancelled, so the caller can
+        # tell their daemons to stop early
+        cancelled_in_flight = []
+        with self._cond:
+            for _, _, entry in self._heap:
+                if not entry.get("dead") and predicate(entry):
+                    entry["dead"] = True
+                    if self._pending_by_key.get(entry.get("key")) is entry:
+                        del self._pending_by_key[entry["key"]]
+                    if resolve(entry, "cancelled", error="Cancelled"):
+                        self.cancelled += 1
+            for entry in self._in_flight.values():
+                if predicate(entry) and resolve(entry, "cancelled", error="Cancelled"):
+                    self.cancelled += 1
+                    cancelled_in_flight.append(entry)
+                    # The job it was keyed against may start right away on another
+                    # worker; this worker stays counted until its daemon replies
+                    self._release_key(entry)
+            if cancelled_in_flight:
+                self._cond.notify_all()
+        return cancelled_in_flight
+
+    def has_jobs(self, key):
+        with self._cond:
+            return key in self._active_keys or key in self._pending_by_key
+
+    def in_flight_count(self):
+        with self._cond:
+            return len(self._in_flight)
+
+    def has_priority(self, priority):
+        # True while a job of this priority is pending or in flight
+        with self._cond:
+            return (any(entry["priority"] == priority for entry in self._in_flight.values())
+                    or any(p == priority and not entry.get("dead") for p, _, entry in self._heap))
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            for _, _, entry in self._heap:
+                resolve(entry, "error", error="Render pool is closed")
+            self._heap = []
+            self._pending_by_key = {}
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            depth = {name: 0 for name in PRIORITY_NAMES.values()}
+            for _, _, entry in self._heap:
+                if not entry.get("dead"):
+                    depth[PRIORITY_NAMES.get(entry["priority"], str(entry["priority"]))] += 1
+            wait_times = {}
+            for priority, samples in self._wait_times.items():
+                ordered = sorted(samples)
+                wait_times[PRIORITY_NAMES[priority]] = {
+                    "count": len(ordered),
+                    "avg": sum(ordered) / len(ordered) if ordered else 0.0,
+                    "p95": ordered[int(len(ordered) * 0.95)] if ordered else 0.0,
+                }
+            return {
+                "queue_depth": depth,
+                "in_flight": len(self._in_flight),
+                "wait_times": wait_times,
+                "dispatched": self.dispatched,
+                "coalesced": self.coalesced,
+                "cancelled": self.cancelled,
+            }
@@ -0,0 +1,137 @@
+# Texture ingest: copies picked textures into the project off the Tk thread
+# and writes a downscaled proxy (<textures>/proxies/<file>.png, longest side
+# PROXY_MAX_SIZE) that preview renders load instead of the full-resolution
+# original. Exports keep using the original file.
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from src import render_protocol
+from src import texture_store
+from src.file_hash import sha256_file
+
+PROXY_MAX_SIZE = 1024
+COPY_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+def make_proxy(path, max_size=PROXY_MAX_SIZE):
+    # Module-level so it can run in a process pool. Returns
+    # {"path", "status": "created"|"small"|"failed", "proxy", "bytes_original", "bytes_proxy", "error"?}
+    from PIL import Image
+
+    proxy = render_protocol.proxy_path(path)
+    result = {"path": path, "proxy": None, "bytes_original": 0, "bytes_proxy": 0}
+    try:
+        result["bytes_original"] = os.path.getsize(path)
+        with Image.open(path) as img:
+            if max(img.size) <= max_size:
+                # Already small enough; a stale proxy would shadow the real file
+                if os.path.exists(proxy):
+                    os.remove(proxy)
+                result["status"] = "small"
+                return result
+            img.draft(img.mode, (max_size, max_size))
+            img.thumbnail((max_size, max_size), Image.LANCZOS)
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                img = img.convert("RGBA")
+            os.makedirs(os.path.dirname(proxy), exist_ok=True)
+            img.save(proxy + ".tmp", format="PNG")
+        os.replace(proxy + ".tmp", proxy)
+    except Exception as e:
+        result.update(status="failed", error=str(e))
+        return result
+    result.update(status="created", proxy=proxy, bytes_proxy=os.path.getsize(proxy))
+    return result
+
+
+def copy_with_progress(src, dst, on_progress=None):
+    total = os.path.getsize(src)
+    copied = 0
+    with open(src, "rb") as fsrc, open(dst + ".tmp", "wb") as fdst:
+        for chunk in iter(lambda: fsrc.read(COPY_CHUNK_SIZE), b""):
+            fdst.write(chunk)
+            copied += len(chunk)
+            if on_progress:
+                on_progress(copied, total)
+    # Never written in place: dst may be a hardlink to a shared stored texture
+    texture_store.replace_file(dst + ".tmp", dst)
+    return total
+
+
+class TextureIngest:
+    # Single imports: copy + proxy on a small thread pool. Callbacks run on the
+    # worker thread, so the editor hands them back to Tk itself.
+    def __init__(self, workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    def ingest(self, src, dst, on_progress=None, on_done=None, store=None):
+        # With a TextureStore, content already in the project is linked
+        # instead of copied, and new content is added to the store
+        def run():
+            started = time.time()
+            result = {"source": src, "path": dst, "deduplicated": False}
+            try:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if not (os.path.exists(dst) and os.path.samefile(src, dst)):
+                    digest = sha256_file(src) if store else None
+                    ext = os.path.splitext(dst)[1]
+                    if store and store.has(digest, ext):
+                        store.link(digest, dst)
+                        result["deduplicated"] = True
+                        if on_progress:
+                            size = os.path.getsize(dst)
+                            on_progress(size, size)
+                    else:
+                        copy_with_progress(src, dst, on_progress)
+                        if store:
+                            store.adopt(dst, digest)
+                result["proxy"] = make_proxy(dst)
+                result["status"] = "done"
+            except OSError as e:
+                result.update(status="failed", error=str(e))
+            result["elapsed"] = time.time() - started
+            if on_done:
+                on_done(result)
+            return result
+
+        return self.executor.submit(run)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def project_textures(working_dir, materials):
+    paths = set()
+    for mat in materials:
+        for map_type in render_protocol.MAP_TYPES:
+            path = render_protocol.resolve_map_path(mat.map_path(map_type), working_dir)
+            if path and os.path.isfile(path):
+                paths.add(os.path.abspath(path))
+    return sorted(paths)
+
+
+def build_proxies(paths, workers=None, force=False, on_progress=None):
+    # Bulk proxy generation; decoding and resampling are CPU-bound, so this
+    # uses processes rather than threads
+    summary = {"total": len(paths), "created": 0, "current": 0, "small": 0, "failed": 0,
+               "bytes_original": 0, "bytes_proxy": 0}
+    started = time.time()
+    todo = []
+    for path in paths:
+        if not force and render_protocol.preview_map_path(path) != path:
+            summary["current"] += 1
+        else:
+            todo.append(path)
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(make_proxy, path) for path in todo]
+            for done, future in enumerate(as_completed(futures), summary["current"] + 1):
+                result = future.result()
+                summary[result["status"]] += 1
+                summary["bytes_original"] += result["bytes_original"]
+                summary["bytes_proxy"] += result["bytes_proxy"]
+                if on_progress:
+                    on_progress(dict(result, done=done, total=len(paths)))
+    summary["elapsed"] = time.time() - started
+    return summary
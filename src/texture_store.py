@@ -0,0 +1,189 @@
+# Project-level content-addressed texture store: <project>/textures/store/ab/<sha256><ext>.
+# Material folders keep their usual materials/<name>/textures/<file> paths,
+# but those files are hardlinks to the stored object, so a texture shared by
+# many materials is on disk (and loaded by the daemon) once. Objects whose
+# link count drops to 1 are no longer referenced and can be collected.
+#
+# Objects are made read-only, so an image editor saving in place cannot
+# silently change every material sharing the texture; writers replace files
+# through a temp file instead (see replace_file), which breaks the link. An
+# object whose content no longer matches its name is dropped from the store
+# rather than linked into new materials.
+import os
+import stat
+import time
+
+from src import render_protocol
+from src.file_hash import HashMemo, sha256_file
+
+STORE_DIRNAME = os.path.join("textures", "store")
+
+
+def disk_usage(paths):
+    # Bytes actually used by a set of files, counting each inode once
+    seen = set()
+    total = 0
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        key = (info.st_dev, info.st_ino)
+        if key not in seen:
+            seen.add(key)
+            total += info.st_size
+    return total
+
+
+def make_read_only(path):
+    os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def make_writable(path):
+    os.chmod(path, stat.S_IMODE(os.stat(path).st_mode) | stat.S_IWUSR)
+
+
+def replace_file(tmp, dest):
+    # os.replace, also over a read-only stored texture (Windows refuses that)
+    try:
+        os.replace(tmp, dest)
+    except PermissionError:
+        make_writable(dest)
+        os.replace(tmp, dest)
+
+
+def remove_object(path):
+    try:
+        os.remove(path)
+    except PermissionError:
+        make_writable(path)
+        os.remove(path)
+
+
+class TextureStore:
+    def __init__(self, working_dir):
+        self.working_dir = working_dir
+        self.root = os.path.join(working_dir, STORE_DIRNAME)
+        self.hashes = HashMemo()
+
+    def object_path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], digest + ext.lower())
+
+    def adopt(self, path, digest=None):
+        # Registers a project file's content in the store (the first copy
+        # becomes the object) and turns later copies into hardlinks to it.
+        # Returns "stored", "linked", "current" or "copied" (no hardlink support).
+        digest = digest or sha256_file(path)
+        ext = os.path.splitext(path)[1]
+        obj = self.object_path(digest, ext)
+        if not self.verify(digest, ext):
+            os.makedirs(os.path.dirname(obj), exist_ok=True)
+            try:
+                os.link(path, obj)
+            except OSError:
+                # No hardlinks on this filesystem; storing a second copy would
+                # only cost space, so the material keeps its own file
+                return "copied"
+            make_read_only(obj)
+            return "stored"
+        if os.path.samefile(obj, path):
+            return "current"
+        self.link(digest, path)
+        return "linked"
+
+    def link(self, digest, dest):
+        # Points dest at an existing object; the swap is atomic
+        ext = os.path.splitext(dest)[1]
+        if not self.verify(digest, ext):
+            raise OSError(f"Stored texture {digest[:12]} is missing or was modified")
+        obj = self.object_path(digest, ext)
+        tmp = dest + ".tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        os.link(obj, tmp)
+        replace_file(tmp, dest)
+
+    def verify(self, digest, ext):
+        # True if the object exists and still holds the content it is named
+        # after (memoized by mtime and size). A modified object is removed from
+        # the store; the material files linked to it keep their content.
+        obj = self.object_path(digest, ext)
+        actual = self.hashes.digest(obj)
+        if not actual:
+            return False
+        if actual != digest:
+            print(f"⚠️ Stored texture {obj} was modified in place; dropping it from the store")
+            remove_object(obj)
+            return False
+        return True
+
+    def has(self, digest, ext):
+        return self.verify(digest, ext)
+
+    def collect(self):
+        # Removes stored objects no material file links to anymore
+        removed = 0
+        freed = 0
+        for folder, _, files in os.walk(self.root):
+            for name in files:
+                obj = os.path.join(folder, name)
+                info = os.stat(obj)
+                if info.st_nlink <= 1:
+                    remove_object(obj)
+                    removed += 1
+                    freed += info.st_size
+        return removed, freed
+
+
+def material_texture_files(working_dir):
+    # Every original under materials/*/textures. Proxies stay per-material:
+    # their freshness is judged by mtime, which a shared inode would break.
+    materials_dir = os.path.join(working_dir, "materials")
+    if not os.path.isdir(materials_dir):
+        return []
+    paths = []
+    for name in sorted(os.listdir(materials_dir)):
+        texture_dir = os.path.join(materials_dir, name, "textures")
+        for folder, subdirs, files in os.walk(texture_dir):
+            if render_protocol.PROXY_DIRNAME in subdirs:
+                subdirs.remove(render_protocol.PROXY_DIRNAME)
+            paths.extend(os.path.join(folder, f) for f in sorted(files) if not f.endswith(".tmp"))
+    return paths
+
+
+def dedupe_project(working_dir, dry_run=False, on_progress=None, store=None):
+    # One-shot migration: moves every material texture into the store and
+    # hardlinks it back. Returns disk usage before/after and per-status counts.
+    started = time.time()
+    store = store or TextureStore(working_dir)
+    paths = material_texture_files(working_dir)
+    summary = {"files": len(paths), "stored": 0, "linked": 0, "current": 0, "copied": 0, "failed": 0,
+               "bytes_before": disk_usage(paths), "dry_run": dry_run}
+
+    digests = {}
+    for done, path in enumerate(paths, 1):
+        try:
+            digest = sha256_file(path)
+            if dry_run:
+                status = "linked" if digest in digests else "stored"
+                digests.setdefault(digest, os.path.getsize(path))
+            else:
+                status = store.adopt(path, digest)
+        except OSError as e:
+            summary["failed"] += 1
+            if on_progress:
+                on_progress({"path": path, "status": "failed", "error": str(e), "done": done, "total": len(paths)})
+            continue
+        summary[status] += 1
+        if on_progress:
+            on_progress({"path": path, "status": status, "done": done, "total": len(paths)})
+
+    if dry_run:
+        summary["bytes_after"] = sum(digests.values())
+    else:
+        removed, _ = store.collect()
+        summary["collected"] = removed
+        summary["bytes_after"] = disk_usage(paths)
+    summary["bytes_saved"] = summary["bytes_before"] - summary["bytes_after"]
+    summary["elapsed"] = time.time() - started
+    return summary
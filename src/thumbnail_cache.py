@@ -0,0 +1,50 @@
+# Persistent gallery thumbnails in <project>/preview_cache/thumbs.
+# A thumbnail is valid while it is newer than the preview it was made from.
+import hashlib
+import os
+
+from PIL import Image
+
+PLACEHOLDER_COLOR = (80, 80, 80)
+
+
+class ThumbnailCache:
+    def __init__(self, working_dir, size=(96, 96)):
+        self.size = size
+        self.thumb_dir = os.path.join(working_dir, "preview_cache", "thumbs")
+        os.makedirs(self.thumb_dir, exist_ok=True)
+
+    def thumb_path(self, preview_path):
+        digest = hashlib.sha1(os.path.abspath(preview_path).encode("utf-8")).hexdigest()
+        return os.path.join(self.thumb_dir, f"{digest}_{self.size[0]}x{self.size[1]}.png")
+
+    def load(self, preview_path):
+        # Safe to call from worker threads; returns a PIL image, never a PhotoImage
+        try:
+            preview_mtime = os.path.getmtime(preview_path)
+        except OSError:
+            return Image.new("RGB", self.size, PLACEHOLDER_COLOR)
+
+        thumb_path = self.thumb_path(preview_path)
+        try:
+            if os.path.getmtime(thumb_path) >= preview_mtime:
+                with Image.open(thumb_path) as img:
+                    img.load()
+                    return img.copy()
+        except OSError:
+            pass
+
+        try:
+            with Image.open(preview_path) as img:
+                img.draft("RGB", self.size)
+                thumb = img.convert("RGBA").resize(self.size)
+        except Exception as e:
+            print(f"⚠️ Could not decode preview {preview_path}: {e}")
+            return Image.new("RGB", self.size, PLACEHOLDER_COLOR)
+
+        try:
+            thumb.save(thumb_path + ".tmp", format="PNG")
+            os.replace(thumb_path + ".tmp", thumb_path)
+        except OSError as e:
+            print(f"⚠️ Could not store thumbnail for {preview_path}: {e}")
+        return thumb
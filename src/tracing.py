@@ -0,0 +1,76 @@
+# Per-stage timing spans for preview renders. A trace id travels with the
+# render request (request["trace"]); the daemon times its own stages and sends
+# them back with the reply, and the editor appends both halves to
+# <project>/logs/render_trace.jsonl, one span per line.
+# Standard library only, so Blender's Python can import it.
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+TRACE_FILENAME = os.path.join("logs", "render_trace.jsonl")
+MAX_LOG_BYTES = 10 * 1024 * 1024
+MAX_SAMPLES = 1000
+
+
+class Trace:
+    def __init__(self, trace_id, source):
+        self.trace_id = trace_id
+        self.source = source
+        self.spans = []
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.time()
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start, (time.perf_counter() - began) * 1000.0, **attrs)
+
+    def add(self, name, start, ms, **attrs):
+        self.spans.append(dict(name=name, source=self.source, start=round(start, 6), ms=round(ms, 3), **attrs))
+
+    def extend(self, spans):
+        # Spans reported by the other side of the channel keep their own source
+        self.spans.extend(spans or [])
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class TraceLog:
+    def __init__(self, working_dir):
+        self.path = os.path.join(working_dir, TRACE_FILENAME)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._lock = threading.Lock()
+        self.samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+    def write(self, trace, **fields):
+        lines = []
+        for span in trace.spans:
+            record = dict(trace=trace.trace_id, **fields)
+            record.update(span)
+            lines.append(json.dumps(record))
+        with self._lock:
+            for span in trace.spans:
+                self.samples[span["name"]].append(span["ms"])
+            try:
+                if os.path.exists(self.path) and os.path.getsize(self.path) > MAX_LOG_BYTES:
+                    os.replace(self.path, self.path + ".1")
+                with open(self.path, "a") as f:
+                    f.write("\n".join(lines) + "\n")
+            except OSError as e:
+                print("⚠️ Could not write render trace:", e)
+
+    def summary(self):
+        # {stage: {"count", "p50", "p95"}} for this session, in milliseconds
+        with self._lock:
+            snapshot = {name: sorted(values) for name, values in self.samples.items()}
+        return {name: {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95)}
+                for name, values in snapshot.items()}
@@ -0,0 +1,211 @@
+# Writes <project>/exports/<material>/ for Unity: the material's textures and
+# a small C# snippet that builds the Standard-shader material.
+#
+# Exports are incremental: exports/export_manifest.json records a signature of
+# each material's values and texture contents, and materials whose signature
+# and output files are unchanged are skipped. Textures are reflinked into
+# place where the filesystem allows and copied otherwise. Hardlinks are opt-in
+# (hardlink=True / --hardlink): they share the inode with the project's own
+# file, so anything that edits the exported copy in place edits the source.
+import errno
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from src import texture_store
+from src.file_hash import HashMemo
+from src.material_model import FLOAT_FIELDS, TEXT_FIELDS
+
+MANIFEST_FILENAME = "export_manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_EXPORT_WORKERS = 8
+FICLONE = 0x40049409   # Linux ioctl that shares extents on btrfs/xfs
+
+
+def texture_source(working_dir, mat, map_type):
+    # Map paths are project-relative ("materials/<name>/textures/x.png");
+    # older entries were relative to the material folder
+    path = mat.map_path(map_type)
+    if not path:
+        return None
+    for candidate in (os.path.join(working_dir, path), os.path.join(working_dir, "materials", mat.name, path)):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def material_script(mat):
+    lines = ["// Auto-generated material definition",
+             "Material mat = new Material(Shader.Find(\"Standard\"));",
+             f"mat.color = new Color({mat.albedo_r}f, {mat.albedo_g}f, {mat.albedo_b}f);",
+             f"mat.SetFloat(\"_Glossiness\", {mat.smoothness_multiplier}f);",
+             f"mat.SetFloat(\"_Metallic\", {mat.metalness_multiplier}f);"]
+    for map_type in TEXT_FIELDS:
+        tex_var = map_type.replace("_map", "")
+        tex_file = os.path.basename(mat.map_path(map_type))
+        if tex_file:
+            lines.append(f"mat.SetTexture(\"_{tex_var}\", Resources.Load<Texture2D>(\"textures/{tex_file}\"));")
+    return "\n".join(lines) + "\n"
+
+
+def reflink(src, dst):
+    if not sys.platform.startswith("linux"):
+        return False
+    import fcntl
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+            return True
+        except OSError:
+            pass
+    os.remove(dst)
+    return False
+
+
+def place_file(src, dst, hardlink=False):
+    # Returns "linked" or "copied"; the destination is replaced atomically.
+    # Copies take no mode bits: a read-only store object must not make the
+    # export read-only, or replacing it on the next export fails on Windows.
+    tmp = dst + ".tmp"
+    if os.path.exists(tmp):
+        texture_store.remove_object(tmp)
+    method = None
+    if hardlink:
+        try:
+            os.link(src, tmp)
+            method = "linked"
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP, errno.EACCES):
+                raise
+    if method is None:
+        if reflink(src, tmp):
+            method = "linked"
+        else:
+            method = "copied"
+            shutil.copyfile(src, tmp)
+    texture_store.replace_file(tmp, dst)
+    return method
+
+
+class ExportManifest:
+    def __init__(self, working_dir):
+        self.path = os.path.join(working_dir, "exports", MANIFEST_FILENAME)
+        self.materials = {}
+        file_hashes = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if data.get("version") == MANIFEST_VERSION:
+                    self.materials = data.get("materials", {})
+                    file_hashes = data.get("file_hashes", {})
+            except (OSError, ValueError) as e:
+                print("⚠️ Export manifest unreadable, exporting everything:", e)
+        self.hashes = HashMemo(file_hashes)
+        self._lock = threading.Lock()
+
+    def signature(self, working_dir, mat):
+        values = {field: getattr(mat, field) for field in FLOAT_FIELDS}
+        textures = {}
+        for map_type in TEXT_FIELDS:
+            src = texture_source(working_dir, mat, map_type)
+            textures[map_type] = [os.path.basename(src), self.hashes.digest(src)] if src else None
+        encoded = json.dumps({"values": values, "textures": textures}, sort_keys=True).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def is_current(self, mat, signature, export_dir):
+        with self._lock:
+            entry = self.materials.get(mat.name)
+        if not entry or entry["signature"] != signature:
+            return False
+        return all(os.path.exists(os.path.join(export_dir, name)) for name in entry["files"])
+
+    def record(self, mat, signature, files):
+        with self._lock:
+            self.materials[mat.name] = {"signature": signature, "files": files, "exported": time.time()}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "materials": self.materials,
+                    "file_hashes": self.hashes.snapshot()}
+        with open(self.path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(self.path + ".tmp", self.path)
+
+
+def export_material(working_dir, mat, manifest=None, force=False, hardlink=False):
+    # Returns {"material", "output", "status": "exported"|"skipped", "bytes_copied", "bytes_linked", "bytes_skipped"}
+    export_dir = os.path.join(working_dir, "exports", mat.name)
+    result = {"material": mat.name, "output": export_dir, "status": "exported",
+              "bytes_copied": 0, "bytes_linked": 0, "bytes_skipped": 0}
+    sources = [src for src in (texture_source(working_dir, mat, map_type) for map_type in TEXT_FIELDS) if src]
+
+    signature = manifest.signature(working_dir, mat) if manifest else None
+    if manifest and not force and manifest.is_current(mat, signature, export_dir):
+        result["status"] = "skipped"
+        result["bytes_skipped"] = sum(os.path.getsize(src) for src in sources)
+        return result
+
+    os.makedirs(os.path.join(export_dir, "textures"), exist_ok=True)
+    files = []
+    for src in sources:
+        relative = os.path.join("textures", os.path.basename(src))
+        dst = os.path.join(export_dir, relative)
+        files.append(relative)
+        size = os.path.getsize(src)
+        if os.path.exists(dst) and os.path.samefile(src, dst):
+            result["bytes_skipped"] += size
+            continue
+        method = place_file(src, dst, hardlink=hardlink)
+        result["bytes_linked" if method == "linked" else "bytes_copied"] += size
+
+    cs_name = f"{mat.name}.cs"
+    cs_path = os.path.join(export_dir, cs_name)
+    script = material_script(mat)
+    try:
+        with open(cs_path, "r") as f:
+            unchanged = f.read() == script
+    except OSError:
+        unchanged = False
+    if not unchanged:
+        with open(cs_path, "w") as f:
+            f.write(script)
+    files.append(cs_name)
+
+    if manifest:
+        manifest.record(mat, signature, files)
+    return result
+
+
+def export_materials(working_dir, materials, workers=DEFAULT_EXPORT_WORKERS, force=False, on_progress=None,
+                     hardlink=False):
+    # Exports on a thread pool (the work is file I/O and hashing, which release
+    # the GIL); on_progress gets each export_material result plus done/total
+    manifest = ExportManifest(working_dir)
+    summary = {"total": len(materials), "exported": 0, "skipped": 0, "failed": 0,
+               "bytes_copied": 0, "bytes_linked": 0, "bytes_skipped": 0}
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(export_material, working_dir, mat, manifest, force, hardlink): mat for mat in materials}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                # One broken material must not abort the rest of the export
+                result = {"material": futures[future].name, "status": "failed", "error": str(e)}
+                summary["failed"] += 1
+            else:
+                summary[result["status"]] += 1
+                for field in ("bytes_copied", "bytes_linked", "bytes_skipped"):
+                    summary[field] += result[field]
+            if on_progress:
+                on_progress(dict(result, done=done, total=len(materials)))
+    manifest.save()
+    summary["elapsed"] = time.time() - started
+    return summary